@@ -0,0 +1,833 @@
+import math
+import itertools
+
+import numpy as np
+
+from src.fast_game import (
+    card_table, STARTING_HAND, MAX_HEAT, FACING_COS, ATTACK, UNRETIRE,
+    ENEMY_DISCARD, HURT_SELF, RANGE_CHECK, MANDATORY_RANGE, INCREASE_RANGE,
+)
+from src.game_record import (
+    GameRecord, SideRecord, WHITE, BLACK, TIE, NO_WINNER, steps_mask
+)
+from src.budget import BudgetExceeded
+from src.utils import mask_ids
+
+"""
+Lockstep batches of fast games: thousands of games played at once, as
+numpy arrays with a row per game, rather than one FastGame at a time.
+
+Every game in a batch is on the same turn (finished games just drop out of
+the 'live' rows), so it's always the same side's turn in all of them, and
+each phase is a handful of array operations over every live game:
+* drawing, the heat drop at the start of a turn, and the overheat check
+* choosing a card: the AI's sort key (see FastGame.card_key) for every
+  card in every hand, then the best card of each
+* playing cards: the n'th step of each game's card, grouped by step type,
+  so movement, facing, range checks, damage, discards etc. are worked out
+  for every game playing that step at once
+
+A card type's sort key only depends on the board through a few things
+(facing the enemy or not, which side of each range's ends the distance
+is, etc), so BatchTable works out every card type's key for every one of
+those boards up front, and a key is just a lookup.
+
+Each zone is a row of 'card codes' per game, (type id << id bits) | the
+card's instance id, so a card's type is just a shift.
+
+The only per game Python left is each game's own random numbers (the
+shuffles, the melt and gamble dice), and building the records at the end.
+
+It makes exactly the same choices and random draws as playing each game
+through FastGame (see engine_check.py). numpy's arctan2 can be an ulp off
+math.atan2, so angles are worked out with math, a game at a time.
+"""
+
+# Run using:
+# python -m src.batch_game [number of games]
+
+SIDES = 2
+ZONES = ["deck", "hand", "discarded", "retired"]
+
+# Columns of BatchTable.params: a step's own params, then for RANGE_CHECK,
+# the step it wraps (opcode, params)
+INNER_OP = 3
+INNER_PARAMS = slice(4, 7)
+
+
+def step_params(step):
+    """
+    A compiled step's numeric params, padded to 3
+    (MoveForward's 'flying' makes no difference to the fast engine)
+    """
+    params = [p for p in step[1:] if not isinstance(p, tuple)][:3]
+    return [int(p) for p in params] + [0] * (3 - len(params))
+
+
+def constraint(step):
+    """
+    What has to be true for a compiled step to take place (see
+    FastGame.step_can): [facing the enemy, lowest range, highest range,
+    hp above, enemy has cards in hand, a different card type retired,
+    never]
+    """
+    c = [False, -math.inf, math.inf, -math.inf, False, False, False]
+    op = step[0]
+    if op == ATTACK:
+        c[0], c[1], c[2] = True, step[2], step[3]
+    elif op == UNRETIRE:
+        c[5] = True
+    elif op == ENEMY_DISCARD:
+        c[4] = True
+    elif op == HURT_SELF:
+        c[3] = step[1]
+    elif op == MANDATORY_RANGE:
+        c[1], c[2] = step[1], step[2]
+    elif op == RANGE_CHECK:
+        # In range, and the step it wraps can take place
+        c = constraint(step[3])
+        c[1], c[2] = max(c[1], step[1]), min(c[2], step[2])
+    elif op == INCREASE_RANGE:
+        c[6] = True
+    return c
+
+
+def can(c, facing, distance, hp, enemy_hand, other_retired):
+    """
+    Can steps take place, given what they need (see constraint) and the
+    board (each can be an array, e.g. columns of steps and rows of boards)
+    """
+    needs_facing, low, high, hp_above, needs_hand, needs_other, never = c
+    return (
+        (facing | ~needs_facing) & (low <= distance) & (distance <= high)
+        & (hp > hp_above) & (enemy_hand | ~needs_hand)
+        & (other_retired | ~needs_other) & ~never
+    )
+
+
+def stand_ins(values):
+    """
+    A value from each stretch the sorted values cut the number line into:
+    below the first, the first, between it and the next, ...,
+    above the last (see BatchGames.distance_bucket)
+    """
+    result = []
+    below = values[0] - 2
+    for value in values:
+        result += [(below + value) / 2, value]
+        below = value
+    return result + [values[-1] + 1]
+
+
+class BatchTable:
+    """
+    The CardTable as arrays, by card type id (and step number), and
+    every card type's sort key on every board that can make a difference
+    """
+
+    def __init__(self, table):
+        types = table.size
+        self.steps = max(len(steps) for steps in table.steps)
+        self.heat = np.array(table.heat)
+        self.should_block = np.array(table.should_block)
+
+        # Opcode (-1 for none) and params of each card type's steps
+        self.ops = np.full((types, self.steps), -1)
+        self.params = np.zeros((types, self.steps, 7), dtype=np.int64)
+        for t, steps in enumerate(table.steps):
+            for k, step in enumerate(steps):
+                self.ops[t, k] = step[0]
+                self.params[t, k, :3] = step_params(step)
+                if step[0] == RANGE_CHECK:
+                    self.params[t, k, INNER_OP] = step[3][0]
+                    self.params[t, k, INNER_PARAMS] = step_params(step[3])
+
+        # Every (card type, step) that can't always take place, and what
+        # it needs to, as one column each
+        checks = [
+            (t, constraint(step), mandatory)
+            for t in range(types) for step, mandatory in table.checks[t]
+        ]
+        c = [
+            np.array([check[1][i] for check in checks], dtype=dtype)
+            for i, dtype in enumerate(
+                [bool, float, float, float, bool, bool, bool])
+        ]
+        mandatory = np.array([m for _, _, m in checks], dtype=bool)
+        # Column -> card type, to count up each type's steps that can
+        incidence = np.zeros((len(checks), types), dtype=np.float32)
+        incidence[np.arange(len(checks)), [t for t, _, _ in checks]] = 1
+
+        # The boards: facing or not, where the distance is among the ends
+        # of the ranges, how many of the hp thresholds the hp is above,
+        # the enemy has cards in hand or not, a different card type
+        # retired or not (see card_keys)
+        self.ranges = np.array(sorted(
+            {v for v in c[1].tolist() + c[2].tolist() if math.isfinite(v)}
+            or {0}), dtype=float)
+        self.hp_above = np.array(sorted(
+            {v for v in c[3].tolist() if math.isfinite(v)} or {0}))
+        boards = list(itertools.product(
+            [False, True], stand_ins(self.ranges),
+            stand_ins(self.hp_above)[::2], [False, True], [False, True]))
+        self.boards = len(boards)
+        board = [np.array(column)[:, None] for column in zip(*boards)]
+        can_now = can(c, *board)
+        can_count = np.array(table.fixed_cans) + (
+            can_now.astype(np.float32) @ incidence).astype(np.int64)
+        mandatory_can = (
+            (~can_now & mandatory).astype(np.float32) @ incidence) == 0
+
+        # FastGame.card_key's (not should, -can count, heat, -damage) as
+        # one integer, in the same order. The keys here leave out 'not
+        # should' (which also depends on the heat), and 'could' is
+        # whether the card would be a should card if it didn't overheat
+        damage = np.array(table.damage)
+        damage_span = damage.max() - damage.min() + 1
+        heat_span = self.heat.max() - self.heat.min() + 1
+        can_unit = heat_span * damage_span
+        self.not_should = (self.steps + 1) * can_unit
+        base = (self.heat - self.heat.min()) * damage_span
+        base += damage.max() - damage
+        # (By card type, then board)
+        self.keys = ((self.steps - can_count) * can_unit + base).T.ravel()
+        self.could = ((can_count > 0) & mandatory_can).T.ravel()
+
+        # Card type -> the step types on it (see steps_mask)
+        step_ids = [mask_ids(steps_mask(1 << t)) for t in range(types)]
+        self.step_types = np.zeros(
+            (types, max(max(ids, default=0) for ids in step_ids) + 1),
+            dtype=np.float32)
+        for t, ids in enumerate(step_ids):
+            self.step_types[t, ids] = 1
+
+
+_batch_table = None
+def batch_table():
+    global _batch_table
+    table = card_table()
+    if _batch_table is None or _batch_table.source is not table:
+        _batch_table = BatchTable(table)
+        _batch_table.source = table
+    return _batch_table
+
+
+class BatchGames:
+    """
+    A batch of FastGames (that haven't started yet) played in lockstep.
+    play() plays them all out, then records() has each one's GameRecord,
+    or the BudgetExceeded it was thrown out for
+    """
+
+    def __init__(self, games):
+        self.table = batch_table()
+        self.budget = games[0].budget
+        if self.budget.seconds is not None:
+            # (Every game in a batch takes the same time)
+            raise ValueError("Can't time games played in a batch")
+        n = len(games)
+        sides = [[g.white for g in games], [g.black for g in games]]
+        size = max(len(side.types) for s in sides for side in s)
+        self.id_bits = size.bit_length()
+
+        # Each game's own random numbers, and what each side brought
+        self.rngs = [g.rng for g in games]
+        self.loadouts = [
+            [(side.pilot, side.mech, tuple(side.upgrades)) for side in s]
+            for s in sides
+        ]
+
+        def side_array(attribute, dtype=np.int64):
+            return np.array(
+                [[getattr(side, attribute) for side in s] for s in sides],
+                dtype=dtype)
+        self.hp = side_array("hp")
+        self.max_hp = side_array("max_hp")
+        self.heat = side_array("heat")
+        self.x = side_array("x", float)
+        self.y = side_array("y", float)
+        self.rotation = np.zeros((SIDES, n))
+        self.hx = np.zeros((SIDES, n))
+        self.hy = np.zeros((SIDES, n))
+        self.back_hx = np.zeros((SIDES, n))
+        self.back_hy = np.zeros((SIDES, n))
+        everyone = np.arange(n)
+        rotation = side_array("rotation", float)
+        for s in range(SIDES):
+            self.set_rotation(s, everyone, rotation[s])
+        self.my_turn = side_array("my_turn", bool)
+        self.turn_cards = side_array("turn_cards")
+        self.total_melt_dmg = side_array("total_melt_dmg")
+
+        # Each zone as a row of card codes per game,
+        # with how many of the row are in use
+        self.zones = {
+            zone: np.zeros((SIDES, n, size), dtype=np.int64)
+            for zone in ZONES
+        }
+        self.lengths = {zone: np.zeros((SIDES, n), dtype=np.int64)
+                        for zone in ZONES}
+        for s, side_list in enumerate(sides):
+            for g, side in enumerate(side_list):
+                for zone in ZONES:
+                    cards = [
+                        side.types[card] << self.id_bits | card
+                        for card in getattr(side, zone)
+                    ]
+                    self.zones[zone][s, g, :len(cards)] = cards
+                    self.lengths[zone][s, g] = len(cards)
+        # Which card types each side played, and how many cards
+        self.played = np.zeros(
+            (SIDES, n, len(self.table.heat)), dtype=bool)
+        self.played_count = np.zeros((SIDES, n), dtype=np.int64)
+
+        self.turns = 0
+        # Each turn's cards played, for every game
+        self.turn_lengths = []
+        self.end_turn = np.zeros(n, dtype=np.int64)
+        self.first_blood_turn = np.zeros(n, dtype=np.int64)  # 0 for none
+        self.outcome = np.full(n, -1)
+        self.game_melt_dmg = np.zeros(n, dtype=np.int64)
+        self.total_weapon_dmg = np.zeros(n, dtype=np.int64)
+        self.card_plays = np.array([g.card_plays for g in games])
+        self.errors = [None] * n
+        # The games still being played
+        self.live = everyone
+
+    # Game flow
+    def play(self):
+        for side in range(SIDES):
+            self.draw_hand(side, self.live)
+        while len(self.live):
+            self.play_turn()
+
+    def play_turn(self):
+        self.turns += 1
+        side = 0 if self.turns % 2 == 1 else 1
+        rows = self.live
+        self.draw_hand(side, rows)
+        self.heat[side, rows] -= 1
+        self.my_turn[side, rows] = True
+        self.turn_cards[side, rows] = 0
+
+        budget = self.budget
+        playing = rows
+        while len(playing):
+            playing = playing[
+                self.my_turn[side, playing]
+                & (self.turn_cards[side, playing] < budget.cards_per_turn)
+            ]
+            playing, cards = self.choose_card(side, playing)
+            self.play_card(side, playing, cards)
+
+        # Thrown out for going over budget (as Budget.long_turn / charge
+        # would raise)
+        cards = self.turn_cards[side, rows]
+        over = cards >= budget.cards_per_turn
+        for g, n in zip(rows[over], cards[over]):
+            self.errors[g] = BudgetExceeded(
+                "cards_per_turn", int(n), budget.cards_per_turn)
+        lengths = np.zeros(len(self.outcome), dtype=np.int64)
+        lengths[rows] = cards
+        self.turn_lengths.append(lengths)
+        self.card_plays[rows] += cards
+        if budget.card_plays is not None:
+            spent = ~over & (self.card_plays[rows] > budget.card_plays)
+            for g in rows[spent]:
+                self.errors[g] = BudgetExceeded(
+                    "card_plays", int(self.card_plays[g]), budget.card_plays)
+            over |= spent
+        rows = rows[~over]
+
+        white_dead = self.hp[0, rows] <= 0
+        black_dead = self.hp[1, rows] <= 0
+        outcome = np.select(
+            [white_dead & black_dead, white_dead, black_dead],
+            [TIE, BLACK, WHITE], -1)
+        # (Like GameState, melt is only totaled up if someone won/tied)
+        won = outcome >= 0
+        self.game_melt_dmg[rows[won]] = (
+            self.total_melt_dmg[0, rows[won]]
+            + self.total_melt_dmg[1, rows[won]])
+        if self.turns >= budget.turns:
+            outcome[~won] = NO_WINNER
+        self.outcome[rows] = outcome
+        self.end_turn[rows] = self.turns
+        self.live = rows[outcome < 0]
+
+    def draw_card(self, side, rows):
+        deck = self.lengths["deck"]
+        discarded = self.lengths["discarded"]
+        # If we are out of cards, shuffle back in discard
+        for g in rows[(deck[side, rows] == 0)
+                      & (discarded[side, rows] > 0)]:
+            cards = self.zones["discarded"][side, g, :discarded[side, g]]
+            cards = self.rngs[g].sample(cards.tolist(), len(cards))
+            self.zones["deck"][side, g, :len(cards)] = cards
+            deck[side, g] = len(cards)
+            discarded[side, g] = 0
+
+        rows = rows[deck[side, rows] > 0]
+        deck[side, rows] -= 1
+        cards = self.zones["deck"][side, rows, deck[side, rows]]
+        self.add("hand", side, rows, cards)
+
+    def draw_hand(self, side, rows):
+        for i in range(STARTING_HAND):
+            rows = rows[self.lengths["hand"][side, rows] < STARTING_HAND]
+            self.draw_card(side, rows)
+
+    def play_card(self, side, rows, cards):
+        self.remove("hand", side, rows, cards)
+        self.add("discarded", side, rows, cards)
+
+        table = self.table
+        card_types = cards >> self.id_bits
+        self.heat[side, rows] += table.heat[card_types]
+        for k in range(table.steps):
+            self.play_steps(
+                side, rows, cards, table.ops[card_types, k],
+                table.params[card_types, k])
+
+        self.check_heat(1 - side, rows)
+        self.check_heat(side, rows)
+
+        self.turn_cards[side, rows] += 1
+        self.played[side, rows, card_types] = True
+        self.played_count[side, rows] += 1
+
+    def play_steps(self, side, rows, cards, ops, params):
+        """
+        Each row's step (opcode, params), grouped by step type
+        """
+        for op in np.unique(ops):
+            if op < 0:
+                continue
+            these = ops == op
+            self.step_plays[op](
+                self, side, rows[these], cards[these], params[these])
+
+    def check_heat(self, side, rows):
+        heat = self.heat
+        hot = rows[heat[side, rows] > MAX_HEAT]
+        if len(hot):
+            melt_dmg = np.array(
+                [self.rngs[g].roll("melt") + 1 for g in hot])
+            heat[side, hot] = MAX_HEAT - melt_dmg
+            self.hp[side, hot] -= melt_dmg
+            self.total_melt_dmg[side, hot] += melt_dmg
+            self.my_turn[side, hot] = False
+        heat[side, rows] = np.maximum(heat[side, rows], 1)
+
+    def damage_enemy(self, side, rows, ammount):
+        victim = 1 - side
+
+        # If looking at their but, deal extra dmg
+        ammount = ammount << self.facing(victim, rows, back=True)
+
+        sacc = self.get_sacrafice_card(victim, rows, ammount)
+        blocked = sacc >= 0
+        self.retire(victim, rows[blocked], sacc[blocked])
+        ammount[blocked] -= self.table.heat[sacc[blocked] >> self.id_bits]
+
+        hit = ammount > 0
+        rows, ammount = rows[hit], ammount[hit]
+        self.hp[victim, rows] -= ammount
+        self.total_weapon_dmg[rows] += ammount
+        first = rows[self.first_blood_turn[rows] == 0]
+        self.first_blood_turn[first] = self.turns
+
+    def retire(self, side, rows, cards):
+        # (If it was shuffled in after a discard, it could be in the deck)
+        for zone in ["hand", "discarded", "deck"]:
+            self.remove(zone, side, rows, cards)
+        self.add("retired", side, rows, cards)
+
+    # Zones
+    def zone(self, zone, side, rows):
+        """
+        The rows' cards in a zone, only as wide as the fullest row,
+        and which of them are in use
+        """
+        lengths = self.lengths[zone][side, rows]
+        width = lengths.max(initial=1)
+        cards = self.zones[zone][side, rows, :width]
+        return cards, np.arange(width) < lengths[:, None]
+
+    def add(self, zone, side, rows, cards):
+        lengths = self.lengths[zone]
+        self.zones[zone][side, rows, lengths[side, rows]] = cards
+        lengths[side, rows] += 1
+
+    def remove(self, zone, side, rows, cards):
+        """
+        Take the cards out of the zone (where they are in it),
+        keeping the rest in order
+        """
+        zone_cards, in_use = self.zone(zone, side, rows)
+        found = (zone_cards == cards[:, None]) & in_use
+        at = found.argmax(axis=1)
+        found = found.any(axis=1)
+        # Shuffle everything after it down one
+        slots = np.arange(zone_cards.shape[1])
+        shifted = np.minimum(slots + (slots >= at[found, None]), slots[-1])
+        rows = rows[found]
+        self.zones[zone][side, rows, :len(slots)] = np.take_along_axis(
+            zone_cards[found], shifted, axis=1)
+        self.lengths[zone][side, rows] -= 1
+
+    # Geometry
+    def set_rotation(self, side, rows, rotation):
+        # Same sums as Side.set_rotation, so facing checks come out the same
+        rotation = np.mod(rotation, 360)
+        self.rotation[side, rows] = rotation
+        radians = np.radians(rotation)
+        self.hx[side, rows] = np.cos(radians)
+        self.hy[side, rows] = np.sin(radians)
+        radians = np.radians(rotation + 180)
+        self.back_hx[side, rows] = np.cos(radians)
+        self.back_hy[side, rows] = np.sin(radians)
+
+    def to_enemy(self, side, rows):
+        enemy = 1 - side
+        dx = self.x[enemy, rows] - self.x[side, rows]
+        dy = self.y[enemy, rows] - self.y[side, rows]
+        return dx, dy
+
+    def distance(self, side, rows):
+        dx, dy = self.to_enemy(side, rows)
+        return np.sqrt(dx**2 + dy**2)
+
+    def angle(self, side, rows):
+        dx, dy = self.to_enemy(side, rows)
+        radians = np.fromiter(
+            map(math.atan2, dy.tolist(), dx.tolist()), float, len(rows))
+        return np.degrees(radians) % 360
+
+    def facing(self, side, rows, back=False):
+        """
+        Is the enemy within +/- 45 degrees of our front (or back)
+        """
+        if back:
+            hx, hy = self.back_hx[side, rows], self.back_hy[side, rows]
+        else:
+            hx, hy = self.hx[side, rows], self.hy[side, rows]
+        dx, dy = self.to_enemy(side, rows)
+        distance = np.sqrt(dx**2 + dy**2)
+        on_top = distance == 0
+        dx[on_top], dy[on_top], distance[on_top] = 1, 0, 1
+        return hx * dx + hy * dy >= distance * FACING_COS
+
+    def move(self, side, rows, distance, angle=None):
+        if angle is None:
+            angle = self.rotation[side, rows]
+        radians = np.radians(angle)
+        self.x[side, rows] = self.x[side, rows] + distance * np.cos(radians)
+        self.y[side, rows] = self.y[side, rows] + distance * np.sin(radians)
+
+    # AI choices, same as FastGame's
+    def retired_type(self, side, rows):
+        """
+        The card type each row has retired, -1 if none,
+        -2 if more than one type
+        """
+        cards, in_use = self.zone("retired", side, rows)
+        types = cards >> self.id_bits
+        none = len(self.table.heat)
+        lowest = np.where(in_use, types, none).min(axis=1)
+        highest = np.where(in_use, types, -1).max(axis=1)
+        return np.where(lowest == highest, lowest, -1 - (highest >= 0))
+
+    def other_retired(self, retired_type, card_types):
+        """
+        Is a card of a different type to card_types retired, given the
+        retired_type of each row (see retired_type)
+        """
+        return (retired_type != -1) & (retired_type != card_types)
+
+    def distance_bucket(self, distance):
+        """
+        Where each distance is among the ends of the ranges (see
+        BatchTable): 0 below the first, 1 on it, 2 between it and the
+        next, ...
+        """
+        ranges = self.table.ranges
+        below = np.searchsorted(ranges, distance)
+        on = ranges[np.minimum(below, len(ranges) - 1)] == distance
+        return 2 * below + on
+
+    def card_keys(self, side, rows, cards):
+        """
+        FastGame.card_key for the rows' cards (a row of cards per game),
+        as ints
+        """
+        table = self.table
+        card_types = cards >> self.id_bits
+        board = (
+            self.facing(side, rows) * (2 * len(table.ranges) + 1)
+            + self.distance_bucket(self.distance(side, rows))
+        )
+        board = board * (len(table.hp_above) + 1) + np.searchsorted(
+            table.hp_above, self.hp[side, rows])
+        board = board * 2 + (self.lengths["hand"][1 - side, rows] > 0)
+        board *= 2
+        other = self.other_retired(
+            self.retired_type(side, rows)[:, None], card_types)
+        i = card_types * table.boards + (board[:, None] + other)
+        should = table.could[i] & (
+            self.heat[side, rows, None] + table.heat[card_types] <= MAX_HEAT)
+        return table.keys[i] + ~should * table.not_should
+
+    def first_lowest(self, keys, in_use):
+        # (What min() picks)
+        return np.where(in_use, keys, np.iinfo(keys.dtype).max).argmin(axis=1)
+
+    def last_highest(self, keys, in_use):
+        # (What max() of the reversed cards picks)
+        last = keys.shape[1] - 1
+        return last - np.where(in_use, keys, -1)[:, ::-1].argmax(axis=1)
+
+    def choose_card(self, side, rows):
+        """
+        The rows that play a card, and the card they play
+        """
+        rows = rows[self.lengths["hand"][side, rows] > 0]
+        hand, in_use = self.zone("hand", side, rows)
+        keys = self.card_keys(side, rows, hand)
+        slots = self.first_lowest(keys, in_use)
+        everyone = np.arange(len(rows))
+        cards = hand[everyone, slots]
+        should = keys[everyone, slots] < self.table.not_should
+
+        # (one in 'x' chance to play overheating card)
+        one_in = 5
+        play = np.ones(len(rows), dtype=bool)
+        for i in np.flatnonzero(~should):
+            play[i] = self.rngs[rows[i]].roll("gamble", one_in + 1) >= one_in
+
+        # Don't overheat if it might kill you
+        play &= should | (self.hp[side, rows] > 5)
+        return rows[play], cards[play]
+
+    def discard(self, side, rows, number_of_cards):
+        for i in range(number_of_cards.max(initial=0)):
+            go = (
+                (number_of_cards > i) & (self.lengths["hand"][side, rows] > 0))
+            rows, number_of_cards = rows[go], number_of_cards[go]
+            hand, in_use = self.zone("hand", side, rows)
+            slots = self.last_highest(
+                self.card_keys(side, rows, hand), in_use)
+            cards = hand[np.arange(len(rows)), slots]
+            self.remove("hand", side, rows, cards)
+            self.add("discarded", side, rows, cards)
+
+    def get_sacrafice_card(self, side, rows, damage):
+        """
+        The card each row blocks with, or -1
+        """
+        sacc = np.full(len(rows), -1)
+        could = (
+            (self.lengths["hand"][side, rows] > 0)
+            & (self.hp[side, rows] - damage <= self.max_hp[side, rows] // 2)
+        )
+        rows, damage = rows[could], damage[could, None]
+        hand, in_use = self.zone("hand", side, rows)
+        card_types = hand >> self.id_bits
+        heat = self.table.heat[card_types]
+
+        # Ignore cards that can't block
+        blockers = in_use & self.table.should_block[card_types]
+        # (Best fit, then the first of the reverse sorted hand,
+        # see Player.get_sacrafice_card)
+        fit = 4 * (-heat == damage) + 2 * (-heat > damage) + (heat < damage)
+        fit = np.where(blockers, fit, 8)
+        best = blockers & (fit == fit.min(axis=1, initial=8)[:, None])
+        slots = self.last_highest(self.card_keys(side, rows, hand), best)
+        cards = hand[np.arange(len(rows)), slots]
+        sacc[could] = np.where(best.any(axis=1), cards, -1)
+        return sacc
+
+    # Steps, see 'step_plays' below. Each plays the step for some rows,
+    # given the rows' cards and step params
+    def play_nothing(self, side, rows, cards, params):
+        pass
+
+    def play_move_forward(self, side, rows, cards, params):
+        range_max, range_min = params[:, 0], params[:, 1]
+        distance = np.minimum(
+            range_max, np.maximum(self.distance(side, rows) - 1, range_min))
+        self.move(side, rows, np.where(
+            self.facing(side, rows), distance, range_min))
+
+    def play_move_away(self, side, rows, cards, params):
+        away_angle = (self.angle(side, rows) + 180) % 360
+        self.move(side, rows, params[:, 1], away_angle)
+
+    def play_rotate(self, side, rows, cards, params):
+        rot_max = params[:, 0]
+        rotation = self.rotation[side, rows]
+        angle_difference = (self.angle(side, rows) - rotation + 360) % 360
+        angle_difference = np.where(
+            angle_difference > 180, angle_difference - 360, angle_difference)
+        rotation_amount = np.maximum(
+            np.minimum(rot_max, angle_difference), -rot_max)
+        self.set_rotation(side, rows, rotation + rotation_amount)
+
+    def play_force_rotate(self, side, rows, cards, params):
+        enemy = 1 - side
+        self.set_rotation(enemy, rows, self.rotation[enemy, rows] + 90)
+
+    def play_attack(self, side, rows, cards, params):
+        distance = self.distance(side, rows)
+        hit = (
+            self.facing(side, rows)
+            & (params[:, 1] <= distance) & (distance <= params[:, 2])
+        )
+        self.damage_enemy(side, rows[hit], params[hit, 0])
+
+    def play_retire(self, side, rows, cards, params):
+        self.retire(side, rows, cards)
+
+    def play_unretire(self, side, rows, cards, params):
+        number_of_cards = params[:, 0]
+        for i in range(number_of_cards.max(initial=0)):
+            go = (number_of_cards > i) & self.other_retired(
+                self.retired_type(side, rows), cards >> self.id_bits)
+            rows, cards = rows[go], cards[go]
+            number_of_cards = number_of_cards[go]
+            retired, in_use = self.zone("retired", side, rows)
+            slots = self.first_lowest(
+                self.card_keys(side, rows, retired), in_use)
+            unretired = retired[np.arange(len(rows)), slots]
+            self.remove("retired", side, rows, unretired)
+            self.add("hand", side, rows, unretired)
+
+    def play_draw(self, side, rows, cards, params):
+        number_of_cards = params[:, 0]
+        for i in range(number_of_cards.max(initial=0)):
+            self.draw_card(side, rows[number_of_cards > i])
+
+    def play_end_turn(self, side, rows, cards, params):
+        self.my_turn[side, rows] = False
+
+    def play_discard(self, side, rows, cards, params):
+        self.discard(side, rows, params[:, 0])
+
+    def play_enemy_discard(self, side, rows, cards, params):
+        self.discard(1 - side, rows, params[:, 0])
+
+    def play_heat_enemy(self, side, rows, cards, params):
+        self.heat[1 - side, rows] += params[:, 0]
+
+    def play_hurt_self(self, side, rows, cards, params):
+        self.hp[side, rows] -= params[:, 0]
+
+    def play_range_check(self, side, rows, cards, params):
+        # In range, and the step it wraps can take place
+        inner = [
+            constraint((int(p[INNER_OP]), *p[INNER_PARAMS].tolist()))
+            for p in params
+        ]
+        c = [np.array(column) for column in zip(*inner)]
+        distance = self.distance(side, rows)
+        go = (params[:, 0] <= distance) & (distance <= params[:, 1]) & can(
+            c, self.facing(side, rows), distance, self.hp[side, rows],
+            self.lengths["hand"][1 - side, rows] > 0,
+            self.other_retired(
+                self.retired_type(side, rows), cards >> self.id_bits),
+        )
+        self.play_steps(
+            side, rows[go], cards[go], params[go, INNER_OP],
+            params[go, INNER_PARAMS])
+
+    def play_rotate_away(self, side, rows, cards, params):
+        self.set_rotation(side, rows, (self.angle(side, rows) + 180) % 360)
+
+    # Results
+    def masks(self, ids):
+        """
+        Rows of bools (a row per id) as bit masks (see to_mask), per side
+        """
+        packed = np.packbits(ids, axis=-1, bitorder="little")
+        return [
+            [int.from_bytes(row, "little") for row in side]
+            for side in packed
+        ]
+
+    def records(self):
+        """
+        Each game's GameRecord (the same one FastGame.record would give),
+        or the BudgetExceeded it was thrown out for
+        """
+        turn_lengths = np.array(self.turn_lengths).T.tolist()
+        cards = self.masks(self.played)
+        steps = self.masks(
+            (self.played.astype(np.float32) @ self.table.step_types) > 0)
+        hp = self.hp.tolist()
+        played_count = self.played_count.tolist()
+
+        def side_record(side, g):
+            side_record = SideRecord.__new__(SideRecord)
+            pilot, mech, upgrades = self.loadouts[side][g]
+            side_record.pilot = pilot
+            side_record.mech = mech
+            side_record.upgrades = upgrades
+            side_record.hp = hp[side][g]
+            side_record.played_count = played_count[side][g]
+            side_record.cards = cards[side][g]
+            side_record.steps = steps[side][g]
+            return side_record
+
+        records = []
+        for g, error in enumerate(self.errors):
+            if error is not None:
+                records.append(error)
+                continue
+            record = GameRecord.__new__(GameRecord)
+            record.turns = int(self.end_turn[g])
+            record.first_blood_turn = int(self.first_blood_turn[g]) or None
+            record.outcome = int(self.outcome[g])
+            record.turn_lengths = tuple(turn_lengths[g][:record.turns])
+            record.total_melt_dmg = int(self.game_melt_dmg[g])
+            record.total_weapon_dmg = int(self.total_weapon_dmg[g])
+            record.white = side_record(0, g)
+            record.black = side_record(1, g)
+            records.append(record)
+        return records
+
+    def __str__(self):
+        return f"(batch of {len(self.outcome)} games, turn {self.turns})"
+
+    def __repr__(self):
+        return self.__str__()
+
+
+# Opcode -> function that plays that step, for some rows
+BatchGames.step_plays = (
+    BatchGames.play_move_forward, BatchGames.play_move_away,
+    BatchGames.play_rotate, BatchGames.play_force_rotate,
+    BatchGames.play_attack, BatchGames.play_retire,
+    BatchGames.play_unretire, BatchGames.play_draw,
+    BatchGames.play_end_turn, BatchGames.play_discard,
+    BatchGames.play_enemy_discard, BatchGames.play_heat_enemy,
+    BatchGames.play_hurt_self, BatchGames.play_range_check,
+    BatchGames.play_nothing, BatchGames.play_rotate_away,
+    BatchGames.play_nothing,
+)
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+    from src.statistician import game_seed, simulate_fast_game, simulate_batch
+
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    seeds = [game_seed(0, i) for i in range(number)]
+    for name, play in [
+            ("One at a time", lambda: [simulate_fast_game(s) for s in seeds]),
+            ("Batched", lambda: simulate_batch(seeds))]:
+        start = time.perf_counter()
+        play()
+        seconds = time.perf_counter() - start
+        print(f"{name}: {number / seconds:,.0f} games/s "
+              f"({number / seconds * 60:,.0f} matchups/minute)")
@@ -0,0 +1,362 @@
+import sys
+import json
+import time
+import platform
+import argparse
+
+from src.game_state import GameState
+from src.fast_game import FastGame
+from src.player import Choices
+from src.card import Card
+from src.card_steps import Step
+from src.game_rng import GameRng
+
+"""
+Benchmarks of the simulation's hot paths: whole games per second, and the
+pieces a turn is made of (choosing / sorting cards, drawing, damage, heat,
+and every step type's can / play), in canned board positions.
+
+Results are ns per call (best of a few rounds, to skip over noise), and
+can be saved as a JSON baseline. Comparing against a baseline fails
+(exit code 1) if anything got slower by more than the allowed slowdown.
+"""
+
+# Run using:
+# python -m src.benchmark                  (compare to the baseline)
+# python -m src.benchmark --save           (make this the new baseline)
+# python -m src.benchmark --slowdown 0.25 --filter step/
+
+BASELINE = "benchmark-baseline.json"
+
+# Each benchmark is run this many times, keeping the fastest
+ROUNDS = 5
+
+# Name -> (function taking a number of calls, returning total ns, calls)
+BENCHMARKS = {}
+
+
+def benchmark(name, calls):
+    def register(func):
+        BENCHMARKS[name] = (func, calls)
+        return func
+    return register
+
+
+def canned_game(seed=0, turns=6):
+    """
+    A game a few turns in, with the next player ready to play a card.
+    Returns (game_state, player)
+    """
+    while True:
+        rng = GameRng(seed)
+        game_state = GameState(Choices(rng=rng), Choices(rng=rng), rng)
+        game_state.start()
+        over = False
+        for i in range(turns):
+            over = game_state.play_turn()
+            if over:
+                break
+        if not over:
+            break
+        # Game was too short, try another
+        seed += 1000
+
+    player = game_state.black if game_state.turns % 2 else game_state.white
+    player.draw_hand()
+    player.my_turn = True
+    return game_state, player
+
+
+def time_loop(func, calls):
+    start = time.perf_counter_ns()
+    for i in range(calls):
+        func()
+    return time.perf_counter_ns() - start
+
+
+def time_each(setup, func, calls):
+    """
+    For calls that change the game: a fresh setup (not timed) each call.
+    (Includes the ~100ns of the timer itself)
+    """
+    total = 0
+    for i in range(calls):
+        args = setup()
+        start = time.perf_counter_ns()
+        func(*args)
+        total += time.perf_counter_ns() - start
+    return total
+
+
+@benchmark("games/GameState.play", 20)
+def bench_game_state(calls):
+    def play(seed):
+        rng = GameRng(seed)
+        GameState(Choices(rng=rng), Choices(rng=rng), rng).play()
+    seeds = iter(range(calls))
+    return time_loop(lambda: play(next(seeds)), calls)
+
+
+@benchmark("games/FastGame.play", 50)
+def bench_fast_game(calls):
+    def play(seed):
+        rng = GameRng(seed)
+        FastGame(Choices(rng=rng), Choices(rng=rng), rng).play()
+    seeds = iter(range(calls))
+    return time_loop(lambda: play(next(seeds)), calls)
+
+
+@benchmark("player/choose_card", 2000)
+def bench_choose_card(calls):
+    game_state, player = canned_game()
+
+    def choose():
+        # As after any card is played, nothing cached is still good
+        game_state.board_changed()
+        player.choose_card()
+    return time_loop(choose, calls)
+
+
+@benchmark("player/sorted_cards", 2000)
+def bench_sorted_cards(calls):
+    game_state, player = canned_game()
+
+    def sort():
+        game_state.board_changed()
+        player.sorted_cards(player.hand)
+    return time_loop(sort, calls)
+
+
+@benchmark("player/sorted_cards (cached)", 5000)
+def bench_sorted_cards_cached(calls):
+    game_state, player = canned_game()
+    return time_loop(lambda: player.sorted_cards(player.hand), calls)
+
+
+@benchmark("player/choose_discard", 2000)
+def bench_choose_discard(calls):
+    game_state, player = canned_game()
+
+    def choose():
+        game_state.board_changed()
+        player.choose_discard()
+    return time_loop(choose, calls)
+
+
+@benchmark("player/get_sacrafice_card", 2000)
+def bench_sacrifice(calls):
+    game_state, player = canned_game()
+
+    def choose():
+        game_state.board_changed()
+        # (Enough damage that it's worth blocking)
+        player.get_sacrafice_card(player.mech.hp)
+    return time_loop(choose, calls)
+
+
+@benchmark("game/damage_enemy", 1000)
+def bench_damage_enemy(calls):
+    game_state, player = canned_game()
+
+    def setup():
+        forked = game_state.fork()
+        attacker = forked.white if player is game_state.white else forked.black
+        return forked, attacker
+    return time_each(
+        setup, lambda forked, attacker: forked.damage_enemy(attacker, 4),
+        calls
+    )
+
+
+@benchmark("player/draw_card", 2000)
+def bench_draw_card(calls):
+    game_state, player = canned_game()
+
+    def setup():
+        forked = game_state.fork()
+        return (forked.white if player is game_state.white else forked.black,)
+    return time_each(setup, lambda p: p.draw_card(), calls)
+
+
+@benchmark("player/draw_card (reshuffle)", 2000)
+def bench_reshuffle(calls):
+    game_state, player = canned_game()
+
+    def setup():
+        forked = game_state.fork()
+        p = forked.white if player is game_state.white else forked.black
+        p.discarded = p.discarded + p.deck
+        p.deck = []
+        return (p,)
+    return time_each(setup, lambda p: p.draw_card(), calls)
+
+
+@benchmark("player/retire (big deck)", 500)
+def bench_retire_big_deck(calls):
+    """
+    Retiring a card from the middle of a large custom deck
+    (see Player.create_card)
+    """
+    game_state, player = canned_game()
+    card_type = type(next(iter(player.deck)))
+    for i in range(1000):
+        player.create_card(card_type)
+
+    def setup():
+        forked = game_state.fork()
+        p = forked.white if player is game_state.white else forked.black
+        return p, list(p.deck)[len(p.deck) // 2]
+    return time_each(setup, lambda p, card: p.retire(card), calls)
+
+
+@benchmark("mech/check_heat", 5000)
+def bench_check_heat(calls):
+    game_state, player = canned_game()
+    player.mech.heat = 3
+    return time_loop(player.mech.check_heat, calls)
+
+
+@benchmark("mech/check_heat (overheat)", 2000)
+def bench_overheat(calls):
+    game_state, player = canned_game()
+
+    def setup():
+        forked = game_state.fork()
+        p = forked.white if player is game_state.white else forked.black
+        p.mech.heat = 8
+        return (p.mech,)
+    return time_each(setup, lambda mech: mech.check_heat(), calls)
+
+
+def add_step_benchmarks():
+    """
+    can / play of every step type, on the first card that has one
+    """
+    examples = {}
+    for card_type in Card.types_by_id:
+        for i, step in enumerate(card_type.steps):
+            examples.setdefault(type(step), (card_type, i))
+
+    for step_type in Step.types_by_id:
+        if step_type not in examples:
+            continue
+        card_type, i = examples[step_type]
+        name = step_type.__name__
+
+        def bench_can(calls, card_type=card_type, i=i):
+            game_state, player = canned_game()
+            card = card_type(game_state, player)
+            step = card.steps[i]
+            return time_loop(lambda: step.can(card), calls)
+
+        def bench_play(calls, card_type=card_type, i=i):
+            game_state, player = canned_game()
+
+            def setup():
+                forked = game_state.fork()
+                p = forked.white if player is game_state.white else (
+                    forked.black)
+                card = card_type(forked, p)
+                return card.steps[i], card
+            return time_each(setup, lambda step, card: step.play(card), calls)
+
+        BENCHMARKS[f"step/{name}.can"] = (bench_can, 5000)
+        BENCHMARKS[f"step/{name}.play"] = (bench_play, 1000)
+
+
+add_step_benchmarks()
+
+
+def run(names=None, quick=False, rounds=ROUNDS):
+    """
+    Name -> ns per call, for the given benchmarks (or all of them).
+    'quick' is a tenth of the calls, for checking the benchmarks still run
+    """
+    results = {}
+    for name, (func, calls) in BENCHMARKS.items():
+        if names is not None and name not in names:
+            continue
+        if quick:
+            calls = max(1, calls // 10)
+        best = min(func(calls) for i in range(rounds))
+        results[name] = best / calls
+    return results
+
+
+def save(results, path=BASELINE):
+    with open(path, "w") as f:
+        json.dump({
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "results": results,
+        }, f, indent=2)
+
+
+def load(path=BASELINE):
+    with open(path) as f:
+        return json.load(f)["results"]
+
+
+def regressions(results, baseline, slowdown=0.2):
+    """
+    Benchmarks more than 'slowdown' (e.g. 0.2 = 20%) slower than baseline,
+    as [(name, baseline ns, ns)]
+    """
+    return [
+        (name, baseline[name], ns)
+        for name, ns in results.items()
+        if name in baseline and ns > baseline[name] * (1 + slowdown)
+    ]
+
+
+def print_table(results, baseline=None):
+    width = max(len(name) for name in results)
+    for name, ns in results.items():
+        line = f"{name:<{width}} {ns / 1000:>10.2f}us"
+        if name.startswith("games/"):
+            line += f" ({1e9 / ns:,.0f} games/s)"
+        if baseline and name in baseline:
+            change = ns / baseline[name] - 1
+            line += f"  {change:+.0%} vs baseline"
+        print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the simulation's hot paths")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument(
+        "--save", action="store_true", help="save as the new baseline")
+    parser.add_argument(
+        "--slowdown", type=float, default=0.2,
+        help="fail if anything is this much slower (0.2 = 20%%)")
+    parser.add_argument(
+        "--filter", default="", help="only benchmarks with this in the name")
+    parser.add_argument("--quick", action="store_true")
+    args = parser.parse_args()
+
+    names = [name for name in BENCHMARKS if args.filter in name]
+    results = run(names, args.quick)
+
+    if args.save:
+        print_table(results)
+        save(results, args.baseline)
+        print(f"Saved baseline to {args.baseline}")
+        sys.exit(0)
+
+    try:
+        baseline = load(args.baseline)
+    except FileNotFoundError:
+        baseline = None
+    print_table(results, baseline)
+    if baseline is None:
+        print(f"No baseline at {args.baseline} (make one with --save)")
+        sys.exit(0)
+
+    slower = regressions(results, baseline, args.slowdown)
+    for name, before, after in slower:
+        print(
+            f"SLOWER: {name} {before / 1000:.2f}us -> {after / 1000:.2f}us "
+            f"({after / before - 1:+.0%})"
+        )
+    sys.exit(1 if slower else 0)
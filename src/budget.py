@@ -0,0 +1,153 @@
+import json
+import time
+import traceback
+
+"""
+How much work a single game is allowed, so one runaway game (an endless
+turn, a slow AI) can't stop a long campaign.
+
+A Budget has:
+* turns: the turn limit - a game that reaches it just ends with no winner
+  (and counts as a 'long game' in the stats, as always)
+* cards_per_turn: most cards one turn can play
+* card_plays: most cards a whole game can play (None for no limit)
+* seconds: most time a game's turns can take (None for no limit)
+
+Going over the last three raises BudgetExceeded, and the game is thrown
+out. Campaigns (see statistician.py, sweep.py) play each game 'guarded',
+so a game that goes over budget, or crashes, is skipped - and written to
+a quarantine file with it's seed, to look at later - rather than taking
+the whole campaign (or a worker's chunk of it) down with it. A worker that
+dies outright only loses the games it was playing (see worker_pool.py).
+"""
+
+TURN_LIMIT = 100
+CARD_LIMIT = 100
+
+
+class BudgetExceeded(Exception):
+    def __init__(self, limit, used, allowed):
+        # Which limit ('cards_per_turn', 'card_plays', 'seconds')
+        self.limit = limit
+        self.used = used
+        self.allowed = allowed
+        super().__init__(f"Over budget: {used} {limit} (of {allowed})")
+
+
+class Budget:
+    def __init__(self, turns=TURN_LIMIT, cards_per_turn=CARD_LIMIT,
+                 card_plays=None, seconds=None):
+        self.turns = turns
+        self.cards_per_turn = cards_per_turn
+        self.card_plays = card_plays
+        self.seconds = seconds
+
+    def clock(self):
+        """
+        When a turn started (only if timing games)
+        """
+        return time.perf_counter() if self.seconds is not None else None
+
+    def charge(self, game, cards, started):
+        """
+        Add a finished turn's cards (and time since 'started') to the
+        game's totals, raising BudgetExceeded if it's over budget
+        """
+        game.card_plays += cards
+        if self.card_plays is not None and game.card_plays > self.card_plays:
+            raise BudgetExceeded(
+                "card_plays", game.card_plays, self.card_plays)
+        if started is not None:
+            game.seconds += time.perf_counter() - started
+            if game.seconds > self.seconds:
+                raise BudgetExceeded(
+                    "seconds", round(game.seconds, 3), self.seconds)
+
+    def for_search(self):
+        """
+        The same rules, without the per-game limits - for games an AI
+        plays out to look ahead (see mcts_player.py), which shouldn't
+        use up (or go over) the real game's budget
+        """
+        return Budget(self.turns, self.cards_per_turn)
+
+    def long_turn(self, cards):
+        raise BudgetExceeded("cards_per_turn", cards, self.cards_per_turn)
+
+    def __repr__(self):
+        # (Stable, as it's part of cache keys)
+        return (
+            f"Budget({self.turns}, {self.cards_per_turn}, "
+            f"{self.card_plays}, {self.seconds})"
+        )
+
+
+DEFAULT = Budget()
+
+
+class Skipped:
+    """
+    Stands in for the record of a game that was thrown out
+    """
+    __slots__ = ("seed", "reason", "error")
+
+    def __init__(self, seed, reason, error):
+        self.seed = seed
+        # The limit it went over, 'crash' or 'worker_died'
+        self.reason = reason
+        self.error = error
+
+    def __repr__(self):
+        return f"Skipped({self.seed}, {self.reason})"
+
+
+def skip(seed, e):
+    if isinstance(e, BudgetExceeded):
+        return Skipped(seed, e.limit, str(e))
+    return Skipped(seed, "crash", traceback.format_exc(limit=-3))
+
+
+def guarded(simulate_func, seed):
+    """
+    simulate_func(seed), or a Skipped if the game goes over budget / crashes
+    (module level, so workers can pickle it)
+    """
+    try:
+        return simulate_func(seed)
+    except Exception as e:
+        return skip(seed, e)
+
+
+class Quarantine:
+    """
+    Every skipped game of a campaign, also appended to a JSON lines file
+    if given a path, with whatever is needed to play it again
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.games = []
+
+    def add(self, skipped, **context):
+        entry = {
+            "seed": skipped.seed, "reason": skipped.reason,
+            **context, "error": skipped.error,
+        }
+        self.games.append(entry)
+        if self.path is not None:
+            with open(self.path, "a") as f:
+                f.write(json.dumps(entry, default=str) + "\n")
+
+    def reasons(self):
+        counts = {}
+        for entry in self.games:
+            counts[entry["reason"]] = counts.get(entry["reason"], 0) + 1
+        return counts
+
+    def summary(self):
+        reasons = ", ".join(f"{n} {r}" for r, n in self.reasons().items())
+        where = f", see {self.path}" if self.path else ""
+        return f"Skipped {len(self.games)} games ({reasons}{where})"
+
+    def __len__(self):
+        return len(self.games)
@@ -5,6 +5,43 @@ import logging
 logger = logging.getLogger("HotMech")
 
 
+class CardTraits:
+    """
+    Everything about a card type we can tell from it's steps and heat alone.
+    Card types don't change once defined, so this is worked out once,
+    when the class is created (see Card.__init_subclass__)
+    """
+
+    def __init__(self, card_type):
+        steps = card_type.steps
+        attacks = [s for s in steps if isinstance(s, Attack)]
+
+        self.attack = attacks != []
+        self.move = any(isinstance(s, (MoveForward, MoveAway)) for s in steps)
+        self.control = not self.attack and not self.move
+
+        # All cards can, by default, be retired to reduce incoming damage
+        # by their heat cost (of course, if the heat cost is 0 or negative,
+        # they can't)
+        self.can_block = card_type.heat > 0
+        # Lets have the AI smart enough to know they shouldn't get rid of
+        # all of their attacks
+        self.should_block = self.can_block and not self.attack
+
+        # Most damage a single attack can do,
+        # and the (min, max) range of each attack
+        self.damage = max((s.damage for s in attacks), default=0)
+        self.ranges = [(s.min, s.max) for s in attacks]
+
+        # The 'cost' of the steps, added up
+        # Every card gets - some cost for the cost of being in the deck / drawn
+        # TODO take into account block potential?
+        self.cost = sum(s.cost() for s in steps) - 1
+
+        # Index of each step that must be able to happen to play the card
+        self.mandatory = [i for i, s in enumerate(steps) if s.mandatory]
+
+
 class Card(NamedClass):
     """
     Abstract class, that each specific type of card will sub-class
@@ -23,6 +60,19 @@ class Card(NamedClass):
     def __init__(self, game_state, player):
         self.game_state = game_state
         self.player = player
+        # Which of the player's zones it's in (see zone.py)
+        self.zone = None
+
+        # What we worked out about which steps can take place,
+        # and the board version it was for (see evaluate)
+        self.evaluated_version = None
+        self.step_cans = []
+        self.can_count = 0
+        self.can_play = False
+        # The AI's sort key for the card, and the board version it was for
+        # (see priority)
+        self.priority_version = None
+        self.priority_key = None
 
     def play(self):
         self.player.mech.heat += self.heat
@@ -37,39 +87,76 @@ class Card(NamedClass):
             return False
         return self.can()
 
+    def fork(self, game_state, player):
+        """
+        This card, in a forked game (see GameState.fork)
+        """
+        card = object.__new__(type(self))
+        card.__dict__.update(self.__dict__)
+        card.game_state = game_state
+        card.player = player
+        # (Put in the forked player's zones by it)
+        card.zone = None
+        return card
+
+    def evaluate(self):
+        """
+        Work out which steps can take place.
+        The AI asks over and over while choosing what to play, so this
+        is only redone when the board changes (see GameState.board_version)
+        """
+        self.step_cans = [s.can(self) for s in self.steps]
+        self.can_count = sum(self.step_cans)
+        self.can_play = self.can_count > 0 and all(
+            self.step_cans[i] for i in self.traits.mandatory
+        )
+        self.evaluated_version = self.game_state.board_version
+
+    def priority(self):
+        """
+        The AI's sort key (lower is better, see Player.sorted_cards),
+        only worked out again when the board changes
+        """
+        version = self.game_state.board_version
+        if self.priority_version != version:
+            self.priority_key = (
+                not self.should(), -self.how_many_can(), self.heat,
+                # Prioritize cards that deal damage
+                -self.traits.damage
+            )
+            self.priority_version = version
+        return self.priority_key
+
     def can(self):
         """
         Can any steps take place at all, e.g.: is it in range
         """
-        any_can = any(s.can(self) for s in self.steps)
-        all_mandatory = all(
-            s.can(self) for s in self.steps
-            if s.mandatory
-        )
-        return any_can and all_mandatory
+        if self.evaluated_version != self.game_state.board_version:
+            self.evaluate()
+        return self.can_play
 
     def all_can(self):
         """
         Can all steps take place at all, e.g.: is it in range
         """
-        return all(s.can(self) for s in self.steps)
+        if self.evaluated_version != self.game_state.board_version:
+            self.evaluate()
+        return self.can_count == len(self.steps)
 
     def how_many_can(self):
         """
         How many steps will activate
         """
-        return len([s for s in self.steps if s.can(self)])
+        if self.evaluated_version != self.game_state.board_version:
+            self.evaluate()
+        return self.can_count
 
     def cost(self):
         """
         Calculate the 'cost' of the steps, added up,
         and see how it compares to this card's heat
         """
-        c = sum(s.cost() for s in self.steps)
-        # Every card gets - some cost for the cost of being in the deck / drawn
-        c -= 1
-        # TODO take into account block potential?
-        return c
+        return self.traits.cost
 
     @classmethod
     def can_block(cls):
@@ -80,7 +167,7 @@ class Card(NamedClass):
         """
         # Lets reduce the number of cards that can be used to block
         # No attacks?
-        return cls.heat > 0
+        return cls.traits.can_block
 
     @classmethod
     def should_block(cls):
@@ -89,7 +176,7 @@ class Card(NamedClass):
         of their attacks
         """
         # TODO could add it as a desperate last thing
-        return cls.can_block() and not cls.is_attack()
+        return cls.traits.should_block
 
     @classmethod
     def block_explainer(cls):
@@ -98,28 +185,47 @@ class Card(NamedClass):
 
     @classmethod
     def is_attack(cls):
-        return any(isinstance(s, Attack) for s in cls.steps)
+        return cls.traits.attack
 
     @classmethod
     def is_move(cls):
-        return any(isinstance(s, (MoveForward, MoveAway)) for s in cls.steps)
+        return cls.traits.move
 
     @classmethod
     def is_control(cls):
-        return not cls.is_attack() and not cls.is_move()
+        return cls.traits.control
+
+    @classmethod
+    def of_kind(cls, kind):
+        """
+        Every card type that is an 'attack', 'move' or 'control' card
+        """
+        return cls.kinds[kind]
 
     # A dict that holds all defined cards by:
     # string of class name -> type
     all_types = {}
+    # Card types by kind ('attack', etc), in definition order
+    kinds = {"attack": [], "move": [], "control": []}
     @classmethod
     def __init_subclass__(cls, **kwargs):
         super().__init_subclass__(**kwargs)
         # Register each subclass in the all_cards dictionary
+        redefined = cls.all_types.get(cls.__name__)
         cls.all_types[cls.__name__] = cls
+        cls.traits = CardTraits(cls)
+
+        for kind, card_types in cls.kinds.items():
+            if redefined in card_types:
+                card_types.remove(redefined)
+            if getattr(cls.traits, kind):
+                card_types.append(cls)
 
     def __str__(self):
         return f"{self.name} {self.heat}h {self.steps}"
 
+Card.traits = CardTraits(Card)
+
 """
 Below, all card types are defined:
 """
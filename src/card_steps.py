@@ -1,4 +1,5 @@
 from src.utils import NamedClass, get_range
+from src import trace
 
 import logging
 logger = logging.getLogger("HotMech")
@@ -121,7 +122,11 @@ class ForceRotate(Step):
     def play(self, card):
         enemy = card.player.get_enemy()
         enemy.rotate(90)
-        logger.info(f"Forcefully rotated {enemy} to {enemy.rotation}")
+        if trace.on:
+            trace.emit(
+                "force_rotate", side=trace.side(enemy),
+                rotation=enemy.rotation
+            )
 
     def explainer(self):
         return (
@@ -139,7 +144,9 @@ class Attack(Step):
     def play(self, card):
         if self.can(card):
             card.game_state.damage_enemy(card.player, self.damage)
-            logger.info(f"Attacked for {self.damage}")
+            if trace.on:
+                trace.emit(
+                    "attack", side=trace.side(card.player), damage=self.damage)
 
     def can(self, card):
         """
@@ -182,9 +189,9 @@ class Unretire(Step):
         for i in range(self.number_of_cards):
             if not self.can(card):
                 return
-            unretired = card.player.sorted_cards(card.player.retired)[0]
-            card.player.retired.remove(unretired)
+            unretired = card.player.choose_unretire()
             card.player.hand.append(unretired)
+            card.game_state.board_changed()
 
     def explainer(self):
         return (
@@ -0,0 +1,197 @@
+import sys
+import logging
+
+from src.game_state import GameState
+from src.fast_game import FastGame
+from src.player import Choices
+from src.mech import Skeleton
+from src.pilot import NamelessDegenerate
+from src.upgrade import Tassles
+from src.game_record import GameRecord
+from src.game_rng import GameRng
+from src.batch_game import BatchGames
+from src.statistician import (
+    game_seed, random_card_deck, fast_game, fast_card_game,
+    simulate_fast_game, simulate_fast_card_game,
+)
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger("HotMech")
+
+"""
+Differential check of the fast engine (fast_game.py) against GameState
+(and of lockstep batches, batch_game.py, against single fast games):
+play the same seeds through both, and make sure every game ends in exactly
+the same place - same winner, turns, hp, heat, positions, and the same
+cards in the same order in every zone.
+Anything different is a bug in the fast engine (or GameState changed)
+"""
+
+# Run using:
+# python -m src.engine_check [number of seeds] [campaign seed]
+
+
+def card_game_choices():
+    return (
+        Choices(NamelessDegenerate, Skeleton, Tassles),
+        Choices(NamelessDegenerate, Skeleton, Tassles),
+    )
+
+
+def reference_state(seed, card_game=False):
+    rng = GameRng(seed)
+    if card_game:
+        game_state = GameState(*card_game_choices(), rng)
+        for player in [game_state.white, game_state.black]:
+            for card_type in random_card_deck(rng):
+                player.create_card(card_type)
+    else:
+        game_state = GameState(Choices(rng=rng), Choices(rng=rng), rng)
+
+    try:
+        game_state.play()
+    except Exception as e:
+        # (e.g. going over budget, see budget.py)
+        return {"error": type(e).__name__}
+
+    record = GameRecord(game_state)
+    state = record_state(record)
+    for name in ["white", "black"]:
+        player = getattr(game_state, name)
+        state[name] = {
+            "hp": player.mech.hp,
+            "heat": player.mech.heat,
+            "location": tuple(player.location),
+            "rotation": player.rotation,
+            "deck": [c.type_id for c in player.deck],
+            "hand": [c.type_id for c in player.hand],
+            "discarded": [c.type_id for c in player.discarded],
+            "retired": [c.type_id for c in player.retired],
+            "played": [ct.type_id for ct in player.played_cards],
+            "largest_hand": player.largest_hand,
+            "empty_hands": player.empty_hands,
+        }
+    return state
+
+
+def fast_state(seed, card_game=False):
+    rng = GameRng(seed)
+    if card_game:
+        game = FastGame(*card_game_choices(), rng)
+        for side in [game.white, game.black]:
+            for card_type in random_card_deck(rng):
+                game.create_card(side, card_type)
+    else:
+        game = FastGame(Choices(rng=rng), Choices(rng=rng), rng)
+
+    try:
+        game.play()
+    except Exception as e:
+        return {"error": type(e).__name__}
+
+    state = record_state(game.record())
+    for name in ["white", "black"]:
+        side = getattr(game, name)
+        state[name] = {
+            "hp": side.hp,
+            "heat": side.heat,
+            "location": (side.x, side.y),
+            "rotation": side.rotation,
+            "deck": [side.types[c] for c in side.deck],
+            "hand": [side.types[c] for c in side.hand],
+            "discarded": [side.types[c] for c in side.discarded],
+            "retired": [side.types[c] for c in side.retired],
+            "played": list(side.played),
+            "largest_hand": side.largest_hand,
+            "empty_hands": side.empty_hands,
+        }
+    return state
+
+
+def record_state(record):
+    state = {
+        slot: getattr(record, slot)
+        for slot in GameRecord.__slots__ if slot not in ["white", "black"]
+    }
+    for name in ["white", "black"]:
+        side_record = getattr(record, name)
+        state[f"{name}_record"] = {
+            slot: getattr(side_record, slot)
+            for slot in side_record.__slots__
+        }
+    return state
+
+
+def differences(expected, actual, prefix=""):
+    """
+    Every key path whose value differs
+    """
+    diffs = []
+    for key in sorted(set(expected) | set(actual), key=str):
+        e = expected.get(key)
+        a = actual.get(key)
+        if isinstance(e, dict) and isinstance(a, dict):
+            diffs += differences(e, a, f"{prefix}{key}.")
+        elif e != a:
+            diffs.append(f"{prefix}{key}: {e} != {a}")
+    return diffs
+
+
+def check(number=1000, campaign_seed=0, card_game=False):
+    """
+    Returns how many of the seeds played out differently
+    """
+    mismatches = 0
+    for i in range(number):
+        seed = game_seed(campaign_seed, i)
+        diffs = differences(
+            reference_state(seed, card_game), fast_state(seed, card_game))
+        if diffs:
+            mismatches += 1
+            logger.error(
+                f"Seed {seed} ({'card' if card_game else 'real'} game) "
+                f"differs:\n  " + "\n  ".join(diffs[:10])
+            )
+    return mismatches
+
+
+def check_batch(number=1000, campaign_seed=0, card_game=False):
+    """
+    Same again, for games played alone vs in one lockstep batch
+    """
+    seeds = [game_seed(campaign_seed, i) for i in range(number)]
+    if card_game:
+        batch = BatchGames([fast_card_game(seed) for seed in seeds])
+        simulate_func = simulate_fast_card_game
+    else:
+        batch = BatchGames([fast_game(seed) for seed in seeds])
+        simulate_func = simulate_fast_game
+    batch.play()
+    mismatches = 0
+    for seed, record in zip(seeds, batch.records()):
+        diffs = differences(
+            record_state(simulate_func(seed)), record_state(record))
+        if diffs:
+            mismatches += 1
+            logger.error(
+                f"Seed {seed} ({'card' if card_game else 'real'} batch "
+                f"game) differs:\n  " + "\n  ".join(diffs[:10])
+            )
+    return mismatches
+
+
+if __name__ == "__main__":
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    campaign_seed = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+
+    total = 0
+    for card_game in [False, True]:
+        mismatches = check(number, campaign_seed, card_game)
+        kind = "card" if card_game else "real"
+        print(f"{kind} games: {number - mismatches}/{number} match")
+        total += mismatches
+
+        mismatches = check_batch(number, campaign_seed, card_game)
+        print(f"{kind} batch games: {number - mismatches}/{number} match")
+        total += mismatches
+    sys.exit(1 if total else 0)
@@ -0,0 +1,769 @@
+import math
+
+from src.card import Card
+from src.card_steps import *
+from src.player import Player
+from src.game_record import (
+    GameRecord, SideRecord, WHITE, BLACK, TIE, NO_WINNER, steps_mask
+)
+from src.game_rng import GameRng
+from src.utils import to_mask
+from src import budget as budgets
+
+"""
+A faster, array-backed engine that plays the same game as GameState.
+
+Instead of Player/Mech/Card objects pointing at each other, each side is
+one compact struct of plain numbers, and it's deck/hand/discard/retired
+zones are lists of small ints. Every card in a game is an 'instance id',
+with 'types' mapping instance id -> card type id, and card steps are
+compiled into tuples that run through a dispatch table.
+
+It must make exactly the same choices and random draws as the reference
+GameState (see engine_check.py), just without the objects.
+"""
+
+STARTING_HAND = Player.starting_hand
+MAX_HEAT = 6
+
+# Cosine of the +/- 45 degree 'facing' cone (see Player.check_facing)
+FACING_COS = math.cos(math.radians(45)) - 1e-9
+
+# Step opcodes
+(
+    MOVE_FORWARD, MOVE_AWAY, ROTATE, FORCE_ROTATE, ATTACK, RETIRE, UNRETIRE,
+    DRAW, END_TURN, DISCARD, ENEMY_DISCARD, HEAT_ENEMY, HURT_SELF,
+    RANGE_CHECK, MANDATORY_RANGE, ROTATE_AWAY, INCREASE_RANGE,
+) = range(17)
+
+# Step type name of each opcode
+OP_NAMES = [
+    "MoveForward", "MoveAway", "Rotate", "ForceRotate", "Attack", "Retire",
+    "Unretire", "Draw", "EndTurn", "Discard", "EnemyDiscard", "HeatEnemy",
+    "HurtSelf", "RangeCheck", "MandatoryRange", "RotateAway", "IncreaseRange",
+]
+
+
+# Steps that can't always take place
+CHECKED_OPS = {
+    ATTACK, UNRETIRE, ENEMY_DISCARD, HURT_SELF, RANGE_CHECK,
+    MANDATORY_RANGE, INCREASE_RANGE,
+}
+
+
+def compile_step(step):
+    """
+    Turn a Step instance into an (opcode, params...) tuple
+    """
+    if isinstance(step, MoveForward):
+        return (MOVE_FORWARD, step.max, step.min, step.flying)
+    if isinstance(step, MoveAway):
+        return (MOVE_AWAY, step.max, step.min)
+    if isinstance(step, Rotate):
+        return (ROTATE, step.max, step.min)
+    if isinstance(step, ForceRotate):
+        return (FORCE_ROTATE,)
+    if isinstance(step, Attack):
+        return (ATTACK, step.damage, step.min, step.max)
+    if isinstance(step, Retire):
+        return (RETIRE,)
+    if isinstance(step, Unretire):
+        return (UNRETIRE, step.number_of_cards)
+    if isinstance(step, Draw):
+        return (DRAW, step.number_of_cards)
+    if isinstance(step, EndTurn):
+        return (END_TURN,)
+    if isinstance(step, Discard):
+        return (DISCARD, step.number_of_cards)
+    if isinstance(step, EnemyDiscard):
+        return (ENEMY_DISCARD, step.number_of_cards)
+    if isinstance(step, HeatEnemy):
+        return (HEAT_ENEMY, step.heat)
+    if isinstance(step, HurtSelf):
+        return (HURT_SELF, step.damage)
+    if isinstance(step, RangeCheck):
+        return (RANGE_CHECK, step.min, step.max, compile_step(step.step))
+    if isinstance(step, MandatoryRange):
+        return (MANDATORY_RANGE, step.min, step.max)
+    if isinstance(step, RotateAway):
+        return (ROTATE_AWAY,)
+    if isinstance(step, IncreaseRange):
+        return (INCREASE_RANGE,)
+    raise NotImplementedError(f"No fast version of {step.name}")
+
+
+class CardTable:
+    """
+    Per card type id: compiled steps, heat, etc.
+    Built once, from Card.types_by_id
+    """
+
+    def __init__(self):
+        card_types = Card.types_by_id
+        self.steps = [
+            tuple(compile_step(s) for s in ct.steps) for ct in card_types]
+        self.heat = [ct.heat for ct in card_types]
+        self.damage = [ct.traits.damage for ct in card_types]
+        self.should_block = [ct.traits.should_block for ct in card_types]
+        self.size = len(card_types)
+
+        # Most steps can always take place, so count those up front,
+        # and only check the (step, is mandatory) pairs that depend
+        # on the board
+        self.fixed_cans = []
+        self.checks = []
+        for steps in self.steps:
+            self.fixed_cans.append(
+                sum(step[0] not in CHECKED_OPS for step in steps))
+            self.checks.append(tuple(
+                (step, step[0] == MANDATORY_RANGE)
+                for step in steps if step[0] in CHECKED_OPS
+            ))
+
+
+_card_table = None
+def card_table():
+    global _card_table
+    # Rebuild if card types were added since
+    if _card_table is None or _card_table.size != len(Card.types_by_id):
+        _card_table = CardTable()
+    return _card_table
+
+
+class Side:
+    """
+    Everything about one player, as plain numbers and int lists
+    """
+    __slots__ = (
+        "pilot", "mech", "upgrades", "enemy",
+        "hp", "max_hp", "heat", "x", "y", "rotation",
+        "hx", "hy", "back_hx", "back_hy",
+        "types", "deck", "hand", "discarded", "retired",
+        "starting_deck_size", "my_turn", "turn_cards", "played",
+        "total_melt_dmg", "largest_hand", "empty_hands",
+    )
+
+    def __init__(self, choices, rng):
+        self.pilot = choices.pilot_type.type_id
+        self.mech = choices.mech_type.type_id
+        mech_type = choices.mech_type
+        # Remove any that is more than hardpoints
+        upgrade_types = choices.upgrade_types[:mech_type.hard_points]
+        self.upgrades = [u.type_id for u in upgrade_types]
+
+        self.hp = mech_type.max_hp
+        self.max_hp = mech_type.max_hp
+        self.heat = mech_type.starting_heat
+        self.x = 0
+        self.y = 0
+        self.set_rotation(0)
+
+        # Instance id -> card type id
+        card_types = list(choices.pilot_type.card_types)
+        card_types += mech_type.card_types
+        for u in upgrade_types:
+            card_types += u.card_types
+        self.types = [ct.type_id for ct in card_types]
+        self.deck = list(range(len(self.types)))
+        rng.shuffle(self.deck)
+        self.starting_deck_size = len(self.deck)
+
+        self.hand = []
+        self.discarded = []
+        self.retired = []
+
+        self.my_turn = False
+        self.turn_cards = 0
+        # Card type id of every card played
+        self.played = []
+        self.total_melt_dmg = 0
+        self.largest_hand = 0
+        self.empty_hands = 0
+
+    def set_rotation(self, rotation):
+        # Same sums as Player.heading, so facing checks come out the same
+        self.rotation = rotation % 360
+        radians = math.radians(self.rotation)
+        self.hx = math.cos(radians)
+        self.hy = math.sin(radians)
+        radians = math.radians(self.rotation + 180)
+        self.back_hx = math.cos(radians)
+        self.back_hy = math.sin(radians)
+
+    def all_cards(self):
+        return self.deck + self.hand + self.discarded + self.retired
+
+    def copy(self):
+        side = Side.__new__(Side)
+        for name in Side.__slots__:
+            setattr(side, name, getattr(self, name))
+        side.types = list(self.types)
+        side.deck = list(self.deck)
+        side.hand = list(self.hand)
+        side.discarded = list(self.discarded)
+        side.retired = list(self.retired)
+        side.played = list(self.played)
+        return side
+
+    @classmethod
+    def from_player(cls, player):
+        """
+        A side in the same state as a GameState's player
+        """
+        side = cls.__new__(cls)
+        side.pilot = player.pilot.type_id
+        side.mech = player.mech.type_id
+        side.upgrades = [u.type_id for u in player.upgrades]
+
+        side.hp = player.mech.hp
+        side.max_hp = player.mech.max_hp
+        side.heat = player.mech.heat
+        side.x, side.y = player.location
+        side.set_rotation(player.rotation)
+
+        # Number every card, zone by zone
+        side.types = []
+        zones = []
+        for zone in [
+                player.deck, player.hand, player.discarded, player.retired]:
+            zones.append(
+                list(range(len(side.types), len(side.types) + len(zone))))
+            side.types += [card.type_id for card in zone]
+        side.deck, side.hand, side.discarded, side.retired = zones
+        side.starting_deck_size = player.starting_deck_size
+
+        side.my_turn = getattr(player, "my_turn", False)
+        side.turn_cards = player.turn_cards
+        side.played = [ct.type_id for ct in player.played_cards]
+        side.total_melt_dmg = player.mech.total_melt_dmg
+        side.largest_hand = player.largest_hand
+        side.empty_hands = player.empty_hands
+        return side
+
+
+def facing(side, enemy, back=False):
+    """
+    Is the enemy within +/- 45 degrees of our front (or back)
+    """
+    if back:
+        hx, hy = side.back_hx, side.back_hy
+    else:
+        hx, hy = side.hx, side.hy
+    dx = enemy.x - side.x
+    dy = enemy.y - side.y
+    distance = math.sqrt(dx**2 + dy**2)
+    if distance == 0:
+        dx, dy, distance = 1, 0, 1
+    return hx * dx + hy * dy >= distance * FACING_COS
+
+
+def distance_to(side, enemy):
+    dx = enemy.x - side.x
+    dy = enemy.y - side.y
+    return math.sqrt(dx**2 + dy**2)
+
+
+def angle_to(side, enemy):
+    dx = enemy.x - side.x
+    dy = enemy.y - side.y
+    return math.degrees(math.atan2(dy, dx)) % 360
+
+
+def move(side, distance, angle=None):
+    if angle is None:
+        angle = side.rotation
+    radians = math.radians(angle)
+    side.x = side.x + distance * math.cos(radians)
+    side.y = side.y + distance * math.sin(radians)
+
+
+class FastGame:
+    """
+    Drop in for GameState when all we want is the result
+    """
+
+    def __init__(self, white_choices, black_choices, rng=None, budget=None):
+        self.table = card_table()
+        # This game's own random numbers (see game_rng.py)
+        self.rng = rng if rng is not None else GameRng()
+
+        # How much work the game may take (see budget.py)
+        self.budget = budget if budget is not None else budgets.DEFAULT
+        self.card_plays = 0
+        self.seconds = 0
+        self.turn_started = None
+
+        self.white = Side(white_choices, self.rng)
+        self.black = Side(black_choices, self.rng)
+
+        # Start one player 'on other side of board'
+        self.black.x = 18
+        self.black.y = 0
+        self.black.set_rotation(180)
+        self.white.enemy = self.black
+        self.black.enemy = self.white
+
+        self.turns = 0
+
+        # For stats
+        self.turn_lengths = []
+        self.first_blood_turn = None
+        self.outcome = None
+        self.total_melt_dmg = 0
+        self.total_weapon_dmg = 0
+
+    def create_card(self, side, card_type):
+        # Create a new instance, and add to deck
+        side.types.append(card_type.type_id)
+        side.deck.append(len(side.types) - 1)
+        side.starting_deck_size = len(side.deck)
+
+    # Game flow
+    def play(self):
+        self.start()
+        while not self.play_turn():
+            pass
+
+    def start(self):
+        # Each start with full hand
+        self.draw_hand(self.white)
+        self.draw_hand(self.black)
+
+    def play_turn(self):
+        """
+        Play the next turn, returns True once the game is over
+        """
+        self.turns += 1
+        self.start_turn(self.current_side())
+        return self.finish_turn()
+
+    def current_side(self):
+        return self.white if self.turns % 2 == 1 else self.black
+
+    def start_turn(self, side):
+        # (The reference 'discard down' never discards anything,
+        # as it discards 5 - len(hand) <= 0 cards)
+        self.draw_hand(side)
+        side.heat -= 1
+
+        side.my_turn = True
+        side.turn_cards = 0
+        self.turn_started = self.budget.clock()
+
+    def finish_turn(self):
+        """
+        Play out the rest of the current turn,
+        returns True once the game is over
+        """
+        side = self.current_side()
+        budget = self.budget
+        while side.my_turn and side.turn_cards < budget.cards_per_turn:
+            card = self.choose_card(side)
+            if card is None:
+                break
+            self.play_card(side, card)
+
+        if side.turn_cards >= budget.cards_per_turn:
+            budget.long_turn(side.turn_cards)
+        self.turn_lengths.append(side.turn_cards)
+        budget.charge(self, side.turn_cards, self.turn_started)
+
+        white_dead = self.white.hp <= 0
+        black_dead = self.black.hp <= 0
+        if white_dead and black_dead:
+            self.end_game(TIE)
+        elif white_dead:
+            self.end_game(BLACK)
+        elif black_dead:
+            self.end_game(WHITE)
+        elif self.turns >= budget.turns:
+            self.outcome = NO_WINNER
+        return self.outcome is not None
+
+    def end_game(self, outcome):
+        self.outcome = outcome
+        # (Like GameState, melt is only totaled up if someone won/tied)
+        self.total_melt_dmg = (
+            self.white.total_melt_dmg + self.black.total_melt_dmg)
+
+    def draw_card(self, side):
+        # If we are out of cards, shuffle back in discard
+        if not side.deck:
+            if not side.discarded:
+                return
+            side.deck = self.rng.sample(side.discarded, len(side.discarded))
+            side.discarded = []
+
+        side.hand.append(side.deck.pop())
+        if len(side.hand) > side.largest_hand:
+            side.largest_hand = len(side.hand)
+
+    def draw_hand(self, side):
+        for i in range(STARTING_HAND - len(side.hand)):
+            self.draw_card(side)
+
+    def play_card(self, side, card):
+        side.hand.remove(card)
+        side.discarded.append(card)
+
+        card_type = side.types[card]
+        side.heat += self.table.heat[card_type]
+        step_plays = self.step_plays
+        for step in self.table.steps[card_type]:
+            step_plays[step[0]](self, side, card, step)
+
+        self.check_heat(side.enemy)
+        self.check_heat(side)
+
+        side.turn_cards += 1
+        side.played.append(card_type)
+
+    def check_heat(self, side):
+        if side.heat > MAX_HEAT:
+            side.heat = MAX_HEAT
+            melt_dmg = self.rng.roll("melt") + 1
+            side.heat -= melt_dmg
+            side.hp -= melt_dmg
+            side.total_melt_dmg += melt_dmg
+            side.my_turn = False
+        if side.heat < 1:
+            side.heat = 1
+
+    def damage_enemy(self, attacker, ammount):
+        victim = attacker.enemy
+
+        # If looking at their but, deal extra dmg
+        if facing(victim, attacker, back=True):
+            ammount *= 2
+
+        sacc = self.get_sacrafice_card(victim, attacker, ammount)
+        if sacc is not None:
+            self.retire(victim, sacc)
+            ammount -= self.table.heat[victim.types[sacc]]
+
+        if ammount <= 0:
+            return
+
+        victim.hp -= ammount
+        self.total_weapon_dmg += ammount
+        if self.first_blood_turn is None:
+            self.first_blood_turn = self.turns
+
+    def retire(self, side, card):
+        if card in side.hand:
+            side.hand.remove(card)
+        if card in side.discarded:
+            side.discarded.remove(card)
+        # If it was shuffled in after a discard
+        if card in side.deck:
+            side.deck.remove(card)
+        side.retired.append(card)
+
+    # AI choices, same as Player's
+    def step_can(self, side, enemy, card_type, step, facing_enemy, distance):
+        op = step[0]
+        if op == ATTACK:
+            return facing_enemy and step[2] <= distance <= step[3]
+        if op == UNRETIRE:
+            types = side.types
+            return any(types[c] != card_type for c in side.retired)
+        if op == ENEMY_DISCARD:
+            return len(enemy.hand) > 0
+        if op == HURT_SELF:
+            return side.hp > step[1]
+        if op == MANDATORY_RANGE:
+            return step[1] <= distance <= step[2]
+        if op == RANGE_CHECK:
+            return (
+                step[1] <= distance <= step[2]
+                and self.step_can(
+                    side, enemy, card_type, step[3], facing_enemy, distance)
+            )
+        if op == INCREASE_RANGE:
+            # Cards never have a 'max' to boost
+            return False
+        return True
+
+    def card_key(self, side, enemy, card_type, facing_enemy, distance):
+        """
+        Same sort key as Player.sorted_cards, for a card type
+        """
+        table = self.table
+        can_count = table.fixed_cans[card_type]
+        mandatory_can = True
+        for step, mandatory in table.checks[card_type]:
+            if self.step_can(
+                    side, enemy, card_type, step, facing_enemy, distance):
+                can_count += 1
+            elif mandatory:
+                mandatory_can = False
+        heat = table.heat[card_type]
+        should = (
+            can_count > 0 and mandatory_can
+            and side.heat + heat <= MAX_HEAT
+        )
+        return (not should, -can_count, heat, -table.damage[card_type])
+
+    def card_sort_key(self, side):
+        """
+        Key function for sorting this side's cards, for the board as it is
+        (only good until something changes)
+        """
+        enemy = side.enemy
+        facing_enemy = facing(side, enemy)
+        distance = distance_to(side, enemy)
+        keys = {}
+        types = side.types
+
+        def key(card):
+            card_type = types[card]
+            k = keys.get(card_type)
+            if k is None:
+                k = self.card_key(
+                    side, enemy, card_type, facing_enemy, distance)
+                keys[card_type] = k
+            return k
+        return key
+
+    def sorted_cards(self, side, cards, reverse=False):
+        s_hand = sorted(cards, key=self.card_sort_key(side))
+        if reverse:
+            s_hand.reverse()
+        return s_hand
+
+    def choose_card(self, side):
+        if len(side.hand) < 1:
+            side.empty_hands += 1
+            return None
+
+        # (First of the sorted hand)
+        key = self.card_sort_key(side)
+        card = min(side.hand, key=key)
+        should = not key(card)[0]
+
+        # (one in 'x' chance to play overheating card)
+        one_in = 5
+        if not should and self.rng.roll("gamble", one_in + 1) < one_in:
+            return None
+
+        # Don't overheat if it might kill you
+        if not should and side.hp <= 5:
+            return None
+
+        return card
+
+    def discard(self, side, number_of_cards=1):
+        for i in range(number_of_cards):
+            if len(side.hand) < 1:
+                return
+            # (First of the reverse sorted hand, a.k.a the last of the worst)
+            card = max(reversed(side.hand), key=self.card_sort_key(side))
+            side.hand.remove(card)
+            side.discarded.append(card)
+
+    def get_sacrafice_card(self, side, enemy, damage):
+        if side.hand == [] or side.hp - damage > side.max_hp // 2:
+            return None
+
+        # Ignore cards that can't block
+        table = self.table
+        types = side.types
+        blockers = [
+            c for c in reversed(side.hand) if table.should_block[types[c]]]
+        if blockers == []:
+            return None
+
+        # (Best fit, then the first of the reverse sorted hand,
+        # see Player.get_sacrafice_card)
+        heat = table.heat
+
+        def fit(card):
+            return (
+                -heat[types[card]] == damage,
+                -heat[types[card]] > damage,
+                heat[types[card]] < damage
+            )
+        best_fit = min(fit(c) for c in blockers)
+        return max(
+            (c for c in blockers if fit(c) == best_fit),
+            key=self.card_sort_key(side)
+        )
+
+    # Steps, see 'step_plays' below
+    def play_nothing(self, side, card, step):
+        pass
+
+    def play_move_forward(self, side, card, step):
+        enemy = side.enemy
+        range_max, range_min = step[1], step[2]
+        if facing(side, enemy):
+            distance = distance_to(side, enemy)
+            move_distance = min(range_max, max(distance - 1, range_min))
+        else:
+            move_distance = range_min
+        move(side, move_distance)
+
+    def play_move_away(self, side, card, step):
+        enemy = side.enemy
+        away_angle = (angle_to(side, enemy) + 180) % 360
+        move(side, step[2], away_angle)
+
+    def play_rotate(self, side, card, step):
+        rot_max = step[1]
+        enemy = side.enemy
+        angle_difference = (angle_to(side, enemy) - side.rotation + 360) % 360
+        if angle_difference > 180:
+            angle_difference -= 360
+        rotation_amount = max(min(rot_max, angle_difference), -rot_max)
+        side.set_rotation(side.rotation + rotation_amount)
+
+    def play_force_rotate(self, side, card, step):
+        enemy = side.enemy
+        enemy.set_rotation(enemy.rotation + 90)
+
+    def play_attack(self, side, card, step):
+        enemy = side.enemy
+        if (
+            facing(side, enemy)
+            and step[2] <= distance_to(side, enemy) <= step[3]
+        ):
+            self.damage_enemy(side, step[1])
+
+    def play_retire(self, side, card, step):
+        self.retire(side, card)
+
+    def play_unretire(self, side, card, step):
+        card_type = side.types[card]
+        for i in range(step[1]):
+            if not self.step_can(side, None, card_type, step, None, None):
+                return
+            unretired = min(side.retired, key=self.card_sort_key(side))
+            side.retired.remove(unretired)
+            side.hand.append(unretired)
+
+    def play_draw(self, side, card, step):
+        for i in range(step[1]):
+            self.draw_card(side)
+
+    def play_end_turn(self, side, card, step):
+        side.my_turn = False
+
+    def play_discard(self, side, card, step):
+        self.discard(side, step[1])
+
+    def play_enemy_discard(self, side, card, step):
+        enemy = side.enemy
+        for i in range(step[1]):
+            self.discard(enemy)
+
+    def play_heat_enemy(self, side, card, step):
+        side.enemy.heat += step[1]
+
+    def play_hurt_self(self, side, card, step):
+        side.hp -= step[1]
+
+    def play_range_check(self, side, card, step):
+        enemy = side.enemy
+        if not self.step_can(
+                side, enemy, side.types[card], step,
+                facing(side, enemy), distance_to(side, enemy)):
+            return
+        inner = step[3]
+        self.step_plays[inner[0]](self, side, card, inner)
+
+    def play_rotate_away(self, side, card, step):
+        side.set_rotation((angle_to(side, side.enemy) + 180) % 360)
+
+    def side_record(self, side):
+        side_record = SideRecord.__new__(SideRecord)
+        side_record.pilot = side.pilot
+        side_record.mech = side.mech
+        side_record.upgrades = tuple(side.upgrades)
+        side_record.hp = side.hp
+        side_record.played_count = len(side.played)
+        side_record.cards = to_mask(side.played)
+        side_record.steps = steps_mask(side_record.cards)
+        return side_record
+
+    def record(self):
+        """
+        The same summary GameRecord(game_state) would give
+        """
+        record = GameRecord.__new__(GameRecord)
+        record.turns = self.turns
+        record.first_blood_turn = self.first_blood_turn
+        record.outcome = self.outcome
+        record.turn_lengths = tuple(self.turn_lengths)
+        record.total_melt_dmg = self.total_melt_dmg
+        record.total_weapon_dmg = self.total_weapon_dmg
+        record.white = self.side_record(self.white)
+        record.black = self.side_record(self.black)
+        return record
+
+    def fork(self, rng=None):
+        """
+        An independent copy of the game as it is now, to try things out on.
+        By default continues with the same random numbers as this game
+        """
+        game = FastGame.__new__(FastGame)
+        game.__dict__.update(self.__dict__)
+        game.rng = rng if rng is not None else self.rng.fork()
+        game.turn_lengths = list(self.turn_lengths)
+        game.white = self.white.copy()
+        game.black = self.black.copy()
+        game.white.enemy = game.black
+        game.black.enemy = game.white
+        return game
+
+    @classmethod
+    def from_game_state(cls, game_state, rng=None):
+        """
+        A fast game carrying on from where a GameState is now
+        (e.g. to play out from, see fork)
+        """
+        game = cls.__new__(cls)
+        game.table = card_table()
+        game.rng = rng if rng is not None else game_state.rng.fork()
+        game.budget = game_state.budget
+        game.card_plays = game_state.card_plays
+        game.seconds = game_state.seconds
+        game.turn_started = None
+        game.white = Side.from_player(game_state.white)
+        game.black = Side.from_player(game_state.black)
+        game.white.enemy = game.black
+        game.black.enemy = game.white
+
+        game.turns = game_state.turns
+        game.turn_lengths = list(game_state.turn_lengths)
+        game.first_blood_turn = game_state.first_blood_turn
+        game.total_melt_dmg = game_state.total_melt_dmg
+        game.total_weapon_dmg = game_state.total_weapon_dmg
+        if game_state.winner is game_state.white:
+            game.outcome = WHITE
+        elif game_state.winner is game_state.black:
+            game.outcome = BLACK
+        elif game_state.winner == "Tie":
+            game.outcome = TIE
+        elif game_state.turns >= game.budget.turns:
+            game.outcome = NO_WINNER
+        else:
+            game.outcome = None
+        return game
+
+    def __str__(self):
+        return f"(fast game turn {self.turns})"
+
+    def __repr__(self):
+        return self.__str__()
+
+
+# Opcode -> function that plays that step
+FastGame.step_plays = (
+    FastGame.play_move_forward, FastGame.play_move_away, FastGame.play_rotate,
+    FastGame.play_force_rotate, FastGame.play_attack, FastGame.play_retire,
+    FastGame.play_unretire, FastGame.play_draw, FastGame.play_end_turn,
+    FastGame.play_discard, FastGame.play_enemy_discard,
+    FastGame.play_heat_enemy, FastGame.play_hurt_self,
+    FastGame.play_range_check, FastGame.play_nothing,
+    FastGame.play_rotate_away, FastGame.play_nothing,
+)
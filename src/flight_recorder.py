@@ -0,0 +1,68 @@
+import os
+import json
+from collections import deque
+
+from src import trace
+
+"""
+A flight recorder for games: a trace sink (see trace.py) that keeps just
+the last few events of the game being played, in a fixed size ring
+buffer, and only writes them out if something goes wrong.
+
+So a whole campaign can be recorded for the price of keeping a few
+hundred events around, and only the odd games (turn limit, a turn that
+never ends, lost cards, a crash) end up on disk, with what led up to it.
+"""
+
+# Events that mean 'write down what just happened'
+TRIGGERS = {"long_game", "long_turn", "lost_cards", "exception"}
+
+# How many events to keep
+SIZE = 500
+
+
+class FlightRecorder:
+    """
+    Ring buffer of the current game's last 'size' events,
+    dumped to 'path' as json lines when a trigger event comes in
+    """
+
+    def __init__(self, path, size=SIZE):
+        self.path = path
+        self.events = deque(maxlen=size)
+        self.seed = None
+        # Games we didn't know the seed of, so their dumps don't collide
+        self.unseeded = 0
+        self.dumps = []
+
+    def __call__(self, event):
+        if event.kind == "game_start":
+            self.events.clear()
+            self.seed = event.fields.get("seed")
+        self.events.append(event)
+        if event.kind in TRIGGERS:
+            self.dump(event)
+
+    def dump(self, trigger):
+        os.makedirs(self.path, exist_ok=True)
+        name = self.seed
+        if name is None:
+            self.unseeded += 1
+            name = f"game-{os.getpid()}-{self.unseeded}"
+        path = os.path.join(self.path, f"{name}-{trigger.kind}.jsonl")
+        with open(path, "w") as f:
+            f.write(json.dumps({
+                "trigger": trigger.kind, "seed": self.seed,
+                "events": len(self.events),
+            }) + "\n")
+            for event in self.events:
+                f.write(json.dumps(event.to_dict(), default=str) + "\n")
+        self.dumps.append(path)
+
+
+def start_recording(path, size=SIZE):
+    """
+    Record games in this process (module level, so it can be a worker
+    pool's initializer)
+    """
+    return trace.add_sink(FlightRecorder(path, size))
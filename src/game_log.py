@@ -0,0 +1,352 @@
+import sys
+from collections import deque
+
+from src.game_state import GameState
+from src.game_rng import GameRng
+from src.player import Player, Choices
+from src.mech import Mech
+from src.pilot import Pilot
+from src.upgrade import Upgrade
+from src.budget import Budget, TURN_LIMIT, CARD_LIMIT
+
+"""
+Compact binary record of a single game, so an odd game (e.g. one that hit
+the turn limit) can be looked at again without re-running the campaign.
+
+A log holds every random draw the game made (choices, shuffles, dice) and
+every choice the AI made (card played, discard, sacrifice, unretire), as
+a few bytes each. Replaying feeds those back in, so the AI heuristics
+are never run again.
+"""
+
+# Run using:
+# python -m src.game_log <log file>
+
+MAGIC = b"HMLG"
+VERSION = 2
+
+# Event tags
+CHOICE = 0
+SHUFFLE = 1
+SAMPLE = 2
+ROLL = 3
+DECISION = 4
+LOADOUT = 5
+
+# Decision kinds
+PLAY = 0
+DISCARD = 1
+SACRIFICE = 2
+UNRETIRE = 3
+DECISION_NAMES = ["play", "discard", "sacrifice", "unretire"]
+
+# Index written for 'None' (e.g. no card played)
+NONE = 255
+
+
+class GameLog:
+    """
+    The bytes of one game's log: a header with the game's turn / card
+    limits (see budget.py) and naming the dice streams,
+    then the events, in the order they happened
+    """
+
+    def __init__(self, stream_names=None, events=None, turns=TURN_LIMIT,
+                 cards_per_turn=CARD_LIMIT):
+        self.stream_names = stream_names or []
+        self.events = events if events is not None else bytearray()
+        # (A game's length depends on these, so it's replay does too)
+        self.turns = turns
+        self.cards_per_turn = cards_per_turn
+
+    def budget(self):
+        return Budget(self.turns, self.cards_per_turn)
+
+    def stream_id(self, name):
+        if name not in self.stream_names:
+            self.stream_names.append(name)
+        return self.stream_names.index(name)
+
+    def add(self, tag, *values):
+        if any(v > 255 for v in values):
+            raise ValueError(f"Can't log {values} in a byte")
+        self.events.append(tag)
+        self.events.extend(values)
+
+    def to_bytes(self):
+        header = bytearray(MAGIC)
+        header.append(VERSION)
+        header += self.turns.to_bytes(2, "little")
+        header += self.cards_per_turn.to_bytes(2, "little")
+        header.append(len(self.stream_names))
+        for name in self.stream_names:
+            encoded = name.encode()
+            header.append(len(encoded))
+            header += encoded
+        return bytes(header + self.events)
+
+    @classmethod
+    def from_bytes(cls, data):
+        if data[:4] != MAGIC:
+            raise ValueError("Not a game log")
+        if data[4] != VERSION:
+            raise ValueError(f"Can't read game log version {data[4]}")
+        turns = int.from_bytes(data[5:7], "little")
+        cards_per_turn = int.from_bytes(data[7:9], "little")
+        i = 10
+        names = []
+        for _ in range(data[9]):
+            length = data[i]
+            names.append(data[i + 1:i + 1 + length].decode())
+            i += 1 + length
+        return cls(names, bytearray(data[i:]), turns, cards_per_turn)
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+    def __len__(self):
+        return len(self.events)
+
+
+class RecordingRng(GameRng):
+    """
+    A GameRng that writes down every draw it makes
+    (and carries the log, for RecordingPlayer's decisions)
+    """
+
+    def __init__(self, seed=None):
+        self.log = GameLog()
+        super().__init__(seed)
+
+    # Draws are made on indexes, which uses up the random numbers exactly
+    # the same way as drawing the items themselves
+    def choice(self, seq):
+        i = super().choice(range(len(seq)))
+        self.log.add(CHOICE, i)
+        return seq[i]
+
+    def shuffle(self, x):
+        order = list(range(len(x)))
+        super().shuffle(order)
+        self.log.add(SHUFFLE, len(order), *order)
+        x[:] = [x[i] for i in order]
+
+    def sample(self, population, k):
+        picks = super().sample(range(len(population)), k)
+        self.log.add(SAMPLE, k, *picks)
+        return [population[i] for i in picks]
+
+    def roll(self, name, sides=6):
+        r = super().roll(name, sides)
+        self.log.add(ROLL, self.log.stream_id(name), r)
+        return r
+
+
+class ReplayRng:
+    """
+    Gives back a log's draws / decisions, in order.
+    (Each kind is it's own queue, so draws a replay never asks for,
+    like the AI's gamble, don't get in the way of the rest)
+    """
+
+    def __init__(self, log):
+        self.log = log
+        self.choices = deque()
+        self.shuffles = deque()
+        self.samples = deque()
+        self.rolls = {name: deque() for name in log.stream_names}
+        self.decisions = deque()
+        self.loadouts = deque()
+
+        events = log.events
+        i = 0
+        while i < len(events):
+            tag = events[i]
+            if tag == CHOICE:
+                self.choices.append(events[i + 1])
+                i += 2
+            elif tag in [SHUFFLE, SAMPLE]:
+                n = events[i + 1]
+                queue = self.shuffles if tag == SHUFFLE else self.samples
+                queue.append(list(events[i + 2:i + 2 + n]))
+                i += 2 + n
+            elif tag == ROLL:
+                name = log.stream_names[events[i + 1]]
+                self.rolls[name].append(events[i + 2])
+                i += 3
+            elif tag == DECISION:
+                self.decisions.append((events[i + 1], events[i + 2]))
+                i += 3
+            elif tag == LOADOUT:
+                n = events[i + 3]
+                self.loadouts.append(
+                    (events[i + 1], events[i + 2], events[i + 4:i + 4 + n]))
+                i += 4 + n
+            else:
+                raise ValueError(f"Bad event tag {tag} at {i}")
+
+    def choice(self, seq):
+        return seq[self.choices.popleft()]
+
+    def choices_made(self):
+        """
+        The next logged pilot / mech / upgrades
+        """
+        pilot, mech, upgrades = self.loadouts.popleft()
+        return Choices(
+            Pilot.by_id(pilot), Mech.by_id(mech),
+            [Upgrade.by_id(u) for u in upgrades]
+        )
+
+    def shuffle(self, x):
+        order = self.shuffles.popleft()
+        if len(order) != len(x):
+            raise ValueError("Replay out of sync: shuffle size")
+        x[:] = [x[i] for i in order]
+
+    def sample(self, population, k):
+        picks = self.samples.popleft()
+        if len(picks) != k:
+            raise ValueError("Replay out of sync: sample size")
+        return [population[i] for i in picks]
+
+    def roll(self, name, sides=6):
+        return self.rolls[name].popleft()
+
+    def decision(self, kind):
+        logged_kind, i = self.decisions.popleft()
+        if logged_kind != kind:
+            raise ValueError(
+                f"Replay out of sync: expected {DECISION_NAMES[kind]}, "
+                f"logged {DECISION_NAMES[logged_kind]}"
+            )
+        return None if i == NONE else i
+
+
+class RecordingPlayer(Player):
+    """
+    Plays like a Player, but logs what it chose
+    (as the index in hand / retired)
+    """
+
+    def log_decision(self, kind, card, cards):
+        i = NONE if card is None else cards.index(card)
+        self.game_state.rng.log.add(DECISION, kind, i)
+
+    def choose_card(self):
+        card = super().choose_card()
+        self.log_decision(PLAY, card, self.hand)
+        return card
+
+    def choose_discard(self):
+        card = super().choose_discard()
+        self.log_decision(DISCARD, card, self.hand)
+        return card
+
+    def get_sacrafice_card(self, damage):
+        card = super().get_sacrafice_card(damage)
+        self.log_decision(SACRIFICE, card, self.hand)
+        return card
+
+    def choose_unretire(self):
+        card = super().choose_unretire()
+        self.log_decision(UNRETIRE, card, self.retired)
+        return card
+
+
+class ReplayPlayer(Player):
+    """
+    Makes whatever choices the log says, without thinking about it
+    """
+
+    def replay_decision(self, kind, cards):
+        i = self.game_state.rng.decision(kind)
+        return None if i is None else list(cards)[i]
+
+    def choose_card(self):
+        if len(self.hand) < 1:
+            self.empty_hands += 1
+        return self.replay_decision(PLAY, self.hand)
+
+    def choose_discard(self):
+        return self.replay_decision(DISCARD, self.hand)
+
+    def get_sacrafice_card(self, damage):
+        return self.replay_decision(SACRIFICE, self.hand)
+
+    def choose_unretire(self):
+        return self.replay_decision(UNRETIRE, self.retired)
+
+
+def record_game(seed, w_mech=None, b_mech=None, budget=None):
+    """
+    Play a game like simulate_game does, returns it and it's log
+    """
+    rng = RecordingRng(seed)
+    if budget is not None:
+        rng.log.turns = budget.turns
+        rng.log.cards_per_turn = budget.cards_per_turn
+    white_choices = Choices(None, w_mech, rng=rng)
+    black_choices = Choices(None, b_mech, rng=rng)
+    for choices in [white_choices, black_choices]:
+        upgrades = [u.type_id for u in choices.upgrade_types]
+        rng.log.add(
+            LOADOUT, choices.pilot_type.type_id, choices.mech_type.type_id,
+            len(upgrades), *upgrades
+        )
+    game_state = GameState(
+        white_choices, black_choices, rng, player_type=RecordingPlayer,
+        budget=budget
+    )
+    game_state.play()
+    return game_state, rng.log
+
+
+def replay_turns(log):
+    """
+    Rebuild a logged game, yielding it after each turn
+    """
+    rng = ReplayRng(log)
+    white_choices = rng.choices_made()
+    black_choices = rng.choices_made()
+    game_state = GameState(
+        white_choices, black_choices, rng, player_type=ReplayPlayer,
+        budget=log.budget()
+    )
+    game_state.start()
+    while True:
+        over = game_state.play_turn()
+        yield game_state
+        if over:
+            return
+
+
+def replay_game(log):
+    """
+    Rebuild a logged game, returns it once it's over
+    """
+    for game_state in replay_turns(log):
+        pass
+    return game_state
+
+
+if __name__ == "__main__":
+    log = GameLog.load(sys.argv[1])
+    for game_state in replay_turns(log):
+        player = (
+            game_state.white if game_state.turns % 2 == 1
+            else game_state.black
+        )
+        played = player.played_cards[
+            len(player.played_cards) - player.turn_cards:]
+        print(
+            f"Turn {game_state.turns}: {player} played "
+            f"{[c.short_name() for c in played]}"
+        )
+    print(f"Winner: {game_state.winner}")
@@ -0,0 +1,131 @@
+from functools import lru_cache
+
+from src.player import Player
+from src.card import Card
+from src.mech import Mech
+from src.pilot import Pilot
+from src.upgrade import Upgrade
+from src.utils import to_mask, mask_ids
+
+"""
+Compact summaries of finished games, so the Statistician doesn't have to
+hold onto every GameState (and through it every player, mech and card)
+"""
+
+# Who won a game
+WHITE = 0
+BLACK = 1
+TIE = 2
+NO_WINNER = 3  # Hit the turn limit
+
+# How each outcome shows up in the stats
+OUTCOME_NAMES = ["White", "Black", "Tie", "None"]
+
+
+@lru_cache(maxsize=4096)
+def steps_mask(cards_mask):
+    """
+    Bit mask of every step type on the card types in a card bit mask.
+    (The same combinations of cards come up again and again, so cache it)
+    """
+    return to_mask(
+        type(s).type_id
+        for card_id in mask_ids(cards_mask)
+        for s in Card.by_id(card_id).steps
+    )
+
+
+class SideRecord:
+    """
+    What one player brought to a game, and how it went for them.
+    Types are kept as their integer ids (see NamedClass.type_id)
+    """
+    __slots__ = (
+        "pilot", "mech", "upgrades", "hp", "played_count", "cards", "steps",
+    )
+
+    def __init__(self, player):
+        self.pilot = player.pilot.type_id
+        self.mech = player.mech.type_id
+        self.upgrades = tuple(u.type_id for u in player.upgrades)
+        self.hp = player.mech.hp
+        self.played_count = len(player.played_cards)
+        # Which card/step types were played at all (not how often),
+        # as bit masks of their ids
+        self.cards = to_mask(ct.type_id for ct in player.played_cards)
+        self.steps = steps_mask(self.cards)
+
+    def __str__(self):
+        return (
+            f"({Pilot.by_id(self.pilot).short_name()}, "
+            f"{Mech.by_id(self.mech).short_name()} {self.hp}hp)"
+            f"{[Upgrade.by_id(u).short_name() for u in self.upgrades]}"
+        )
+
+    def __repr__(self):
+        return self.__str__()
+
+
+class GameRecord:
+    """
+    Everything the stats need from a finished game
+    """
+    __slots__ = (
+        "turns", "first_blood_turn", "outcome", "turn_lengths",
+        "total_melt_dmg", "total_weapon_dmg", "white", "black",
+    )
+
+    def __init__(self, game_state):
+        self.turns = game_state.turns
+        self.first_blood_turn = game_state.first_blood_turn
+        self.turn_lengths = tuple(game_state.turn_lengths)
+        self.total_melt_dmg = game_state.total_melt_dmg
+        self.total_weapon_dmg = game_state.total_weapon_dmg
+        self.white = SideRecord(game_state.white)
+        self.black = SideRecord(game_state.black)
+
+        if game_state.winner is game_state.white:
+            self.outcome = WHITE
+        elif game_state.winner is game_state.black:
+            self.outcome = BLACK
+        elif isinstance(game_state.winner, Player):
+            raise ValueError(f"Winner not in game: {game_state.winner}")
+        elif game_state.winner == "Tie":
+            self.outcome = TIE
+        else:
+            self.outcome = NO_WINNER
+
+    @property
+    def winner(self):
+        """
+        The winning side's record, or None for a tie / no winner
+        """
+        if self.outcome == WHITE:
+            return self.white
+        if self.outcome == BLACK:
+            return self.black
+        return None
+
+    @property
+    def loser(self):
+        if self.outcome == WHITE:
+            return self.black
+        if self.outcome == BLACK:
+            return self.white
+        return None
+
+    def cards(self):
+        """
+        Bit mask of the card types played by either side
+        """
+        return self.white.cards | self.black.cards
+
+    def __str__(self):
+        winner = self.winner or OUTCOME_NAMES[self.outcome]
+        return (
+            f"{winner} win, {self.turns} turns, "
+            f"{self.first_blood_turn} fb"
+        )
+
+    def __repr__(self):
+        return self.__str__()
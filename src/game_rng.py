@@ -0,0 +1,91 @@
+import random
+
+"""
+Every game's own source of randomness, so games don't share (or fight
+over) the global 'random' - the same seed always plays the same game,
+whatever else is running in the process.
+
+The dice rolled over and over during a game (the melt d6, the AI's
+overheat gamble) each come from their own sub-stream, rolled in bulk.
+"""
+
+# How many bytes of dice to roll at once
+DICE_BULK = 256
+
+# Sides -> (table, rejects), see Dice
+_dice_tables = {}
+
+
+class Dice:
+    """
+    A stream of fair rolls of an n sided die (0 to n-1), rolled in bulk
+    """
+
+    def __init__(self, rng, sides):
+        if not 1 < sides <= 256:
+            raise ValueError(f"Can't roll a {sides} sided die from bytes")
+        self.rng = rng
+        # Each random byte is one roll, but bytes past the last multiple of
+        # 'sides' would make low rolls more likely, so they get dropped
+        # (every game rolls the same dice, so they're only worked out once)
+        tables = _dice_tables.get(sides)
+        if tables is None:
+            tables = (
+                bytes(b % sides for b in range(256)),
+                bytes(range(256 - 256 % sides, 256)),
+            )
+            _dice_tables[sides] = tables
+        self.table, self.rejects = tables
+        self.rolls = b""
+        self.i = 0
+
+    def fork(self):
+        dice = Dice.__new__(Dice)
+        dice.__dict__.update(self.__dict__)
+        dice.rng = random.Random(0)
+        dice.rng.setstate(self.rng.getstate())
+        return dice
+
+    def roll(self):
+        while self.i >= len(self.rolls):
+            self.rolls = self.rng.randbytes(DICE_BULK).translate(
+                self.table, self.rejects)
+            self.i = 0
+        r = self.rolls[self.i]
+        self.i += 1
+        return r
+
+
+class GameRng(random.Random):
+    """
+    A random.Random for one game (shuffles, choices, etc),
+    plus named streams of dice
+    """
+
+    def __init__(self, seed=None):
+        # (If not given a seed, take one from the global random,
+        # so seeding that still repeats a game)
+        if seed is None:
+            seed = random.getrandbits(32)
+        self.game_seed = seed
+        self.dice = {}
+        super().__init__(seed)
+
+    def roll(self, name, sides=6):
+        """
+        Roll the named stream's die, 0 to sides-1
+        """
+        dice = self.dice.get(name)
+        if dice is None:
+            dice = Dice(random.Random(f"{self.game_seed}-{name}"), sides)
+            self.dice[name] = dice
+        return dice.roll()
+
+    def fork(self):
+        """
+        A copy that carries on with the same numbers as this one
+        """
+        rng = GameRng(self.game_seed)
+        rng.setstate(self.getstate())
+        rng.dice = {name: dice.fork() for name, dice in self.dice.items()}
+        return rng
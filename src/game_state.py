@@ -2,6 +2,9 @@ import logging
 logger = logging.getLogger("HotMech")
 
 from src.player import Player, Choices
+from src.game_rng import GameRng
+from src import trace
+from src import budget as budgets
 
 class GameState:
     """
@@ -9,12 +12,29 @@ class GameState:
     for the 'Statistics' class to draw conclusions from
     """
 
-    def __init__(self, white_choices=None, black_choices=None):
-        white_choices = white_choices if white_choices else Choices()
-        black_choices = black_choices if black_choices else Choices()
+    def __init__(self, white_choices=None, black_choices=None, rng=None,
+                 player_type=None, budget=None):
+        # This game's own random numbers (see game_rng.py)
+        self.rng = rng if rng is not None else GameRng()
 
-        self.white = white_choices.create_player(self)
-        self.black = black_choices.create_player(self)
+        # How much work the game may take (see budget.py)
+        self.budget = budget if budget is not None else budgets.DEFAULT
+        self.card_plays = 0
+        self.seconds = 0
+
+        if not white_choices:
+            white_choices = Choices(rng=self.rng)
+        if not black_choices:
+            black_choices = Choices(rng=self.rng)
+
+        # Goes up whenever anything a card's 'can' depends on changes
+        # (positions, heat, hp, which cards are where), so cards can
+        # remember their answers until then
+        self.board_version = 0
+
+        # (player_type is for AIs, replays, etc, see game_log.py)
+        self.white = white_choices.create_player(self, player_type)
+        self.black = black_choices.create_player(self, player_type)
 
         # Start one player 'on other side of board'
         self.black.location = (18, 0)
@@ -42,24 +62,49 @@ class GameState:
         return GameState._last_instance
 
     def play(self):
+        try:
+            self.start()
+            while not self.play_turn():
+                pass
+        except Exception as e:
+            if trace.on:
+                trace.emit("exception", turn=self.turns, error=repr(e))
+            raise
+        finally:
+            self.white.close()
+            self.black.close()
+
+    def start(self):
         # Each start with full hand
         self.white.draw_hand()
         self.black.draw_hand()
 
-        while self.turns < 100:
-            self.take_turn()
-            white_dead = self.white.mech.hp <= 0
-            black_dead = self.black.mech.hp <= 0
-
-            if white_dead and black_dead:
-                return self.end_game("Tie")
-            elif white_dead:
-                return self.end_game(self.black)
-            elif black_dead:
-                return self.end_game(self.white)
-
-        if self.turns >= 100:
-            logging.info(f"Long: {self}")
+    def play_turn(self):
+        """
+        Play the next turn, returns True once the game is over
+        """
+        self.take_turn()
+        white_dead = self.white.mech.hp <= 0
+        black_dead = self.black.mech.hp <= 0
+
+        if white_dead and black_dead:
+            self.end_game("Tie")
+            return True
+        elif white_dead:
+            self.end_game(self.black)
+            return True
+        elif black_dead:
+            self.end_game(self.white)
+            return True
+
+        if self.turns >= self.budget.turns:
+            if trace.on:
+                trace.emit(
+                    "long_game", turns=self.turns,
+                    white=str(self.white), black=str(self.black)
+                )
+            return True
+        return False
 
     def end_game(self, winner):
         self.winner = winner
@@ -80,10 +125,17 @@ class GameState:
         if self.turns % 2 == 0:
             player = self.black
 
-        logger.info(f"Starting turn {self.turns} - {player}")
+        if trace.on:
+            trace.emit(
+                "turn_start", turn=self.turns, side=trace.side(player))
 
+        started = self.budget.clock()
         player.take_turn()
         self.turn_lengths.append(player.turn_cards)
+        self.budget.charge(self, player.turn_cards, started)
+        if trace.on:
+            # (Only worth the time if someone is watching)
+            player.check_cards()
 
     def damage_enemy(self, attacker, ammount):
         # Allow victim to block damage by retiring
@@ -94,31 +146,66 @@ class GameState:
         if victim.facing_away():
             ammount *= 2
 
-        if (victim.get_sacrafice_card(ammount) is not None):
-            sacc = victim.get_sacrafice_card(ammount)
+        sacc = victim.get_sacrafice_card(ammount)
+        if sacc is not None:
             victim.retire(sacc)
-            logger.info(
-                f"Reduced {ammount} to {ammount - sacc.heat} "
-                f"by retiring {sacc}"
-            )
+            if trace.on:
+                trace.emit(
+                    "sacrifice", side=trace.side(victim), damage=ammount,
+                    reduced=ammount - sacc.heat, card=sacc.name
+                )
             ammount -= sacc.heat
-        elif victim.healthy_enough(ammount):
-            logger.info(
-                f"Didn't reduce {ammount} (will have "
-                f"{victim.mech.hp - ammount}/{victim.mech.max_hp})")
-        else:
-            logger.info(f"Couldn't reduce {ammount}: {victim.hand}")
+        elif trace.on:
+            if victim.healthy_enough(ammount):
+                trace.emit(
+                    "took_hit", side=trace.side(victim), damage=ammount,
+                    hp=victim.mech.hp - ammount, max_hp=victim.mech.max_hp
+                )
+            else:
+                trace.emit(
+                    "no_sacrifice", side=trace.side(victim), damage=ammount,
+                    hand=trace.card_names(victim.hand)
+                )
 
         if ammount <= 0:
             return
 
         victim.mech.hp -= ammount
-        logger.info(f"Dealt {ammount} to {self.enemy_of(attacker)}")
+        if trace.on:
+            trace.emit(
+                "damage", side=trace.side(victim), damage=ammount,
+                hp=victim.mech.hp
+            )
         self.total_weapon_dmg += ammount
 
         if self.first_blood_turn is None:
             self.first_blood_turn = self.turns
-            logger.info(f"First blood at {self.first_blood_turn}")
+            if trace.on:
+                trace.emit("first_blood", turn=self.first_blood_turn)
+
+    def fork(self, rng=None):
+        """
+        An independent copy of the game as it is now, to try things out on
+        (e.g. for a search AI). By default, continues with the same random
+        numbers as this game would
+        """
+        game_state = object.__new__(type(self))
+        game_state.__dict__.update(self.__dict__)
+        game_state.rng = rng if rng is not None else self.rng.fork()
+        game_state.turn_lengths = list(self.turn_lengths)
+        game_state.white = self.white.fork(game_state)
+        game_state.black = self.black.fork(game_state)
+
+        players = {
+            id(self.white): game_state.white,
+            id(self.black): game_state.black,
+        }
+        game_state.winner = players.get(id(self.winner), self.winner)
+        game_state.loser = players.get(id(self.loser), self.loser)
+        return game_state
+
+    def board_changed(self):
+        self.board_version += 1
 
     def enemy_of(self, player):
         enemy = self.white
@@ -0,0 +1,367 @@
+import os
+import sys
+import json
+import mmap
+from array import array
+
+from src.card import Card
+from src.mech import Mech
+from src.pilot import Pilot
+from src.upgrade import Upgrade
+from src.game_record import GameRecord, SideRecord, steps_mask
+from src.result_cache import fingerprint_hashes
+from src.utils import to_mask, mask_ids
+
+"""
+Append-only, columnar, on-disk store of finished games.
+
+A store is a directory with a 'schema.json' and one file per column.
+The schema also has the fingerprint of every card and entity (and the
+engine version, see result_cache.py) the games were played with, so games
+played with different cards or rules can't end up in the same store.
+Every column is a flat array of fixed width values, so loading is just
+memory-mapping each file - no parsing, and no re-simulating.
+Pilots, mechs, upgrades and cards are stored as their type ids, which
+depend on the order the types are defined in, so the schema also has
+each family's names in id order: a store read after the types have been
+re-ordered has it's ids mapped to the current ones.
+A 'blocks.txt' lists the blocks of games (by their key, see
+Statistician.play_games) already in the store, so running the same
+campaign into it again doesn't store them twice.
+"""
+
+# Run using:
+# python -m src.game_store <store dir>
+
+# Families of named types we store as their small integer ids
+# (see NamedClass.type_id)
+FAMILIES = {
+    "pilot": Pilot,
+    "mech": Mech,
+    "upgrade": Upgrade,
+    "card": Card,
+}
+
+# Column name -> array typecode
+GAME_COLUMNS = {
+    "turns": "H",
+    "first_blood_turn": "H",  # 0 if there was no first blood
+    "outcome": "B",
+    "melt_dmg": "H",
+    "weapon_dmg": "H",
+}
+SIDE_COLUMNS = {
+    "pilot": "B",
+    "mech": "B",
+    "upgrades": "Q",  # Bit mask of upgrade ids
+    "hp": "h",
+    "played": "H",  # Number of cards played
+    "cards": "Q",  # Bit mask of card ids played
+}
+# Side columns holding ids of a family: column -> (family, bit mask?)
+ID_COLUMNS = {
+    "pilot": ("pilot", False),
+    "mech": ("mech", False),
+    "upgrades": ("upgrade", True),
+    "cards": ("card", True),
+}
+COLUMNS = dict(GAME_COLUMNS)
+for side in ["white", "black"]:
+    COLUMNS.update({f"{side}_{k}": v for k, v in SIDE_COLUMNS.items()})
+# Cards played each turn, a variable length list per game:
+# all the values back to back, plus where each game's values end
+COLUMNS["turn_lengths"] = "H"
+COLUMNS["turn_lengths_end"] = "Q"
+
+# How many games to buffer before writing
+FLUSH_EVERY = 4096
+
+
+def name_tables():
+    """
+    Class name of every stored type, in id order
+    """
+    return {
+        family: [t.__name__ for t in named_class.types_by_id]
+        for family, named_class in FAMILIES.items()
+    }
+
+
+def changed_names(old, new):
+    """
+    What differs between two fingerprint_hashes: the type names, or
+    'engine' for the rules
+    """
+    changed = ["engine"] if old.get("engine") != new["engine"] else []
+    for family, hashes in new.items():
+        if family == "engine":
+            continue
+        old_hashes = old.get(family, {})
+        changed += [
+            name for name in sorted(set(hashes) | set(old_hashes))
+            if old_hashes.get(name) != hashes.get(name)
+        ]
+    return changed
+
+
+class GameStore:
+    """
+    Writes game records to the end of a store, creating it if need be
+    """
+
+    def __init__(self, path):
+        self.path = path
+        for family, named_class in FAMILIES.items():
+            if len(named_class.types_by_id) > 64:
+                raise ValueError(f"Too many {family} types for a bit mask")
+
+        schema = {
+            "columns": COLUMNS,
+            "byteorder": sys.byteorder,
+            "names": name_tables(),
+            "fingerprints": fingerprint_hashes(),
+        }
+        schema_path = os.path.join(path, "schema.json")
+        if os.path.exists(schema_path):
+            with open(schema_path) as f:
+                existing = json.load(f)
+            changed = changed_names(
+                existing.get("fingerprints", {}), schema["fingerprints"])
+            if changed:
+                raise ValueError(
+                    f"{path} was played with different cards or rules "
+                    f"({', '.join(changed)}), start a new store"
+                )
+            # Ids are only comparable if the types are the same
+            if existing != schema:
+                raise ValueError(
+                    f"{path} was written with different columns or types, "
+                    "start a new store"
+                )
+        else:
+            os.makedirs(path, exist_ok=True)
+            with open(schema_path, "w") as f:
+                json.dump(schema, f, indent=2)
+
+        self.rows = StoredGames.count(path)
+        self.turn_lengths_end = StoredGames.last_turn_lengths_end(path)
+        self.blocks = set()
+        blocks_path = os.path.join(path, "blocks.txt")
+        if os.path.exists(blocks_path):
+            with open(blocks_path) as f:
+                self.blocks = set(f.read().split())
+        self.buffers = {
+            name: array(typecode) for name, typecode in COLUMNS.items()
+        }
+
+    def append(self, record):
+        b = self.buffers
+        b["turns"].append(record.turns)
+        b["first_blood_turn"].append(record.first_blood_turn or 0)
+        b["outcome"].append(record.outcome)
+        b["melt_dmg"].append(record.total_melt_dmg)
+        b["weapon_dmg"].append(record.total_weapon_dmg)
+
+        for side, side_record in [
+                ("white", record.white), ("black", record.black)]:
+            b[f"{side}_pilot"].append(side_record.pilot)
+            b[f"{side}_mech"].append(side_record.mech)
+            b[f"{side}_upgrades"].append(to_mask(side_record.upgrades))
+            b[f"{side}_hp"].append(side_record.hp)
+            b[f"{side}_played"].append(side_record.played_count)
+            b[f"{side}_cards"].append(side_record.cards)
+
+        b["turn_lengths"].extend(record.turn_lengths)
+        self.turn_lengths_end += len(record.turn_lengths)
+        b["turn_lengths_end"].append(self.turn_lengths_end)
+
+        self.rows += 1
+        if len(b["turns"]) >= FLUSH_EVERY:
+            self.flush()
+
+    def flush(self):
+        for name, buffer in self.buffers.items():
+            if len(buffer) == 0:
+                continue
+            with open(os.path.join(self.path, f"{name}.col"), "ab") as f:
+                buffer.tofile(f)
+            del buffer[:]
+
+    def add_block(self, key):
+        """
+        Remember a block of games is in the store
+        (once they're written, so a crash part way stores them again)
+        """
+        self.flush()
+        self.blocks.add(key)
+        with open(os.path.join(self.path, "blocks.txt"), "a") as f:
+            f.write(key + "\n")
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.rows
+
+
+class StoredGames:
+    """
+    Read only, memory-mapped view of a store's columns.
+    Each column is a memoryview you can index/slice like a list
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "schema.json")) as f:
+            self.schema = json.load(f)
+        if self.schema["byteorder"] != sys.byteorder:
+            raise ValueError(f"{path} was written on a different byte order")
+
+        self.maps = []
+        self.columns = {
+            name: self.map_column(name, typecode)
+            for name, typecode in self.schema["columns"].items()
+        }
+
+        self.remap_ids()
+
+    def remap_ids(self):
+        """
+        Swap the id columns for ones with the current ids, for any family
+        whose types have been re-ordered since the store was written
+        (new types added at the end don't change the stored ids)
+        """
+        for family, names in name_tables().items():
+            current_ids = {name: i for i, name in enumerate(names)}
+            stored_names = self.schema["names"][family]
+            missing = [n for n in stored_names if n not in current_ids]
+            if missing:
+                raise ValueError(
+                    f"{self.path} has {family} types that no longer exist: "
+                    f"{', '.join(missing)}"
+                )
+            new_ids = [current_ids[name] for name in stored_names]
+            if new_ids == list(range(len(new_ids))):
+                continue
+
+            for side in ["white", "black"]:
+                for column, (id_family, is_mask) in ID_COLUMNS.items():
+                    if id_family != family:
+                        continue
+                    name = f"{side}_{column}"
+                    if is_mask:
+                        # Few distinct masks, so only map each once
+                        masks = {}
+                        for mask in self.columns[name]:
+                            if mask not in masks:
+                                masks[mask] = to_mask(
+                                    new_ids[i] for i in mask_ids(mask))
+                        remapped = (masks[mask] for mask in self.columns[name])
+                    else:
+                        remapped = (new_ids[i] for i in self.columns[name])
+                    typecode = self.schema["columns"][name]
+                    ids = array(typecode, remapped)
+                    self.columns[name].release()
+                    self.columns[name] = memoryview(ids)
+
+    def map_column(self, name, typecode):
+        file_path = os.path.join(self.path, f"{name}.col")
+        if not os.path.exists(file_path) or os.path.getsize(file_path) == 0:
+            # Can't map an empty file
+            return memoryview(array(typecode))
+        with open(file_path, "rb") as f:
+            m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.maps.append(m)
+        return memoryview(m).cast(typecode)
+
+    @staticmethod
+    def count(path):
+        """
+        Number of games in a store, without mapping it
+        """
+        file_path = os.path.join(path, "turns.col")
+        if not os.path.exists(file_path):
+            return 0
+        return os.path.getsize(file_path) // array(COLUMNS["turns"]).itemsize
+
+    @staticmethod
+    def last_turn_lengths_end(path):
+        file_path = os.path.join(path, "turn_lengths_end.col")
+        if not os.path.exists(file_path) or os.path.getsize(file_path) == 0:
+            return 0
+        ends = array(COLUMNS["turn_lengths_end"])
+        with open(file_path, "rb") as f:
+            f.seek(-ends.itemsize, os.SEEK_END)
+            ends.fromfile(f, 1)
+        return ends[0]
+
+    def __len__(self):
+        return len(self.columns["turns"])
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def side_record(self, side, i):
+        c = self.columns
+        side_record = SideRecord.__new__(SideRecord)
+        side_record.pilot = c[f"{side}_pilot"][i]
+        side_record.mech = c[f"{side}_mech"][i]
+        side_record.upgrades = tuple(mask_ids(c[f"{side}_upgrades"][i]))
+        side_record.hp = c[f"{side}_hp"][i]
+        side_record.played_count = c[f"{side}_played"][i]
+        side_record.cards = c[f"{side}_cards"][i]
+        side_record.steps = steps_mask(side_record.cards)
+        return side_record
+
+    def record(self, i):
+        """
+        Rebuild the i'th game's record
+        (upgrades fitted twice only show up once)
+        """
+        c = self.columns
+        record = GameRecord.__new__(GameRecord)
+        record.turns = c["turns"][i]
+        record.first_blood_turn = c["first_blood_turn"][i] or None
+        record.outcome = c["outcome"][i]
+        record.total_melt_dmg = c["melt_dmg"][i]
+        record.total_weapon_dmg = c["weapon_dmg"][i]
+        start = c["turn_lengths_end"][i - 1] if i > 0 else 0
+        end = c["turn_lengths_end"][i]
+        record.turn_lengths = tuple(c["turn_lengths"][start:end])
+        record.white = self.side_record("white", i)
+        record.black = self.side_record("black", i)
+        return record
+
+    def records(self):
+        for i in range(len(self)):
+            yield self.record(i)
+
+    def close(self):
+        for column in self.columns.values():
+            column.release()
+        for m in self.maps:
+            m.close()
+        self.maps = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == "__main__":
+    # Report on a historic campaign, without re-simulating it
+    from src.statistician import Statistician
+
+    s = Statistician()
+    s.load_games(sys.argv[1])
+    s.calc_stats()
+    s.calc_card_stats()
+    s.print_statistics()
@@ -0,0 +1,183 @@
+import sys
+import time
+import multiprocessing
+
+from src.card import Card
+from src.mech import Mech
+from src.pilot import Pilot
+from src.upgrade import Upgrade
+from src.sweep import (
+    MatchupMatrix, play_pairs, all_pairs, all_loadouts, loadout_name
+)
+
+"""
+Re-run a saved sweep (see sweep.py) after editing some cards, playing
+only the matchups the edit could have changed.
+
+A card can only change games where one of the loadouts has it in it's
+deck, so the DependencyIndex maps each card type to the pilots / mechs /
+upgrades that list it in their card_types, and each of those to the
+loadouts (and so matchups) that include them.
+"""
+
+# Run using:
+# python -m src.incremental <matrix.json> [workers]
+# (after making one with: python -m src.sweep 10 1 matrix.json)
+
+
+class DependencyIndex:
+    """
+    Card type -> entity types whose card_types has it,
+    entity type -> index of every loadout it's in
+    """
+
+    def __init__(self, loadouts):
+        self.loadouts = list(loadouts)
+
+        self.card_entities = {ct: set() for ct in Card.types_by_id}
+        for family in [Pilot, Mech, Upgrade]:
+            for entity_type in family.types_by_id:
+                for card_type in entity_type.card_types:
+                    self.card_entities[card_type].add(entity_type)
+
+        self.entity_loadouts = {}
+        for i, (pilot, mech, upgrades) in enumerate(self.loadouts):
+            entities = [Pilot.by_id(pilot), Mech.by_id(mech)] + [
+                Upgrade.by_id(u) for u in upgrades]
+            for entity_type in entities:
+                self.entity_loadouts.setdefault(entity_type, set()).add(i)
+
+    def entities_with(self, card_types):
+        entities = set()
+        for card_type in card_types:
+            entities |= self.card_entities.get(card_type, set())
+        return entities
+
+    def loadouts_with(self, entity_types):
+        loadouts = set()
+        for entity_type in entity_types:
+            loadouts |= self.entity_loadouts.get(entity_type, set())
+        return loadouts
+
+    def affected_pairs(self, card_types=(), entity_types=()):
+        """
+        Every matchup (i <= j) with a loadout that has one of the given
+        cards, or is one of the given entities
+        """
+        entities = self.entities_with(card_types) | set(entity_types)
+        affected = self.loadouts_with(entities)
+        n = len(self.loadouts)
+        return [
+            (i, j) for i in range(n) for j in range(i, n)
+            if i in affected or j in affected
+        ]
+
+
+def changed_types(old_hashes, new_hashes):
+    """
+    Which card types and entity types differ between two fingerprint_hashes
+    (new ones count as changed, removed ones are just gone)
+    """
+    cards = [
+        ct for ct in Card.types_by_id
+        if old_hashes["Card"].get(ct.__name__)
+        != new_hashes["Card"][ct.__name__]
+    ]
+    entities = [
+        t for family in [Pilot, Mech, Upgrade] for t in family.types_by_id
+        if old_hashes[family.__name__].get(t.__name__)
+        != new_hashes[family.__name__][t.__name__]
+    ]
+    return cards, entities
+
+
+def update_matrix(old, loadouts=None, workers=1, progress=False, cache=None):
+    """
+    A copy of a saved MatchupMatrix (over 'loadouts', by default all of
+    them), with the matchups that any changed card / entity could affect
+    played again, with the same settings.
+    Returns (matrix, changed cards, changed entities, matchups played)
+    """
+    loadouts = loadouts or all_loadouts()
+    matrix = MatchupMatrix(
+        loadouts, old.games_per_matchup, old.precision, old.campaign_seed)
+
+    if old.fingerprints["engine"] != matrix.fingerprints["engine"]:
+        # The rules themselves changed, nothing can be kept
+        cards, entities = list(Card.types_by_id), []
+        pairs = all_pairs(loadouts)
+    else:
+        cards, entities = changed_types(old.fingerprints, matrix.fingerprints)
+        pairs = DependencyIndex(loadouts).affected_pairs(cards, entities)
+
+        # Keep every other matchup we already played
+        # (loadouts that are new since then have nothing to keep)
+        old_index = {loadout: i for i, loadout in enumerate(old.loadouts)}
+        redo = set(pairs)
+        for i, j in all_pairs(loadouts):
+            old_i = old_index.get(loadouts[i])
+            old_j = old_index.get(loadouts[j])
+            if old_i is None or old_j is None:
+                redo.add((i, j))
+                continue
+            if (i, j) in redo:
+                continue
+            copy_cell(old, old_i, old_j, matrix, i, j)
+        pairs = sorted(redo)
+
+    play_pairs(matrix, pairs, workers, progress, cache)
+    return matrix, cards, entities, len(pairs)
+
+
+def copy_cell(old, old_i, old_j, new, i, j):
+    old_n = len(old.loadouts)
+    n = len(new.loadouts)
+    for a, b, old_a, old_b in [(i, j, old_i, old_j), (j, i, old_j, old_i)]:
+        k = old_a * old_n + old_b
+        new.games[a * n + b] = old.games[k]
+        new.wins[a * n + b] = old.wins[k]
+        new.ties[a * n + b] = old.ties[k]
+
+
+def print_changes(old, new, top=10):
+    """
+    Whose win rates moved the most, loadouts then entities
+    """
+    old_index = {loadout: i for i, loadout in enumerate(old.loadouts)}
+    moved = []
+    for i, loadout in enumerate(new.loadouts):
+        old_i = old_index.get(loadout)
+        if old_i is None:
+            continue
+        before = old.row_win_rate(old_i)
+        after = new.row_win_rate(i)
+        if before is not None and after is not None and before != after:
+            moved.append((after - before, loadout_name(loadout)))
+    moved.sort(key=lambda m: -abs(m[0]))
+    print("Biggest changes:")
+    for change, name in moved[:top]:
+        print(f"  {change:+.3f} {name}")
+
+    before = old.entity_win_rates()
+    for name, rate in new.entity_win_rates().items():
+        if name in before and before[name] != rate:
+            print(f"  {name}: {before[name]} -> {rate}")
+
+
+if __name__ == "__main__":
+    path = sys.argv[1]
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else (
+        multiprocessing.cpu_count())
+
+    old = MatchupMatrix.load(path)
+    start = time.perf_counter()
+    matrix, cards, entities, played = update_matrix(
+        old, workers=workers, progress=True)
+    elapsed = time.perf_counter() - start
+
+    print(f"Changed cards: {[ct.name for ct in cards]}")
+    print(f"Changed entities: {[t.name for t in entities]}")
+    print(f"Played {played} matchups again in {elapsed:.1f}s")
+    print_changes(old, matrix)
+    matrix.print_summary()
+    matrix.save(path)
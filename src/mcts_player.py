@@ -0,0 +1,324 @@
+import sys
+import math
+import time
+import random
+import multiprocessing
+
+from src.player import Player
+from src.fast_game import FastGame
+from src.game_rng import GameRng
+from src.game_record import WHITE, BLACK, TIE
+from src.budget import BudgetExceeded
+
+"""
+A stronger (and much slower) player than the sorted_hand heuristic:
+it picks cards by Monte Carlo tree search.
+
+The tree is over our own plays for the rest of this turn (which card type
+to play next, or stop). Each rollout forks a fast engine copy of the game
+(see fast_game.py), walks down the tree, then lets the heuristic AI play
+out the rest of the game (or 'horizon' turns of it).
+Nodes are shared through a transposition table, keyed on a hash of the
+abstract state, so playing A then B finds the same node as B then A.
+
+The search only knows what the player could: each rollout re-deals the
+hidden cards (our deck's order, and which of the enemy's unseen cards are
+in it's hand) at random, rather than peeking at the real ones.
+"""
+
+# Run using:
+# python -m src.mcts_player [number of games] [rollouts]
+
+# Action for 'don't play anything else this turn'
+STOP = -1
+
+
+class Node:
+    """
+    Visits, and [visits, total value] for each action, at one state
+    """
+    __slots__ = ("visits", "actions")
+
+    def __init__(self, actions):
+        self.visits = 0
+        self.actions = {action: [0, 0.0] for action in actions}
+
+    def select(self, exploration):
+        # Try everything once, then UCB1
+        best = None
+        best_score = -1
+        log_visits = math.log(self.visits) if self.visits else 0
+        for action, (visits, value) in self.actions.items():
+            if visits == 0:
+                return action
+            score = (
+                value / visits
+                + exploration * math.sqrt(log_visits / visits)
+            )
+            if score > best_score:
+                best = action
+                best_score = score
+        return best
+
+
+def legal_actions(side):
+    """
+    Stop, or play one of the card types in hand
+    (copies of the same card are the same choice)
+    """
+    types = side.types
+    return [STOP] + sorted({types[c] for c in side.hand})
+
+
+def state_key(game, side):
+    """
+    Hash of what matters about a game state, ignoring which copy of a card
+    is which, or the order of the deck
+    """
+    enemy = side.enemy
+    types = side.types
+    return hash((
+        game.turns, side.turn_cards,
+        side.hp, side.heat,
+        round(side.x, 1), round(side.y, 1), round(side.rotation),
+        tuple(sorted(types[c] for c in side.hand)),
+        tuple(sorted(types[c] for c in side.retired)),
+        len(side.deck), len(side.discarded),
+        enemy.hp, enemy.heat,
+        round(enemy.x, 1), round(enemy.y, 1), round(enemy.rotation),
+        len(enemy.hand),
+    ))
+
+
+def value_for(game, white):
+    """
+    How good the game is for us: 1 win, 0 loss, 0.5 tie/no winner.
+    If it's not over yet, our share of the hp left
+    """
+    me, enemy = (game.white, game.black) if white else (game.black, game.white)
+    if game.outcome == TIE:
+        return 0.5
+    if game.outcome == WHITE:
+        return 1.0 if white else 0.0
+    if game.outcome == BLACK:
+        return 0.0 if white else 1.0
+    if game.outcome is not None:
+        return 0.5
+    my_hp = max(me.hp, 0)
+    total = my_hp + max(enemy.hp, 0)
+    return my_hp / total if total else 0.5
+
+
+def rollout(game, white, horizon):
+    """
+    Let the heuristic finish the turn, then play on a few turns
+    """
+    try:
+        over = game.finish_turn()
+        turns = 0
+        while not over and turns < horizon:
+            over = game.play_turn()
+            turns += 1
+    except BudgetExceeded:
+        # Long turn
+        return 0.5
+    return value_for(game, white)
+
+
+def deal_hidden(side, rng):
+    """
+    Re-deal what 'side' can't see: the order of it's own deck, and which
+    of the enemy's cards not yet seen (in hand or deck) are in it's hand
+    """
+    # (Sorted first, so the deal can't depend on the real order either)
+    side.deck.sort(key=side.types.__getitem__)
+    rng.shuffle(side.deck)
+    enemy = side.enemy
+    unseen = sorted(enemy.hand + enemy.deck, key=enemy.types.__getitem__)
+    rng.shuffle(unseen)
+    in_hand = len(enemy.hand)
+    enemy.hand = unseen[:in_hand]
+    enemy.deck = unseen[in_hand:]
+
+
+def search(root, white, rollouts, time_limit, seed, horizon, exploration):
+    """
+    Tree search from a fast game, mid-way through our turn.
+    Returns the root's {action: [visits, total value]}
+    (module level, so worker processes can pickle it)
+    """
+    rng = random.Random(seed)
+    table = {}
+    deadline = None if time_limit is None else time.perf_counter() + time_limit
+
+    root_side = root.white if white else root.black
+    root_key = state_key(root, root_side)
+
+    done = 0
+    while done < rollouts:
+        if deadline is not None and time.perf_counter() > deadline:
+            break
+        game = root.fork(GameRng(rng.getrandbits(32)))
+        side = game.white if white else game.black
+        deal_hidden(side, rng)
+
+        # Down the tree (growing it by one node)
+        path = []
+        while side.my_turn and side.turn_cards < game.budget.cards_per_turn:
+            key = state_key(game, side)
+            node = table.get(key)
+            expanded = node is None
+            if expanded:
+                node = Node(legal_actions(side))
+                table[key] = node
+            action = node.select(exploration)
+            path.append((node, action))
+            if action == STOP:
+                side.my_turn = False
+                break
+            card = next(c for c in side.hand if side.types[c] == action)
+            game.play_card(side, card)
+            if expanded:
+                break
+
+        value = rollout(game, white, horizon)
+        for node, action in path:
+            node.visits += 1
+            stats = node.actions[action]
+            stats[0] += 1
+            stats[1] += value
+        done += 1
+
+    return table[root_key].actions if root_key in table else {}
+
+
+def merge_actions(results):
+    merged = {}
+    for actions in results:
+        for action, (visits, value) in actions.items():
+            stats = merged.setdefault(action, [0, 0.0])
+            stats[0] += visits
+            stats[1] += value
+    return merged
+
+
+class MctsPlayer(Player):
+    """
+    Chooses cards by tree search, with a budget of rollouts
+    (and/or seconds) per decision.
+    With workers > 1, each decision is searched in that many processes
+    at once, and their results are added up. The processes are a pool
+    the caller owns (and closes), shared between games, or if not given
+    one, the player's own, closed when the game ends.
+    Can't use workers inside the Statistician's own worker processes
+    """
+
+    def __init__(self, game_state, pilot_type, mech_type, upgrade_types=[],
+                 rollouts=100, time_limit=None, workers=1, horizon=10,
+                 exploration=1.4, pool=None):
+        super().__init__(game_state, pilot_type, mech_type, upgrade_types)
+        self.rollouts = rollouts
+        self.time_limit = time_limit
+        self.workers = workers
+        self.horizon = horizon
+        self.exploration = exploration
+        self.pool = pool
+        self.own_pool = False
+        # Where rollout seeds come from, so (without a time limit)
+        # the same game seed plays the same game. Seeded like the dice
+        # (see GameRng.roll), so the game's own draws are the same as with
+        # any other player
+        self.search_rng = random.Random(f"{game_state.rng.game_seed}-mcts")
+
+        # For stats
+        self.decisions = 0
+        self.total_rollouts = 0
+
+    def choose_card(self):
+        if len(self.hand) < 1:
+            return super().choose_card()
+
+        white = self is self.game_state.white
+        root = FastGame.from_game_state(
+            self.game_state, GameRng(self.search_rng.getrandbits(32)))
+        root.budget = self.game_state.budget.for_search()
+        actions = self.search(root, white)
+        self.decisions += 1
+        self.total_rollouts += sum(v for v, _ in actions.values())
+
+        if not actions:
+            return super().choose_card()
+        # Most visited, a.k.a most promising
+        best = max(actions, key=lambda a: actions[a][0])
+        if best == STOP:
+            return None
+        return next(c for c in self.hand if c.type_id == best)
+
+    def search(self, root, white):
+        args = (self.horizon, self.exploration)
+        if self.workers <= 1:
+            return search(
+                root, white, self.rollouts, self.time_limit,
+                self.search_rng.getrandbits(32), *args
+            )
+
+        if self.pool is None:
+            self.pool = multiprocessing.Pool(self.workers)
+            self.own_pool = True
+        per_worker = math.ceil(self.rollouts / self.workers)
+        jobs = [
+            (root, white, per_worker, self.time_limit,
+             self.search_rng.getrandbits(32), *args)
+            for i in range(self.workers)
+        ]
+        return merge_actions(self.pool.starmap(search, jobs))
+
+    def close(self):
+        if self.own_pool:
+            self.pool.close()
+            self.pool.join()
+            self.own_pool = False
+        self.pool = None
+
+    def fork(self, game_state):
+        # (A fork searches in our pool, but doesn't get to close it)
+        player = super().fork(game_state)
+        player.own_pool = False
+        return player
+
+
+if __name__ == "__main__":
+    # How does tree search do against the plain heuristic?
+    from functools import partial
+    from src.game_state import GameState
+    from src.player import Choices
+    from src.game_record import GameRecord, OUTCOME_NAMES
+
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    rollouts = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    results = {name: 0 for name in ["MCTS", "Heuristic", "Tie", "None"]}
+    start = time.perf_counter()
+    for seed in range(number):
+        rng = GameRng(seed)
+        choices = Choices(rng=rng)
+        # Same loadout, but the tree search plays one side
+        mcts_choices = Choices(
+            choices.pilot_type, choices.mech_type, choices.upgrade_types,
+            player_type=partial(MctsPlayer, rollouts=rollouts)
+        )
+        mcts_white = seed % 2 == 0
+        if mcts_white:
+            game_state = GameState(mcts_choices, choices, rng)
+        else:
+            game_state = GameState(choices, mcts_choices, rng)
+        game_state.play()
+
+        outcome = OUTCOME_NAMES[GameRecord(game_state).outcome]
+        if outcome in ["White", "Black"]:
+            won = (outcome == "White") == mcts_white
+            outcome = "MCTS" if won else "Heuristic"
+        results[outcome] += 1
+        print(f"{seed}: {outcome} ({game_state.turns} turns)")
+
+    print(results, f"in {time.perf_counter() - start:.1f}s")
@@ -1,7 +1,6 @@
-import random
-
 import src.card as cards
 from src.utils import NamedClass
+from src import trace
 
 import logging
 logger = logging.getLogger("HotMech")
@@ -20,11 +19,13 @@ class Mech(NamedClass):
 
     # Min of 1, max of 6
     # as it is counted with a d6
-    heat = 1
+    starting_heat = 1
 
     def __init__(self, game_state, player):
+        self.game_state = game_state
         self.player = player
         self.hp = self.max_hp
+        self.heat = self.starting_heat
         self.cards = [
             card(game_state, player)
             for card in self.card_types
@@ -33,16 +34,50 @@ class Mech(NamedClass):
         # For stats
         self.total_melt_dmg = 0
 
+    # Heat and hp change what cards can/should be played,
+    # so let the game know whenever they do
+    @property
+    def heat(self):
+        return self._heat
+
+    @heat.setter
+    def heat(self, value):
+        self._heat = value
+        self.game_state.board_changed()
+
+    @property
+    def hp(self):
+        return self._hp
+
+    @hp.setter
+    def hp(self, value):
+        self._hp = value
+        self.game_state.board_changed()
+
+    def fork(self, game_state, player):
+        """
+        This mech, in a forked game (see GameState.fork)
+        """
+        mech = object.__new__(type(self))
+        mech.__dict__.update(self.__dict__)
+        mech.game_state = game_state
+        mech.player = player
+        return mech
+
     def check_heat(self):
         """
         Check if mech 'overheats'
         """
         if self.heat > 6:
             self.heat = 6
-            melt_dmg = random.randint(1, 6)
+            melt_dmg = self.game_state.rng.roll("melt") + 1
             self.heat -= melt_dmg
             self.hp -= melt_dmg
-            logger.info(f"{self.name} overheated for {melt_dmg}")
+            if trace.on:
+                trace.emit(
+                    "overheat", side=trace.side(self.player), mech=self.name,
+                    melt=melt_dmg
+                )
             self.total_melt_dmg += melt_dmg
             self.player.end_turn()
         if self.heat < 1:
@@ -0,0 +1,147 @@
+from time import perf_counter_ns
+
+from src.player import Player
+from src.game_state import GameState
+from src.mech import Mech
+from src.card import Card
+from src.card_steps import Step
+from src.fast_game import FastGame, OP_NAMES
+
+"""
+Opt-in timing of where a campaign's time goes: total wall time and number
+of calls for each phase of a game (drawing, choosing a card, playing each
+step type, damage, heat checks), for both engines.
+
+The timing is done by wrapping the phase's methods while a PhaseTimer is
+running, and putting the originals back after - so when it's off, nothing
+is wrapped, and it costs nothing at all.
+
+Phases include the phases they call (e.g. 'card' includes it's steps,
+'step Attack' includes 'damage'), so they don't add up to the total.
+
+Games played in worker processes are timed there, and each worker's
+timer added up (see PhaseTimer.add), so 'All' is then the workers'
+total time, not the wall time of the campaign.
+"""
+
+# Run using:
+# python -m src.phase_timer [number of games]
+
+# (phase, class, method name), for everything both engines do
+PHASES = [
+    ("draw", Player, "draw_hand"),
+    ("draw", FastGame, "draw_hand"),
+    ("decision", Player, "choose_card"),
+    ("decision", FastGame, "choose_card"),
+    ("card", Card, "play"),
+    ("card", FastGame, "play_card"),
+    ("damage", GameState, "damage_enemy"),
+    ("damage", FastGame, "damage_enemy"),
+    ("heat", Mech, "check_heat"),
+    ("heat", FastGame, "check_heat"),
+]
+
+
+class PhaseTimer:
+    """
+    Phase name -> [calls, total ns], while running (use as a 'with' block,
+    or start() / stop())
+    """
+
+    def __init__(self):
+        self.totals = {}
+        self.elapsed = 0
+        self.started = None
+        # (owner, attribute, original), to put back on stop
+        self.patched = []
+
+    def timed(self, phase, func):
+        total = self.totals.setdefault(phase, [0, 0])
+
+        def timed_func(*args, **kwargs):
+            start = perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                total[0] += 1
+                total[1] += perf_counter_ns() - start
+        return timed_func
+
+    def patch(self, owner, name, phase):
+        original = owner.__dict__[name]
+        self.patched.append((owner, name, original))
+        setattr(owner, name, self.timed(phase, original))
+
+    def start(self):
+        if self.started is not None:
+            return
+        for phase, owner, name in PHASES:
+            self.patch(owner, name, phase)
+        for step_type in Step.types_by_id:
+            if "play" in step_type.__dict__:
+                self.patch(step_type, "play", f"step {step_type.__name__}")
+        # The fast engine looks up it's steps in a table, by opcode
+        self.patched.append((FastGame, "step_plays", FastGame.step_plays))
+        FastGame.step_plays = tuple(
+            self.timed(f"step {OP_NAMES[op]}", func)
+            for op, func in enumerate(FastGame.step_plays)
+        )
+        self.started = perf_counter_ns()
+
+    def stop(self):
+        if self.started is None:
+            return
+        self.elapsed += perf_counter_ns() - self.started
+        self.started = None
+        for owner, name, original in reversed(self.patched):
+            setattr(owner, name, original)
+        self.patched = []
+
+    def add(self, other):
+        """
+        Add another timer's times to ours (e.g. a worker's)
+        """
+        for phase, (calls, ns) in other.totals.items():
+            total = self.totals.setdefault(phase, [0, 0])
+            total[0] += calls
+            total[1] += ns
+        self.elapsed += other.elapsed
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def summary(self):
+        """
+        A table of the phases, slowest first
+        """
+        lines = [
+            f"{'Phase':<22}{'Calls':>12}{'Total':>10}{'Per call':>11}"
+            f"{'Of all':>8}"
+        ]
+        for phase, (calls, ns) in sorted(
+                self.totals.items(), key=lambda kv: -kv[1][1]):
+            if calls == 0:
+                continue
+            share = ns / self.elapsed if self.elapsed else 0
+            lines.append(
+                f"{phase:<22}{calls:>12,}{ns / 1e9:>9.2f}s"
+                f"{ns / calls / 1000:>9.2f}us{share:>8.0%}"
+            )
+        lines.append(f"{'All':<22}{'':>12}{self.elapsed / 1e9:>9.2f}s")
+        return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import sys
+    from src.statistician import Statistician
+
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    for fast in [False, True]:
+        s = Statistician(seed=0, fast=fast, timing=True)
+        s.run_simulations(number)
+        print(f"\n{'Fast engine' if fast else 'GameState'}, {number} games:")
+        print(s.timer.summary())
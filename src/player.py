@@ -1,16 +1,42 @@
 import math
 import random
 import itertools
+from functools import lru_cache
+from operator import methodcaller, attrgetter
 
 from src.mech import Mech, Skeleton
 from src.pilot import Pilot
-from src.upgrade import Upgrade, Tassles
+from src.upgrade import Upgrade
 from src.utils import get_range
-from src.card_steps import Attack
+from src.zone import Zone
+from src import trace
 
 import logging
 logger = logging.getLogger("HotMech")
 
+# Sort key for cards (see Card.priority)
+card_priority = methodcaller("priority")
+
+def zone_property(name):
+    """
+    One of a player's zones (see zone.py). Setting it to some cards
+    (e.g. in tests) makes them the zone's cards, it stays the same Zone
+    """
+    attribute = f"_{name}"
+
+    def set_cards(self, cards):
+        getattr(self, attribute).replace(cards)
+        # (Anything cached about the board is out of date)
+        self.game_state.board_changed()
+    return property(attrgetter(attribute), set_cards)
+
+@lru_cache(maxsize=None)
+def facing_cos(tolerance):
+    """
+    Cosine of a facing tolerance (in degrees)
+    """
+    return math.cos(math.radians(tolerance))
+
 class Player:
     """
     Represents the individual human player for each game,
@@ -19,6 +45,11 @@ class Player:
 
     starting_hand = 5
 
+    deck = zone_property("deck")
+    hand = zone_property("hand")
+    discarded = zone_property("discarded")
+    retired = zone_property("retired")
+
     def __init__(self, game_state,
                  pilot_type, mech_type, upgrade_types=[]):
         self.game_state = game_state
@@ -32,16 +63,36 @@ class Player:
                 f"{self.upgrades} {self.mech} {self.mech.hard_points}"
             )
             self.upgrades = self.upgrades[0:self.mech.hard_points]
-        self.deck = list(itertools.chain(
+        deck = list(itertools.chain(
             self.pilot.cards, self.mech.cards,
             *[u.cards for u in self.upgrades]
         ))
-        random.shuffle(self.deck)
+        game_state.rng.shuffle(deck)
+        self._deck = Zone("deck", deck)
         self.starting_deck_size = len(self.deck)
 
-        self.discarded = []
-        self.hand = []
-        self.retired = []
+        self._discarded = Zone("discarded")
+        self._hand = Zone("hand")
+        self._retired = Zone("retired")
+        # Our best / worst card in hand, and the board version each was
+        # picked for - every change to the hand changes the board
+        # (see best_in_hand, worst_in_hand)
+        self.best_version = None
+        self.best_card = None
+        self.worst_version = None
+        self.worst_card = None
+
+        # Bumped whenever we move / turn, so geometry relative to the
+        # enemy can be cached until either of us does
+        self.location_version = 0
+        self.rotation_version = 0
+        # (dx, dy, distance, angle) to the enemy, and the
+        # (our, their) location versions it was worked out for
+        self.relative = None
+        self.relative_versions = None
+        # Unit vector for each 'add_angle' we've checked facing with,
+        # for our current rotation
+        self.headings = {}
 
         self.rotation = 0
         self.location = (0, 0)
@@ -56,12 +107,36 @@ class Player:
         # TODO could do by turn or whatever, but eh
         self.played_cards = []
 
+    # Where we are / which way we face change what cards can be played,
+    # so let the game know whenever they do
+    @property
+    def location(self):
+        return self._location
+
+    @location.setter
+    def location(self, value):
+        self._location = value
+        self.location_version += 1
+        self.game_state.board_changed()
+
+    @property
+    def rotation(self):
+        return self._rotation
+
+    @rotation.setter
+    def rotation(self, value):
+        # Normalize angles to 0-360
+        self._rotation = value % 360
+        self.rotation_version += 1
+        self.headings = {}
+        self.game_state.board_changed()
+
     def draw_card(self):
         # If we are out of cards, shuffle back in discard
-        if (self.deck == []):
+        if not self.deck:
 
             # If discard is empty, all cards are retired / in hand?
-            if (self.discarded == []):
+            if not self.discarded:
                 # logger.warning(
                 #     f"{self} draw and discard empty. "
                 #     f"Hand: {[c.name for c in self.hand]}. "
@@ -69,11 +144,13 @@ class Player:
                 # )
                 return
 
-            self.deck = random.sample(self.discarded, len(self.discarded))
-            self.discarded = []
+            # (Which takes them all out of the discard pile)
+            self.deck = self.game_state.rng.sample(
+                list(self.discarded), len(self.discarded))
 
         new_card = self.deck.pop()
         self.hand.append(new_card)
+        self.game_state.board_changed()
 
         if len(self.hand) > self.largest_hand:
             self.largest_hand = len(self.hand)
@@ -99,31 +176,43 @@ class Player:
         self.my_turn = True
 
         self.turn_cards = 0
-        while self.my_turn and self.turn_cards < 100:
+        budget = self.game_state.budget
+        while self.my_turn and self.turn_cards < budget.cards_per_turn:
             card = self.choose_card()
 
             # If we can't play anything
             if card is None:
-                logger.info(f"{self} can't choose card {self.hand}")
+                if trace.on:
+                    trace.emit(
+                        "no_card", side=trace.side(self),
+                        hand=trace.card_names(self.hand)
+                    )
                 break
 
             self.play_card(card)
 
             # Mostly for testing
             if card_limit and self.turn_cards >= card_limit:
-                logger.info(f"{self} reached card limit of {card_limit}")
+                if trace.on:
+                    trace.emit(
+                        "card_limit", side=trace.side(self), limit=card_limit)
                 break
 
-        if self.turn_cards >= 100:
-            logger.warning(f"Long turn: {self.turn_cards}")
-            quit()
+        if self.turn_cards >= budget.cards_per_turn:
+            if trace.on:
+                trace.emit(
+                    "long_turn", side=trace.side(self), cards=self.turn_cards)
+            budget.long_turn(self.turn_cards)
 
     def play_card(self, card):
-        logger.info(
-            f"{self} playing {card.name} ({card.should()}/{card.can()})")
+        if trace.on:
+            trace.emit(
+                "card_played", side=trace.side(self), card=card.name,
+                should=card.should(), can=card.can()
+            )
 
-        self.hand.remove(card)
         self.discarded.append(card)
+        self.game_state.board_changed()
         card.play()
 
         self.get_enemy().mech.check_heat()
@@ -146,24 +235,33 @@ class Player:
         3. As a tiebreaker, which card has the lower 'card.heat' cost
         """
 
-        def dmg(card):
-            # Prioritize cards that deal damage
-            # (negative = sorted earlier = better)
-            for s in card.steps:
-                if isinstance(s, Attack):
-                    return -s.damage
-            return 0
-
-        s_hand = sorted(
-            cards,
-            key=lambda card: (
-                not card.should(), -card.how_many_can(), card.heat, dmg(card)
-            )
-        )
+        # (Also, cards that deal damage - see Card.priority)
+        s_hand = sorted(cards, key=card_priority)
         if reverse:
             s_hand.reverse()
         return s_hand
 
+    def best_in_hand(self):
+        """
+        First card of the sorted hand, without sorting it
+        (only picked again once the board changes)
+        """
+        version = self.game_state.board_version
+        if self.best_version != version:
+            self.best_card = min(self.hand, key=card_priority)
+            self.best_version = version
+        return self.best_card
+
+    def worst_in_hand(self):
+        """
+        First card of the reverse sorted hand (a.k.a the last of the worst)
+        """
+        version = self.game_state.board_version
+        if self.worst_version != version:
+            self.worst_card = max(reversed(self.hand), key=card_priority)
+            self.worst_version = version
+        return self.worst_card
+
     def choose_card(self):
         """
         Choose a random card to play, but ideally:
@@ -176,13 +274,16 @@ class Player:
             self.empty_hands += 1
             return None
 
-        card = self.sorted_hand()[0]
+        card = self.best_in_hand()
 
         # If we are going to overheat, make it a 50/50
         # TOOD could see if it was a 'worthwhile' card by some metric...
         # (one in 'x' chance to play overheating card)
         one_in = 5
-        if not card.should() and random.randint(0, one_in) < one_in:
+        if (
+            not card.should()
+            and self.game_state.rng.roll("gamble", one_in + 1) < one_in
+        ):
             return None
 
         # Don't overheat if it might kill you
@@ -191,14 +292,30 @@ class Player:
 
         return card
 
+    def relative_to_enemy(self):
+        """
+        Where the enemy is relative to us: [dx, dy, distance, angle]
+        Only worked out again once either of us has moved
+        (angle is filled in the first time it is asked for)
+        """
+        enemy = self.get_enemy()
+        versions = (self.location_version, enemy.location_version)
+        if self.relative_versions != versions:
+            dx = enemy._location[0] - self._location[0]
+            dy = enemy._location[1] - self._location[1]
+            self.relative = [dx, dy, math.sqrt(dx**2 + dy**2), None]
+            self.relative_versions = versions
+        return self.relative
+
     def angle_to_enemy(self):
         """
         Calculate the direction of the enemy relative to the player's location
         """
-        enemy = self.get_enemy()
-        dx = enemy.location[0] - self.location[0]
-        dy = enemy.location[1] - self.location[1]
-        return math.degrees(math.atan2(dy, dx)) % 360
+        relative = self.relative_to_enemy()
+        if relative[3] is None:
+            dx, dy = relative[0], relative[1]
+            relative[3] = math.degrees(math.atan2(dy, dx)) % 360
+        return relative[3]
 
     def facing_toward_enemy(self):
         """
@@ -213,37 +330,37 @@ class Player:
         """
         return self.check_facing(180)
 
+    def heading(self, add_angle=0):
+        """
+        Unit vector we are pointing along (turned by add_angle)
+        """
+        heading = self.headings.get(add_angle)
+        if heading is None:
+            radians = math.radians(self._rotation + add_angle)
+            heading = (math.cos(radians), math.sin(radians))
+            self.headings[add_angle] = heading
+        return heading
+
     def check_facing(self, add_angle=0, tolerance=45):
         """
         Check our facing relative to the enemy
         (+/- tolerance degrees)
         """
-        # Normalize angles to 0-360
-        self.rotation = self.rotation % 360
-
         # Can use 'add_angle' to see if we are facing away, looking left, etc
-        check_rotation = self.rotation + add_angle
-
-        angle_to_enemy = self.angle_to_enemy()
-
-        # Determine if the player is facing the enemy,
-        # considering a margin for 'facing towards'
-        lower_bound = (check_rotation - tolerance) % 360
-        upper_bound = (check_rotation + tolerance) % 360
-
-        # Check if the enemy is within the 'facing towards' margin
-        if lower_bound < upper_bound:
-            return lower_bound <= angle_to_enemy <= upper_bound
-        else:  # The margin crosses the 0 degree line
-            return (
-                angle_to_enemy >= lower_bound or angle_to_enemy <= upper_bound
-            )
+        hx, hy = self.heading(add_angle)
+        dx, dy, distance, _ = self.relative_to_enemy()
+        if distance == 0:
+            # On top of each other, count the enemy as at 0 degrees
+            dx, dy, distance = 1, 0, 1
+
+        # The enemy is within the margin if the angle between our heading
+        # and the direction to them is <= tolerance, a.k.a:
+        # cos(angle) = (heading . direction) / distance >= cos(tolerance)
+        # (with a little slack, so being exactly on the edge still counts)
+        return hx * dx + hy * dy >= distance * (facing_cos(tolerance) - 1e-9)
 
     def distance_to_enemy(self):
-        enemy = self.get_enemy()
-        dx = enemy.location[0] - self.location[0]
-        dy = enemy.location[1] - self.location[1]
-        return math.sqrt(dx**2 + dy**2)
+        return self.relative_to_enemy()[2]
 
     def in_range(self, range_a=6, range_b=0):
         """
@@ -325,7 +442,7 @@ class Player:
         self.rotate(rotation_amount)
 
     def rotate(self, rot):
-        self.rotation = (self.rotation + rot) % 360
+        self.rotation = self.rotation + rot
 
     def get_enemy(self):
         return self.game_state.enemy_of(self)
@@ -337,24 +454,33 @@ class Player:
         for i in range(number_of_cards):
             if len(self.hand) < 1:
                 return
-            card = self.sorted_hand(reverse=True)[0]
-            self.hand.remove(card)
+            card = self.choose_discard()
             self.discarded.append(card)
+            self.game_state.board_changed()
+
+    def choose_discard(self):
+        """
+        Our least useful card in hand
+        """
+        return self.worst_in_hand()
+
+    def choose_unretire(self):
+        """
+        Which retired card to get back
+        """
+        return min(self.retired, key=card_priority)
 
     def retire(self, card):
-        if card in self.hand:
-            self.hand.remove(card)
-        if card in self.discarded:
-            self.discarded.remove(card)
-        # If it was shuffled in after a discard
-        if card in self.deck:
-            self.deck.remove(card)
+        # (From the hand, discard pile, or deck if it was shuffled in
+        # after a discard)
         self.retired.append(card)
-        logger.info(
-            f"{self} retired {card.name} "
-            f"(deck: {len(self.deck + self.discarded)} "
-            f"retired: {len(self.retired)})"
-        )
+        self.game_state.board_changed()
+        if trace.on:
+            trace.emit(
+                "retired", side=trace.side(self), card=card.name,
+                deck=len(self.deck) + len(self.discarded),
+                retired=len(self.retired)
+            )
 
     def healthy_enough(self, damage):
         """
@@ -368,39 +494,83 @@ class Player:
         When taking damedge, we have the ability to block some/all of it
         by retiring a card
         """
-        if self.hand == [] or self.healthy_enough(damage):
+        if not self.hand or self.healthy_enough(damage):
             return None
-        sorted_hand = self.sorted_cards(self.hand, reverse=True)
 
         # Ignore cards that can't block
-        sorted_hand = [s for s in sorted_hand if s.should_block()]
-        if sorted_hand == []:
+        blockers = [c for c in reversed(self.hand) if c.traits.should_block]
+        if blockers == []:
             return None
 
-        # Also sort by:
+        # Pick by:
         # 1. Ideally, block exactly what we need
         # 2. Otherwise, more is okay,
         # 3. Otherwise, less is fine
-        sorted_hand = sorted(
-            sorted_hand,
-            key=lambda card: (
-                -card.heat == damage, -card.heat > damage, card.heat < damage
-            )
-        )
-        return sorted_hand[0]
+        # and then as the reverse sorted hand would
+        # (the same card as sorting both ways would, without the sorts)
+        def fit(card):
+            return (
+                -card.heat == damage, -card.heat > damage, card.heat < damage)
+        best_fit = min(fit(c) for c in blockers)
+        return max(
+            (c for c in blockers if fit(c) == best_fit), key=card_priority)
 
     def all_cards(self):
-        return self.deck + self.hand + self.discarded + self.retired
+        return list(itertools.chain(
+            self.deck, self.hand, self.discarded, self.retired))
+
+    def fork(self, game_state):
+        """
+        This player, in a forked game (see GameState.fork)
+        """
+        player = object.__new__(type(self))
+        player.__dict__.update(self.__dict__)
+        player.game_state = game_state
+        player.mech = self.mech.fork(game_state, player)
+        # (Pilot / upgrades just hold what was chosen, so can be shared)
+
+        # Every card is in exactly one zone, so copy them zone by zone
+        for name in ["deck", "hand", "discarded", "retired"]:
+            setattr(player, f"_{name}", Zone(name, [
+                c.fork(game_state, player) for c in getattr(self, name)]))
+
+        # (The picks are this game's cards, not the fork's)
+        player.best_version = player.worst_version = None
+        player.best_card = player.worst_card = None
+
+        player.played_cards = list(self.played_cards)
+        player.relative = list(self.relative) if self.relative else None
+        player.headings = dict(self.headings)
+        return player
+
+    def close(self):
+        """
+        Let go of anything held for the game (e.g. an AI's worker processes),
+        once it's over
+        """
+        pass
 
     def create_card(self, card_type):
         # Create a new instance, and add to deck
         self.deck.append(card_type(self.game_state, self))
         self.starting_deck_size = len(self.deck)
+        self.game_state.board_changed()
 
     def check_cards(self):
         # Lets make sure no cards were 'lost'
+        cards = (
+            len(self.deck) + len(self.hand) + len(self.discarded)
+            + len(self.retired)
+        )
+        if cards == self.starting_deck_size:
+            return
+        if trace.on:
+            trace.emit(
+                "lost_cards", side=trace.side(self),
+                cards=cards, expected=self.starting_deck_size
+            )
         msg = (
-            f"{len(self.all_cards())} != {self.starting_deck_size}"
+            f"{cards} != {self.starting_deck_size}"
             f"\n Retired ({len(self.retired)}): "
             f"{[c.name for c in self.retired]}"
             f"\n Hand ({len(self.hand)}): "
@@ -410,7 +580,7 @@ class Player:
             f"\n Deck ({len(self.deck)}): "
             f"{[c.name for c in self.deck]}"
         )
-        assert len(self.all_cards()) == self.starting_deck_size, msg
+        assert cards == self.starting_deck_size, msg
 
     def __str__(self):
         return (
@@ -428,9 +598,10 @@ class Choices:
     their pilot type, mech type, etc
     """
 
-    def __init__(self, ct=None, mt=None, ut=[]):
+    def __init__(self, ct=None, mt=None, ut=[], rng=random,
+                 player_type=None):
         all_pilots = list(Pilot.all_types.values())
-        self.pilot_type = ct or random.choice(all_pilots)
+        self.pilot_type = ct or rng.choice(all_pilots)
 
         # Do we simulate skeleton? So just pilot / upgrades?
         all_mechs = list(Mech.all_types.values())
@@ -438,9 +609,9 @@ class Choices:
 
         all_upgrades = list(Upgrade.all_types.values())
 
-        self.mech_type = mt or random.choice(all_mechs)
+        self.mech_type = mt or rng.choice(all_mechs)
         self.upgrade_types = ut or [
-            random.choice(all_upgrades)
+            rng.choice(all_upgrades)
             for i in range(self.mech_type.hard_points)
         ]
         if not isinstance(self.upgrade_types, list):
@@ -452,8 +623,13 @@ class Choices:
         for upgrade_type in self.upgrade_types:
             assert issubclass(upgrade_type, Upgrade), f"{upgrade_type}"
 
-    def create_player(self, game_state):
-        return Player(
+        # Optionally, which AI plays this side
+        # (over the game's player_type, see GameState)
+        self.player_type = player_type
+
+    def create_player(self, game_state, player_type=None):
+        player_type = self.player_type or player_type or Player
+        return player_type(
             game_state,
             self.pilot_type, self.mech_type, self.upgrade_types
         )
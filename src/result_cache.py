@@ -0,0 +1,169 @@
+import os
+import pickle
+import hashlib
+from functools import partial
+
+from src.card import Card
+from src.card_steps import Step
+from src.mech import Mech
+from src.pilot import Pilot
+from src.upgrade import Upgrade
+
+"""
+On-disk cache of simulation results, so re-running the stats after
+tweaking one card only re-plays the games that card could change.
+
+Results are keyed by a hash of everything that goes into them: the card
+types' heat and steps (with their params), each pilot / mech / upgrade's
+card_types (and stats, like a mech's hp), the engine version and the
+seeds. Change any of those and the key changes, so there's nothing to
+invalidate by hand - old entries just stop being asked for.
+"""
+
+# Bump whenever the rules or the AI change in a way the card / entity
+# definitions don't show (card_steps.py's play/can, game_state.py,
+# player.py, fast_game.py), so old results aren't used
+ENGINE_VERSION = 1
+
+# Class attributes of pilots / mechs / upgrades (besides card_types)
+# that change how a game goes
+ENTITY_FIELDS = ["max_hp", "hard_points", "starting_heat"]
+
+
+def step_fingerprint(step):
+    """
+    A step's type and params (e.g. ('Attack', [('damage', 4), ...])),
+    including any step it wraps (e.g. RangeCheck)
+    """
+    params = []
+    for name, value in sorted(vars(step).items()):
+        if isinstance(value, Step):
+            value = step_fingerprint(value)
+        params.append((name, value))
+    return (type(step).__name__, params)
+
+
+def card_fingerprint(card_type):
+    return (
+        card_type.__name__, card_type.heat,
+        [step_fingerprint(s) for s in card_type.steps]
+    )
+
+
+def entity_fingerprint(entity_type, cards=True):
+    """
+    A pilot / mech / upgrade: it's cards (in order, as that changes the
+    shuffles) and stats.
+    Without 'cards', just the names of it's cards, not what's on them
+    """
+    return (
+        entity_type.__name__,
+        [
+            card_fingerprint(ct) if cards else ct.__name__
+            for ct in entity_type.card_types
+        ],
+        [
+            (name, getattr(entity_type, name))
+            for name in ENTITY_FIELDS if hasattr(entity_type, name)
+        ],
+    )
+
+
+def everything_fingerprint():
+    """
+    Every card and entity there is
+    (for games that could use any of them, like random campaigns)
+    """
+    return (
+        [card_fingerprint(ct) for ct in Card.types_by_id],
+        [
+            [entity_fingerprint(t) for t in family.types_by_id]
+            for family in [Pilot, Mech, Upgrade]
+        ],
+    )
+
+
+def short_hash(fingerprint):
+    return hashlib.sha256(repr(fingerprint).encode()).hexdigest()[:16]
+
+
+def fingerprint_hashes():
+    """
+    Family name -> type name -> hash of it's fingerprint, for every card
+    and entity (entities without their card's contents, so a changed card
+    only shows up as the card), plus the engine version.
+    Comparing two of these says what changed in between
+    """
+    hashes = {"engine": ENGINE_VERSION}
+    hashes["Card"] = {
+        ct.__name__: short_hash(card_fingerprint(ct))
+        for ct in Card.types_by_id
+    }
+    for family in [Pilot, Mech, Upgrade]:
+        hashes[family.__name__] = {
+            t.__name__: short_hash(entity_fingerprint(t, cards=False))
+            for t in family.types_by_id
+        }
+    return hashes
+
+
+def describe(func):
+    """
+    A stable description of a simulate function (and it's partial args),
+    without the memory addresses repr() would give
+    """
+    if isinstance(func, partial):
+        return (
+            describe(func.func),
+            [describe(a) for a in func.args],
+            sorted((k, describe(v)) for k, v in func.keywords.items()),
+        )
+    if callable(func):
+        return f"{func.__module__}.{func.__qualname__}"
+    return repr(func)
+
+
+def content_key(*parts):
+    """
+    Hash of the engine version and the given parts (anything with a
+    stable repr: tuples, lists, numbers, strings)
+    """
+    text = repr((ENGINE_VERSION,) + parts)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    A directory of pickled results, one file per key
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+
+    def file_for(self, key):
+        # Split over sub-directories, so no directory gets huge
+        return os.path.join(self.path, key[:2], f"{key}.pkl")
+
+    def get(self, key, default=None):
+        try:
+            with open(self.file_for(key), "rb") as f:
+                value = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            self.misses += 1
+            return default
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        path = self.file_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename, so an interrupted run never leaves half a file
+        temp = f"{path}.{os.getpid()}.tmp"
+        with open(temp, "wb") as f:
+            pickle.dump(value, f)
+        os.replace(temp, path)
+
+    def __contains__(self, key):
+        return os.path.exists(self.file_for(key))
@@ -1,15 +1,38 @@
+import os
 import random
 import logging
-from statistics import median, mode
+import datetime
+import itertools
+import multiprocessing
+from functools import partial
+from contextlib import nullcontext
 
 from src.game_state import GameState
-from src.player import Player, Choices
+from src.fast_game import FastGame
+from src.batch_game import BatchGames
+from src.sweep import sweep
+from src.player import Choices
 from src.mech import Mech, Skeleton
 from src.pilot import Pilot, NamelessDegenerate
 from src.upgrade import Upgrade, Tassles
-import src.mech as mechs
 from src.card import Card
 from src.card_steps import Step
+from src.game_record import GameRecord, NO_WINNER
+from src.game_log import record_game
+from src.game_rng import GameRng
+from src.tally import Tally, wilson_interval
+from src.result_cache import (
+    ResultCache, content_key, describe, everything_fingerprint,
+    fingerprint_hashes, short_hash,
+)
+from src.game_store import GameStore, StoredGames
+from src.phase_timer import PhaseTimer
+from src import trace
+from src.flight_recorder import FlightRecorder, start_recording
+from src.budget import (
+    Quarantine, Skipped, BudgetExceeded, guarded, skip
+)
+from src.worker_pool import pool_map, joined
 
 logging.basicConfig(level=logging.WARNING)
 logger = logging.getLogger("HotMech")
@@ -18,147 +41,601 @@ logger = logging.getLogger("HotMech")
 # seba
 # python -m src.statistician
 
-class Statistician:
+# When playing to a precision, how many games to play between checks
+CHECK_EVERY = 200
+
+# Fast games are played in lockstep batches (see batch_game.py) of up to
+# BATCH_SIZE games, if there are at least MIN_BATCH for each worker
+# (a small batch is slower than playing it's games one at a time)
+BATCH_SIZE = 10000
+MIN_BATCH = 2000
+
+def game_seed(campaign_seed, index):
     """
-    Collect statistics for showing at the end of the game
+    The seed for the index'th game of a campaign.
+    Derived only from the campaign seed and the index, so a game plays out
+    the same no matter which worker (or how many workers) ran it
     """
+    return random.Random(f"{campaign_seed}-{index}").getrandbits(32)
 
-    # Every game state played
-    games = []
+def simulate_game(seed, w_mech=None, b_mech=None, log_dir=None,
+                  player_type=None, budget=None):
+    """
+    Play a single randomized 'real' game from it's seed
+    (module level, so worker processes can pickle it).
+    If given a log_dir, games that hit the turn limit are saved there
+    as replayable logs (see game_log.py, only for the default Player).
+    player_type swaps in a different AI for both sides
+    (e.g. partial(MctsPlayer, rollouts=50), see mcts_player.py).
+    budget limits how much work the game can take (see budget.py)
+    """
+    if log_dir is not None and player_type is None:
+        game_state, log = record_game(seed, w_mech, b_mech, budget)
+        record = GameRecord(game_state)
+        if record.outcome == NO_WINNER:
+            os.makedirs(log_dir, exist_ok=True)
+            log.save(os.path.join(log_dir, f"{seed}.hmlog"))
+        return record
+
+    rng = GameRng(seed)
+
+    # For now, let's randomly select entities for simulation
+    white_choices = Choices(None, w_mech, rng=rng)
+    black_choices = Choices(None, b_mech, rng=rng)
+    game_state = GameState(
+        white_choices, black_choices, rng, player_type=player_type,
+        budget=budget
+    )
+    if trace.on:
+        trace.emit(
+            "game_start", seed=seed,
+            white=str(game_state.white), black=str(game_state.black)
+        )
+    game_state.play()
+    if trace.on:
+        trace.emit(
+            "game_end", turns=game_state.turns,
+            winner=str(game_state.winner),
+            white=str(game_state.white), black=str(game_state.black)
+        )
+    # Only keep the summary, the players/cards/etc can be dropped right away
+    return GameRecord(game_state)
 
-    # Dict of the interesting staticstics
-    stats = {}
+def random_card_deck(rng, n=21):
+    """
+    Card types for a randomized card game deck
+    """
+    # Ensure they have some of each type
+    attacks = Card.of_kind("attack")
+    moves = Card.of_kind("move")
+    controls = Card.of_kind("control")
+
+    # For now, adding only unique cards, no repeats,
+    # to prevent infinite chains
+    split = n // 3  # Apx equal from each
+    deck = (
+        rng.sample(attacks, split)
+        + rng.sample(moves, split)
+        + rng.sample(controls, split)
+    )
+    rng.shuffle(deck)
+    return deck[:split]
+
+def simulate_card_game(seed, budget=None):
+    """
+    Play a single game with randomized decks from it's seed
+    """
+    rng = GameRng(seed)
+
+    # Create empty decks
+    white_choices = Choices(NamelessDegenerate, Skeleton, Tassles)
+    black_choices = Choices(NamelessDegenerate, Skeleton, Tassles)
+    game_state = GameState(white_choices, black_choices, rng, budget=budget)
+    assert game_state.white.deck == []
+    assert game_state.black.deck == []
+
+    # Add 20 random cards
+    for player in [game_state.white, game_state.black]:
+        for card_type in random_card_deck(rng):
+            player.create_card(card_type)
+
+    if trace.on:
+        trace.emit(
+            "game_start", seed=seed,
+            white=str(game_state.white), black=str(game_state.black)
+        )
+    game_state.play()
+    if trace.on:
+        trace.emit(
+            "card_game_end", turns=game_state.turns,
+            winner=str(game_state.winner),
+            white=str(game_state.white), black=str(game_state.black),
+            white_cards=trace.card_names(game_state.white.all_cards()),
+            black_cards=trace.card_names(game_state.black.all_cards())
+        )
+    return GameRecord(game_state)
+
+def fast_game(seed, w_mech=None, b_mech=None, budget=None):
+    """
+    The fast engine's game (see fast_game.py) for simulate_game's seed
+    """
+    rng = GameRng(seed)
+    white_choices = Choices(None, w_mech, rng=rng)
+    black_choices = Choices(None, b_mech, rng=rng)
+    return FastGame(white_choices, black_choices, rng, budget)
+
+def fast_card_game(seed, budget=None):
+    """
+    The fast engine's game for simulate_card_game's seed
+    """
+    rng = GameRng(seed)
+    white_choices = Choices(NamelessDegenerate, Skeleton, Tassles)
+    black_choices = Choices(NamelessDegenerate, Skeleton, Tassles)
+    game = FastGame(white_choices, black_choices, rng, budget)
+    for side in [game.white, game.black]:
+        for card_type in random_card_deck(rng):
+            game.create_card(side, card_type)
+    return game
+
+def simulate_fast_game(seed, w_mech=None, b_mech=None, budget=None):
+    """
+    Same as simulate_game, but played by the fast engine (see fast_game.py)
+    """
+    game = fast_game(seed, w_mech, b_mech, budget)
+    game.play()
+    return game.record()
+
+def simulate_fast_card_game(seed, budget=None):
+    """
+    Same as simulate_card_game, but played by the fast engine
+    """
+    game = fast_card_game(seed, budget)
+    game.play()
+    return game.record()
 
-    def run_simulations(self, number=1000, w_mech=None, b_mech=None):
+def simulate_batch(seeds, w_mech=None, b_mech=None, budget=None,
+                   card_game=False):
+    """
+    Same as simulate_fast_game (or simulate_fast_card_game) for a list of
+    seeds, played as one lockstep batch (see batch_game.py): a record, or a
+    Skipped, per seed. If the batch crashes, the seeds are played again
+    one at a time, so only the game that crashed is lost
+    """
+    if card_game:
+        simulate_func = partial(simulate_fast_card_game, budget=budget)
+        new_game = partial(fast_card_game, budget=budget)
+    else:
+        simulate_func = partial(
+            simulate_fast_game, w_mech=w_mech, b_mech=b_mech, budget=budget)
+        new_game = partial(
+            fast_game, w_mech=w_mech, b_mech=b_mech, budget=budget)
+    try:
+        batch = BatchGames([new_game(seed) for seed in seeds])
+        batch.play()
+        results = batch.records()
+    except Exception:
+        return [guarded(simulate_func, seed) for seed in seeds]
+    return [
+        skip(seed, result) if isinstance(result, BudgetExceeded) else result
+        for seed, result in zip(seeds, results)
+    ]
+
+def play_chunk(simulate_func, seeds):
+    """
+    A worker's share of a campaign: the records of the seeds' games
+    """
+    return list(map(simulate_func, seeds))
+
+def lost_chunk(seeds):
+    """
+    Stands in for a chunk whose worker died outright. (Only ever a one
+    game chunk: the games of a chunk that was running when a worker died
+    are played again one at a time, see worker_pool.py)
+    """
+    return [
+        Skipped(seed, "worker_died", "The worker playing it died")
+        for seed in seeds
+    ]
+
+def timed_chunk(chunk_func, seeds):
+    """
+    chunk_func(seeds), timed (see phase_timer.py):
+    the records, and the PhaseTimer with their times
+    """
+    with PhaseTimer() as timer:
+        records = chunk_func(seeds)
+    return records, timer
+
+def lost_timed_chunk(seeds):
+    """
+    lost_chunk, for timed chunks
+    """
+    return lost_chunk(seeds), PhaseTimer()
+
+def joined_timed(parts):
+    """
+    The timed chunks (see timed_chunk) of a chunk's parts as one
+    """
+    timer = PhaseTimer()
+    for _, part_timer in parts:
+        timer.add(part_timer)
+    return joined([records for records, _ in parts]), timer
+
+class Statistician:
+    """
+    Collect statistics for showing at the end of the game
+    """
+
+    def __init__(self, workers=1, seed=None, keep_games=False, store=None,
+                 fast=False, log_dir=None, player_type=None, cache=None,
+                 timing=False, flight_recorder=None, budget=None,
+                 quarantine=None):
+        # How many processes to fan games out over
+        # (1 plays them right here, one after another)
+        self.workers = workers
+        # Every game's seed is derived from this 'campaign' seed,
+        # so the same seed gives the same stats, whatever the worker count
+        self.seed = seed if seed is not None else random.getrandbits(32)
+        # Index of the next game in the campaign
+        self.games_played = 0
+
+        # Running totals every game gets folded into as soon as it ends
+        self.tally = Tally()
+
+        # Every game's summary record - only kept if asked for,
+        # so a long campaign runs in constant memory
+        self.keep_games = keep_games
+        self.games = []
+
+        # Optionally, also write every game to an on-disk store
+        # (see game_store.py) for later analysis
+        self.store = GameStore(store) if store else None
+
+        # Optionally, a directory to cache results in (see result_cache.py),
+        # so games whose cards haven't changed aren't played again
+        self.cache = ResultCache(cache) if cache else None
+
+        # Optionally, time each phase of the games (see phase_timer.py).
+        # Workers time their own games, and their times are added up here
+        self.timer = PhaseTimer() if timing else None
+
+        # Optionally, a directory to write the last events of any odd games
+        # to (see flight_recorder.py, only for GameState games)
+        self.flight_recorder = flight_recorder
+
+        # How much work each game may take (see budget.py, None for the
+        # usual limits). Games that go over, or crash, are skipped and
+        # added to the quarantine (and it's file, if given a path)
+        self.budget = budget
+        self.quarantine = Quarantine(quarantine)
+
+        # Play games with the fast engine rather than GameState
+        # (same games, just quicker - see engine_check.py)
+        self.fast = fast
+
+        # Optionally, save a replayable log of every game that hits the
+        # turn limit here (see game_log.py, only for GameState games)
+        self.log_dir = log_dir
+
+        # Optionally, a different AI (Player subclass) for 'real' games.
+        # Only GameState games can use it, so this overrides 'fast'
+        self.player_type = player_type
+
+        # When playing to a precision (see play_until), the stat name ->
+        # how many games it took for it's interval to get that narrow
+        self.games_needed = {}
+        self.precision = None
+
+        # Dict of the interesting staticstics
+        self.stats = {}
+
+    def play_games(self, simulate_func, number, batch_func=None):
+        """
+        Play 'number' games with the given simulate function,
+        in a process pool if we have more than one worker.
+        Games are merged back in campaign order.
+        batch_func (if given) plays the same games as simulate_func,
+        a whole list of seeds at a time (see simulate_batch)
+        """
+        first = self.games_played
+        seeds = [game_seed(self.seed, first + i) for i in range(number)]
+        self.games_played += number
+
+        # This exact block of games, with these exact cards
+        key = None
+        if self.cache is not None or self.store is not None:
+            key = content_key(
+                "games", everything_fingerprint(), describe(simulate_func),
+                self.seed, first, number
+            )
+        # Only stored if the store doesn't have it already
+        # (e.g. from an earlier run into the same store)
+        store = self.store is not None and key not in self.store.blocks
+
+        # Already played these games?
+        cache_key = None
+        if self.cache is not None:
+            cache_key = key
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.add_records(cached, store=store)
+                if store:
+                    self.store.add_block(key)
+                return
+
+        if self.timer is not None:
+            # (The timer only sees games played one at a time)
+            batch_func = None
+        self.simulate(simulate_func, seeds, cache_key, store, batch_func)
+
+        if store:
+            self.store.add_block(key)
+
+    def simulate(self, simulate_func, seeds, cache_key=None, store=True,
+                 batch_func=None):
+        """
+        Play the seeds' games, folding each record in as it comes back.
+        Each game is guarded, so one that goes over budget or crashes
+        is skipped, and the rest carry on. Even one that kills it's worker
+        outright only loses itself (see worker_pool.py)
         """
-        Run randomized 'real' games, with the defined mechs, pilots, etc
+        key = cache_key
+        number = len(seeds)
+        if batch_func is not None and number >= MIN_BATCH * self.workers:
+            # Each worker's share as a batch or two (a batch guards it's
+            # own games, see simulate_batch)
+            chunksize = min(BATCH_SIZE, -(-number // self.workers))
+            self.simulate_chunks(batch_func, seeds, chunksize, key, store)
+            return
+
+        simulate_func = partial(guarded, simulate_func)
+        # A few chunks per worker, so a slow chunk doesn't hold up the rest
+        chunksize = max(1, number // (self.workers * 4))
+
+        if self.workers <= 1 or number <= 1:
+            records = map(simulate_func, seeds)
+            with self.timer or nullcontext():
+                if self.flight_recorder is None:
+                    self.add_records(records, key, store)
+                else:
+                    with trace.tracing(FlightRecorder(self.flight_recorder)):
+                        self.add_records(records, key, store)
+        else:
+            initializer, initargs = None, ()
+            if self.flight_recorder is not None:
+                initializer = start_recording
+                initargs = (self.flight_recorder,)
+            self.simulate_chunks(
+                partial(play_chunk, simulate_func), seeds, chunksize, key,
+                store, initializer, initargs)
+
+    def simulate_chunks(self, chunk_func, seeds, chunksize, cache_key=None,
+                        store=True, initializer=None, initargs=()):
         """
-        for i in range(number):
-            # For now, let's randomly select entities for simulation
-            white_choices = Choices(None, w_mech)
-            black_choices = Choices(None, b_mech)
-            game_state = GameState(white_choices, black_choices)
-            logger.info(f"Starting {game_state}")
-            game_state.play()
-            logger.info(
-                f"{game_state.turns}t {game_state.winner} win: "
-                f"{game_state.white} {game_state.black}"
+        Play the seeds chunksize at a time, chunk_func(chunk) giving each
+        chunk's records, over the workers (if more than one).
+        If timing, each chunk is timed where it's played
+        """
+        chunks = [
+            seeds[i:i + chunksize] for i in range(0, len(seeds), chunksize)
+        ]
+        lost, join = lost_chunk, joined
+        if self.timer is not None:
+            chunk_func = partial(timed_chunk, chunk_func)
+            lost, join = lost_timed_chunk, joined_timed
+        if self.workers <= 1 or len(chunks) <= 1:
+            records = map(chunk_func, chunks)
+        else:
+            records = pool_map(
+                chunk_func, chunks, self.workers, lost, join=join,
+                initializer=initializer, initargs=initargs
             )
-            self.games.append(game_state)
+        if self.timer is not None:
+            records = self.add_times(records)
+        self.add_records(
+            itertools.chain.from_iterable(records), cache_key, store)
 
-        self.calc_stats()
+    def add_times(self, timed_records):
+        """
+        Add up the times of timed chunks (see timed_chunk) as they come
+        back, giving their records
+        """
+        for records, timer in timed_records:
+            self.timer.add(timer)
+            yield records
 
-    def run_card_simulations(self, number=1000):
+    def play_until(self, simulate_func, max_games, precision, cards=False):
         """
-        Run randomized games with randomized decks - to see which cards/steps
-        are good
+        Play games CHECK_EVERY at a time, until every rate we report has a
+        95% (Wilson) interval of +/- precision or better,
+        or we have played max_games.
+        The games are the same ones a fixed number would have played,
+        just stopping sooner
+        """
+        self.precision = precision
+        played = 0
+        while played < max_games:
+            block = min(CHECK_EVERY, max_games - played)
+            self.play_games(simulate_func, block)
+            played += block
+
+            games = self.tally.games
+            settled = True
+            for name, count in self.tally.rate_counts(cards).items():
+                if name in self.games_needed:
+                    continue
+                low, high = wilson_interval(count, games)
+                if (high - low) / 2 <= precision:
+                    self.games_needed[name] = games
+                else:
+                    settled = False
+            if settled:
+                break
+
+    def add_records(self, records, cache_key=None, store=True):
+        # (If caching, the records have to be held onto until the end)
+        cached = [] if cache_key is not None else None
+        skipped = 0
+        for record in records:
+            if isinstance(record, Skipped):
+                self.quarantine.add(record, campaign=self.seed)
+                skipped += 1
+                continue
+            self.tally.add(record)
+            if self.keep_games:
+                self.games.append(record)
+            if store and self.store is not None:
+                self.store.append(record)
+            if cached is not None:
+                cached.append(record)
+        # (Skipped games might not be skipped next time, e.g. if they
+        # ran out of time, so don't remember them as 'played')
+        if cached is not None and not skipped:
+            self.cache.put(cache_key, cached)
+
+    def load_games(self, path):
+        """
+        Fold the games of a stored (historic) campaign into our stats,
+        without re-simulating them
+        """
+        with StoredGames(path) as stored:
+            if not self.keep_games:
+                self.tally.add_columns(stored.columns)
+                return
+            for record in stored.records():
+                self.tally.add(record)
+                self.games.append(record)
+
+    def can_batch(self):
+        """
+        Can fast games be played in lockstep batches (not if they're
+        being timed, see BatchGames)
         """
-        for i in range(number):
-            # Create empty decks
-            white_choices = Choices(NamelessDegenerate, Skeleton, Tassles)
-            black_choices = Choices(NamelessDegenerate, Skeleton, Tassles)
-            game_state = GameState(white_choices, black_choices)
-            assert game_state.white.deck == []
-            assert game_state.black.deck == []
-
-            # Add 20 random cards, but ensure they have some of each type
-            all_cards = Card.all_types.values()
-            attacks = [ct for ct in all_cards if ct.is_attack()]
-            moves = [ct for ct in all_cards if ct.is_move()]
-            controls = [ct for ct in all_cards if ct.is_control()]
-
-            def add_random_cards(player, n=21):
-                # For now, adding only unique cards, no repeats,
-                # to prevent infinite chains
-                split = n // 3  # Apx equal from each
-                deck = (
-                    random.sample(attacks, split)
-                    + random.sample(moves, split)
-                    + random.sample(controls, split)
+        return self.budget is None or self.budget.seconds is None
+
+    def run_simulations(self, number=1000, w_mech=None, b_mech=None,
+                        precision=None):
+        """
+        Run randomized 'real' games, with the defined mechs, pilots, etc.
+        If given a precision (e.g. 0.02 for +/-2%), 'number' is the most
+        games to play, stopping early once the stats are that precise
+        """
+        batch_func = None
+        if self.fast and self.player_type is None:
+            simulate_func = partial(
+                simulate_fast_game, w_mech=w_mech, b_mech=b_mech,
+                budget=self.budget
+            )
+            if self.can_batch():
+                batch_func = partial(
+                    simulate_batch, w_mech=w_mech, b_mech=b_mech,
+                    budget=self.budget
                 )
-                random.shuffle(deck)
-                deck = deck[:split]
-                [player.create_card(c) for c in deck]
-            add_random_cards(game_state.white)
-            add_random_cards(game_state.black)
-
-            logger.info(f"Starting {game_state}")
-            game_state.play()
-            logger.info(
-                f"{game_state.turns}t {game_state.winner} win: "
-                f"\n{game_state.white} had {game_state.white.all_cards()} "
-                f"\n{game_state.black} had {game_state.black.all_cards()}"
+        else:
+            simulate_func = partial(
+                simulate_game, w_mech=w_mech, b_mech=b_mech,
+                log_dir=self.log_dir, player_type=self.player_type,
+                budget=self.budget
             )
+        if precision is None:
+            self.play_games(simulate_func, number, batch_func)
+        else:
+            self.play_until(simulate_func, number, precision)
+        self.calc_stats()
 
-            self.games.append(game_state)
-
+    def run_card_simulations(self, number=1000, precision=None):
+        """
+        Run randomized games with randomized decks - to see which cards/steps
+        are good (for precision, see run_simulations)
+        """
+        simulate_func = partial(
+            simulate_fast_card_game if self.fast else simulate_card_game,
+            budget=self.budget
+        )
+        batch_func = None
+        if self.fast and self.can_batch():
+            batch_func = partial(
+                simulate_batch, budget=self.budget, card_game=True)
+        if precision is None:
+            self.play_games(simulate_func, number, batch_func)
+        else:
+            self.play_until(simulate_func, number, precision, cards=True)
         self.calc_card_stats()
 
-    def get_rate(self, games, as_int=False):
+    def run_sweep(self, games=10, loadouts=None, precision=None):
+        """
+        Play every loadout against every other, 'games' times each
+        (rather than random ones), returns the MatchupMatrix.
+        See sweep.py
+        """
+        return sweep(
+            games, self.workers, self.seed, loadouts, precision=precision,
+            cache=self.cache, budget=self.budget, quarantine=self.quarantine
+        )
+
+    def get_rate(self, number_of_games, as_int=False):
         # If something happens x number of games, what percent of
         # games was that?
-        number_of_games = len(list(games))
-        percent = (number_of_games / len(self.games)) * 100
+        percent = (number_of_games / self.tally.games) * 100
         percent = round(percent)
         if as_int:
             return percent
-        return f"{percent}%"  # ({number_of_games}/{len(self.games)})"
+        return f"{percent}%"  # ({number_of_games}/{self.tally.games})"
 
     def breakdown_by_name(self, named_class, add=[]):
         # Who won? Mech, pilot, upgrade, etc
-        names = [c.short_name() for c in named_class.all_types.values()]
-        for name in names + add:
-            self.stats[f"{named_class.__name__} - {name} Wins"] = self.get_rate(
-                g for g in self.games
-                if name in str(g.winner)
-            )
-
-    def turn_info(self, t_list):
+        wins = self.tally.wins[named_class]
+        for named_type in named_class.types_by_id:
+            name = named_type.short_name()
+            self.stats[f"{named_class.__name__} - {name} Wins"] = (
+                self.get_rate(wins[named_type.type_id]))
+        # Outcomes without a winner, like 'Tie'
+        for name in add:
+            self.stats[f"{named_class.__name__} - {name} Wins"] = (
+                self.get_rate(self.tally.outcomes[name]))
+
+    def turn_info(self, histogram):
         # Helper str for median/min/max # of turns
-        t_list = list(t_list)
         return (
-            f"Median: {median(t_list)}t ({median(t_list) // 2})r"
-            + f" [{min(t_list)}-{max(t_list)}]"
+            f"Median: {histogram.median()}t ({histogram.median() // 2})r"
+            + f" [{histogram.min()}-{histogram.max()}]"
         )
 
-    def number_info(self, t_list):
+    def number_info(self, histogram):
         # Helper str for median/min/max for any numerical value
-        t_list = list(t_list)
         return (
-            f"Median: {median(t_list)}"
-            + f" [{min(t_list)}-{max(t_list)}]"
+            f"Median: {histogram.median()}"
+            + f" [{histogram.min()}-{histogram.max()}]"
         )
 
-    def long_game_cards(self):
-        # In how many long games was this card seen
-        long_games = [g for g in self.games if g.turns > 50]
-        normal_card_count = {
-            card_type: 0
-            for card_type in Card.all_types.values()
+    def games_needed_info(self, cards=False):
+        # Helper str for how many games each rate took to be precise enough
+        # (slowest first)
+        needed = {
+            name: self.games_needed.get(name)
+            for name in self.tally.rate_counts(cards)
         }
-        long_card_count = {
-            card_type: 0
-            for card_type in Card.all_types.values()
-        }
-        for ct in Card.all_types.values():
-            for game in self.games:
-                played_cards = set(
-                    game.white.played_cards + game.black.played_cards
-                )
-                if ct not in played_cards:
-                    continue
-                normal_card_count[ct] += 1
-                if game.turns > 50:
-                    long_card_count[ct] += 1
+        lines = [
+            f"{name}: {games}" if games is not None
+            else f"{name}: >{self.tally.games}"
+            for name, games in sorted(
+                needed.items(), key=lambda kv: -(kv[1] or float("inf")))
+        ]
+        return "\n  " + "\n  ".join(lines)
 
+    def long_game_cards(self):
+        # In how many long games was this card seen
+        tally = self.tally
         # What % of games was the card in?
         long_card_ratio = {
-            k: round(v / max(len(long_games), 1), 2)
-            for k, v in long_card_count.items()
+            ct: round(
+                tally.long_card_games[ct.type_id] / max(tally.long_games, 1),
+                2)
+            for ct in Card.types_by_id
         }
         normal_card_ratio = {
-            k: round(v / len(self.games), 2)
-            for k, v in normal_card_count.items()
+            ct: round(tally.card_games[ct.type_id] / tally.games, 2)
+            for ct in Card.types_by_id
         }
         # How many more long games than normal games?
         differential_ratio = {
@@ -167,8 +644,7 @@ class Statistician:
         }
         # TODO check if there we 0 long games
         freq_cards = sorted(differential_ratio.items(), key=lambda kv: -kv[1])
-        self.stats[f"Long games"] = self.get_rate(
-            g for g in self.games if g.turns > 50)
+        self.stats[f"Long games"] = self.get_rate(tally.long_games)
         self.stats[f"Cards seen in long games"] = "\n  " + (
             "\n  ".join(f'{k.name}: {v}' for k, v in freq_cards[:10])
         )
@@ -192,76 +668,41 @@ class Statistician:
         * How often did each upgrade win?
         * What & of damage was overheating?
         """
+        tally = self.tally
 
         self.breakdown_by_name(Mech, ["Tie", "None"])
         self.breakdown_by_name(Pilot)
         self.breakdown_by_name(Upgrade)
 
         # How long did games take?
-        self.stats["Game Length"] = self.turn_info(
-            g.turns for g in self.games)
-        self.stats["1st blood"] = self.turn_info(
-            g.first_blood_turn for g in self.games
-            if g.first_blood_turn
-        )
-        self.stats["Combat Length"] = self.turn_info(
-            (g.turns - g.first_blood_turn)
-            if g.first_blood_turn else 0
-            for g in self.games
-        )
+        self.stats["Game Length"] = self.turn_info(tally.turns)
+        self.stats["1st blood"] = self.turn_info(tally.first_blood)
+        self.stats["Combat Length"] = self.turn_info(tally.combat_length)
 
-        self.stats[f"No weapons"] = self.get_rate(
-            g for g in self.games if g.first_blood_turn is None)
+        self.stats[f"No weapons"] = self.get_rate(tally.no_weapons)
 
-        cards_per_turn = [
-            turn_count
-            for g in self.games
-            for turn_count in g.turn_lengths
-        ]
-        self.stats["Cards per turn"] = self.number_info(cards_per_turn)
+        self.stats["Cards per turn"] = self.number_info(tally.cards_per_turn)
 
-        self.stats["Melt Damage"] = self.number_info(
-            g.total_melt_dmg for g in self.games)
+        self.stats["Melt Damage"] = self.number_info(tally.melt_dmg)
 
-        self.stats["Weapon Damage"] = self.number_info(
-            g.total_weapon_dmg for g in self.games)
+        self.stats["Weapon Damage"] = self.number_info(tally.weapon_dmg)
 
         self.long_game_cards()
 
-    def calc_card_stats(self):
+        if self.precision is not None:
+            self.stats[f"Games needed for +/-{self.precision:.0%}"] = (
+                self.games_needed_info())
 
-        def card_type_in_game(game, card_type, loser=False):
-            player = game.loser if loser else game.winner
-            if not isinstance(player, Player):
-                return False
-            return card_type in set(player.played_cards)
-
-        def step_type_in_game(game, step_type, loser=False):
-            player = game.loser if loser else game.winner
-            if not isinstance(player, Player):
-                return False
-            winner_steps = set(
-                type(s)
-                for card_type in player.played_cards
-                for s in card_type.steps
-            )
-            return step_type in winner_steps
+    def calc_card_stats(self):
 
-        def get_wins_vs_losses(named_type, get_win_func):
+        def get_wins_vs_losses(named_type, wins, losses):
             win_dict = {}
             loss_dict = {}
             diff_dict = {}  # +/- Differential between wins/losses
-            for ct in named_type.all_types.values():
-                wins = (
-                    g for g in self.games
-                    if get_win_func(g, ct)
-                )
-                win_dict[ct] = self.get_rate(wins, as_int=True)
-                losses = (
-                    g for g in self.games
-                    if get_win_func(g, ct, loser=True)
-                )
-                loss_dict[ct] = self.get_rate(losses, as_int=True)
+            for ct in named_type.types_by_id:
+                win_dict[ct] = self.get_rate(wins[ct.type_id], as_int=True)
+                loss_dict[ct] = self.get_rate(
+                    losses[ct.type_id], as_int=True)
 
                 diff_dict[ct] = win_dict[ct] - loss_dict[ct]
 
@@ -281,18 +722,22 @@ class Statistician:
                 self.stats[f"{named_type.__name__} - {ct.name}"] = (
                     f"{better_percent} ({win_rate}w% vs {lose_rate}l%)")
 
-        get_wins_vs_losses(Card, card_type_in_game)
-        get_wins_vs_losses(Step, step_type_in_game)
+        tally = self.tally
+        get_wins_vs_losses(Card, tally.card_wins, tally.card_losses)
+        get_wins_vs_losses(Step, tally.step_wins, tally.step_losses)
         self.long_game_cards()
 
+        if self.precision is not None:
+            self.stats[f"Games needed for +/-{self.precision:.0%}"] = (
+                self.games_needed_info(cards=True))
+
     def print_statistics(self):
         print(f"\n\n")
-        print(f"Played {len(self.games)} games:")
+        print(f"Played {self.tally.games} games:")
         for game in self.games:
             msg = (
-                f"{game.winner} win, {game.turns} turns, "
-                f"{game.first_blood_turn} fb\n"
-                f"{game.white.mech.hp} white hp, {game.black.mech.hp} black hp"
+                f"{game}\n"
+                f"{game.white.hp} white hp, {game.black.hp} black hp"
                 f"\n"
             )
             logger.info(msg)
@@ -300,13 +745,35 @@ class Statistician:
         for key, value in self.stats.items():
             print(f"{key}: {value}")
 
+        if self.quarantine:
+            print(self.quarantine.summary())
+
+        if self.timer is not None:
+            print(f"\nWhere the time went:")
+            print(self.timer.summary())
+
 # Start the simulations
 if __name__ == "__main__":
-    s = Statistician()
-
+    s = Statistician(
+        workers=multiprocessing.cpu_count(),
+        # A new store whenever the cards or rules change (a store refuses
+        # games played with different ones)
+        store=(
+            f"games-{datetime.date.today():%y-%m-%d}"
+            f"-{short_hash(fingerprint_hashes())[:8]}"
+        ),
+        # Same seed every run, so unchanged games come from the cache
+        seed=0,
+        cache=".sim-cache",
+        quarantine="quarantine.jsonl",
+    )
+
+    # (A new game every run, so not cached, and not stored with the rest)
     print("Example game:")
     logger.setLevel(logging.DEBUG)
-    s.run_simulations(1)
+    example = trace.add_sink(trace.LoggingSink())
+    Statistician().run_simulations(1)
+    trace.remove_sink(example)
 
     # print("One game at a time:")
     # logger.setLevel(logging.DEBUG)
@@ -0,0 +1,511 @@
+import sys
+import json
+import time
+import random
+import itertools
+import multiprocessing
+from array import array
+
+from src.fast_game import FastGame
+from src.player import Choices
+from src.mech import Mech, Skeleton
+from src.pilot import Pilot
+from src.upgrade import Upgrade
+from src.game_rng import GameRng
+from src.game_record import WHITE, BLACK, TIE
+from src.tally import wilson_interval, clearly_not_even
+from src.budget import Quarantine, Skipped, skip
+from src.worker_pool import pool_map
+from src.result_cache import (
+    ResultCache, content_key, entity_fingerprint, fingerprint_hashes
+)
+
+"""
+Every loadout (pilot, mech, upgrades) against every other, rather than
+the random sample run_simulations plays - so the rare combos get just as
+many games as the common ones.
+
+The matchups are split into small work units (a few dozen matchups each)
+for a process pool, and the results are added up into a win-rate matrix,
+with how many games went into each cell.
+Games use the fast engine (see fast_game.py).
+
+Given a precision, a matchup stops early once it's clear who wins it
+(by a sequential test, wrong for at most 5% of even matchups), or it's
+win rate is known to +/- that much (so lopsided matchups only take a
+handful of games); the matrix's game counts say how many each needed.
+
+A game that goes over budget or crashes (see budget.py) is skipped, not
+counted, and added to the matrix's 'skipped' quarantine - the sweep
+still finishes, and says what it skipped.
+"""
+
+# Run using:
+# python -m src.sweep [games per matchup] [workers] [output.json] [precision]
+# (results are cached in .sim-cache, see result_cache.py)
+
+# Matchups handed to a worker at once
+UNIT_SIZE = 32
+
+# Fewest games of a matchup before it can stop early
+MIN_GAMES = 10
+
+# Bump whenever settled() changes, so matchups cached when they stopped
+# by the old rule aren't used
+STOPPING_VERSION = 2
+
+
+def all_loadouts(pilots=None, mechs=None, upgrades=None):
+    """
+    Every (pilot, mech, upgrades) combo, as type ids.
+    Upgrades are a multiset (order doesn't matter, but the same upgrade
+    can fill more than one hard point), like Choices picks them
+    """
+    pilots = pilots or list(Pilot.all_types.values())
+    mechs = mechs or [
+        m for m in Mech.all_types.values() if m is not Skeleton]
+    upgrades = upgrades or list(Upgrade.all_types.values())
+
+    loadouts = []
+    for pilot in pilots:
+        for mech in mechs:
+            for combo in itertools.combinations_with_replacement(
+                    upgrades, mech.hard_points):
+                loadouts.append((
+                    pilot.type_id, mech.type_id,
+                    tuple(u.type_id for u in combo)
+                ))
+    return loadouts
+
+
+def loadout_choices(loadout):
+    pilot, mech, upgrades = loadout
+    return Choices(
+        Pilot.by_id(pilot), Mech.by_id(mech),
+        [Upgrade.by_id(u) for u in upgrades]
+    )
+
+
+def loadout_name(loadout):
+    pilot, mech, upgrades = loadout
+    return (
+        f"{Pilot.by_id(pilot).short_name()} "
+        f"{Mech.by_id(mech).short_name()} "
+        f"{'+'.join(Upgrade.by_id(u).short_name() for u in upgrades)}"
+    )
+
+
+def matchup_seed(campaign_seed, a, b, game):
+    """
+    The seed for one game of a matchup, from the loadouts themselves
+    (not their place in the list), so the same matchup plays the same
+    games in any sweep
+    """
+    return random.Random(f"{campaign_seed}-{a}-{b}-{game}").getrandbits(32)
+
+
+def settled(a_wins, ties, played, precision):
+    """
+    Can a matchup stop early? Once a's win rate (ties as half) is known to
+    +/- precision, or is clearly not 50% (see tally.clearly_not_even -
+    checked after every pair of games, so a plain confidence interval
+    would call a winner in far too many even matchups)
+    """
+    if precision is None or played < MIN_GAMES or played % 2 == 1:
+        # (Always both colors the same number of times)
+        return False
+    score = a_wins + ties / 2
+    low, high = wilson_interval(score, played)
+    return (high - low) / 2 <= precision or clearly_not_even(score, played)
+
+
+def play_unit(unit):
+    """
+    Play one work unit: (campaign seed, games per matchup, precision,
+    budget, [(a index, b index, loadout a, loadout b), ...]).
+    Colors alternate, a is white for the even games.
+    Returns ([(a index, b index, games, a wins, b wins, ties), ...],
+    [(a index, b index, Skipped), ...])
+    (module level, so worker processes can pickle it)
+    """
+    campaign_seed, games, precision, budget, matchups = unit
+    results = []
+    skipped = []
+    for i, j, a, b in matchups:
+        a_choices = loadout_choices(a)
+        b_choices = loadout_choices(b)
+        a_wins = b_wins = ties = 0
+        played = 0
+        for game in range(games):
+            if settled(a_wins, ties, played, precision):
+                break
+            a_white = game % 2 == 0
+            seed = matchup_seed(campaign_seed, a, b, game)
+            rng = GameRng(seed)
+            try:
+                if a_white:
+                    fast_game = FastGame(a_choices, b_choices, rng, budget)
+                else:
+                    fast_game = FastGame(b_choices, a_choices, rng, budget)
+                fast_game.play()
+            except Exception as e:
+                skipped.append((i, j, skip(seed, e)))
+                continue
+            played += 1
+
+            outcome = fast_game.outcome
+            if outcome == TIE:
+                ties += 1
+            elif outcome == WHITE:
+                if a_white:
+                    a_wins += 1
+                else:
+                    b_wins += 1
+            elif outcome == BLACK:
+                if a_white:
+                    b_wins += 1
+                else:
+                    a_wins += 1
+        results.append((i, j, played, a_wins, b_wins, ties))
+    return results, skipped
+
+
+def lost_unit(unit):
+    """
+    Stands in for play_unit's results when the worker playing the unit
+    died outright. (Only ever a one matchup unit, see split_unit.)
+    Every game of the matchup is skipped - it's games depend on the ones
+    before (see settled), so can't be played without them
+    """
+    campaign_seed, games, precision, budget, matchups = unit
+    results = []
+    skipped = []
+    for i, j, a, b in matchups:
+        results.append((i, j, 0, 0, 0, 0))
+        for game in range(games):
+            seed = matchup_seed(campaign_seed, a, b, game)
+            lost = Skipped(seed, "worker_died", "The worker playing it died")
+            skipped.append((i, j, lost))
+    return results, skipped
+
+
+def split_unit(unit):
+    """
+    A work unit as one matchup units, for playing them one at a time
+    after a worker died (see worker_pool.py)
+    """
+    campaign_seed, games, precision, budget, matchups = unit
+    return [
+        (campaign_seed, games, precision, budget, [matchup])
+        for matchup in matchups
+    ]
+
+
+def join_units(unit_results):
+    """
+    play_unit's results for a split unit, as one unit's
+    """
+    results = []
+    skipped = []
+    for unit_result, unit_skipped in unit_results:
+        results += unit_result
+        skipped += unit_skipped
+    return results, skipped
+
+
+class MatchupMatrix:
+    """
+    Games, wins and ties of each loadout (row) against each other (column),
+    as flat arrays. Games that hit the turn limit count as played,
+    but not as a win, loss, or tie.
+    (A mirror match cell counts each game twice, once for each side)
+    """
+
+    def __init__(self, loadouts, games_per_matchup=10, precision=None,
+                 campaign_seed=0):
+        self.loadouts = list(loadouts)
+        n = len(self.loadouts)
+        self.games = array("I", [0]) * (n * n)
+        self.wins = array("I", [0]) * (n * n)
+        self.ties = array("I", [0]) * (n * n)
+
+        # How the matchups were played
+        self.games_per_matchup = games_per_matchup
+        self.precision = precision
+        self.campaign_seed = campaign_seed
+
+        # The fingerprints (see result_cache.py) of the cards / entities
+        # the matrix was played with, so a later run can tell what changed
+        self.fingerprints = fingerprint_hashes()
+
+        # Games that went over budget / crashed (see budget.py)
+        self.skipped = Quarantine()
+
+    def add(self, i, j, games, i_wins, j_wins, ties):
+        n = len(self.loadouts)
+        for row, col, wins in [(i, j, i_wins), (j, i, j_wins)]:
+            self.games[row * n + col] += games
+            self.wins[row * n + col] += wins
+            self.ties[row * n + col] += ties
+
+    def cell(self, i, j):
+        """
+        (games, wins, ties) of loadout i against loadout j
+        """
+        k = i * len(self.loadouts) + j
+        return self.games[k], self.wins[k], self.ties[k]
+
+    def win_rate(self, i, j):
+        """
+        How often i beats j (ties as half a win)
+        """
+        games, wins, ties = self.cell(i, j)
+        if games == 0:
+            return None
+        return (wins + ties / 2) / games
+
+    def row_win_rate(self, i):
+        """
+        How often i beats anyone at all: the average of it's matchups
+        (so each opponent counts the same, however many games it took)
+        """
+        rates = [
+            rate for rate in (
+                self.win_rate(i, j) for j in range(len(self.loadouts)))
+            if rate is not None
+        ]
+        if not rates:
+            return None
+        return sum(rates) / len(rates)
+
+    def entity_win_rates(self):
+        """
+        Average win rate of every pilot / mech / upgrade, over every
+        loadout it's in (an upgrade twice in a loadout still counts once)
+        """
+        totals = {}
+        for i, (pilot, mech, upgrades) in enumerate(self.loadouts):
+            rate = self.row_win_rate(i)
+            if rate is None:
+                continue
+            entities = [Pilot.by_id(pilot), Mech.by_id(mech)] + [
+                Upgrade.by_id(u) for u in set(upgrades)]
+            for entity in entities:
+                total = totals.setdefault(entity.human_name(), [0, 0.0])
+                total[0] += 1
+                total[1] += rate
+        return {
+            name: round(rates / loadouts, 3)
+            for name, (loadouts, rates) in sorted(totals.items())
+        }
+
+    def to_dict(self):
+        return {
+            "loadouts": [
+                [pilot, mech, list(upgrades)]
+                for pilot, mech, upgrades in self.loadouts
+            ],
+            "games": list(self.games),
+            "wins": list(self.wins),
+            "ties": list(self.ties),
+            "games_per_matchup": self.games_per_matchup,
+            "precision": self.precision,
+            "campaign_seed": self.campaign_seed,
+            "fingerprints": self.fingerprints,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        matrix = cls(
+            (
+                (pilot, mech, tuple(upgrades))
+                for pilot, mech, upgrades in data["loadouts"]
+            ),
+            data["games_per_matchup"], data["precision"],
+            data["campaign_seed"]
+        )
+        matrix.fingerprints = data["fingerprints"]
+        matrix.games = array("I", data["games"])
+        matrix.wins = array("I", data["wins"])
+        matrix.ties = array("I", data["ties"])
+        return matrix
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+    def print_summary(self, top=10):
+        rates = sorted(
+            (self.row_win_rate(i), loadout_name(loadout))
+            for i, loadout in enumerate(self.loadouts)
+            if self.row_win_rate(i) is not None
+        )
+        n = len(self.loadouts)
+        per_matchup = sorted(
+            self.games[i * n + j] for i in range(n) for j in range(i + 1, n))
+        print(f"{n} loadouts, {sum(self.games) // 2} games")
+        if per_matchup:
+            print(
+                f"Games per matchup: median "
+                f"{per_matchup[len(per_matchup) // 2]} "
+                f"[{per_matchup[0]}-{per_matchup[-1]}]"
+            )
+        print("Best:")
+        for rate, name in reversed(rates[-top:]):
+            print(f"  {rate:.3f} {name}")
+        print("Worst:")
+        for rate, name in rates[:top]:
+            print(f"  {rate:.3f} {name}")
+        for name, rate in self.entity_win_rates().items():
+            print(f"  {name}: {rate}")
+        if self.skipped:
+            print(self.skipped.summary())
+
+
+def loadout_fingerprint(loadout):
+    """
+    Everything about a loadout that can change how it's games go
+    (see result_cache.py)
+    """
+    pilot, mech, upgrades = loadout
+    return (
+        loadout,
+        entity_fingerprint(Pilot.by_id(pilot)),
+        entity_fingerprint(Mech.by_id(mech)),
+        [entity_fingerprint(Upgrade.by_id(u)) for u in upgrades],
+    )
+
+
+def all_pairs(loadouts):
+    """
+    Every matchup: each pair once, and mirror matches
+    """
+    n = len(loadouts)
+    return [(i, j) for i in range(n) for j in range(i, n)]
+
+
+def work_units(loadouts, pairs, games, campaign_seed=0, precision=None,
+               budget=None, size=UNIT_SIZE):
+    """
+    The given matchups (pairs of loadout indexes) in chunks
+    """
+    for start in range(0, len(pairs), size):
+        chunk = [
+            (i, j, loadouts[i], loadouts[j])
+            for i, j in pairs[start:start + size]
+        ]
+        yield (campaign_seed, games, precision, budget, chunk)
+
+
+def sweep(games=10, workers=1, campaign_seed=0, loadouts=None,
+          progress=False, precision=None, cache=None, budget=None,
+          quarantine=None):
+    """
+    Play 'games' games of every matchup (at most, if given a precision),
+    returns the MatchupMatrix.
+    With a ResultCache, matchups whose loadouts haven't changed since they
+    were last played are taken from it instead.
+    Skipped games go in a Quarantine (or one writing to the given path)
+    """
+    loadouts = loadouts or all_loadouts()
+    matrix = MatchupMatrix(loadouts, games, precision, campaign_seed)
+    if quarantine is not None:
+        matrix.skipped = (
+            quarantine if isinstance(quarantine, Quarantine)
+            else Quarantine(quarantine)
+        )
+    play_pairs(matrix, all_pairs(loadouts), workers, progress, cache, budget)
+    return matrix
+
+
+def play_pairs(matrix, pairs, workers=1, progress=False, cache=None,
+               budget=None):
+    """
+    Play the given matchups (pairs of loadout indexes), with the matrix's
+    settings, adding them to it
+    """
+    loadouts = matrix.loadouts
+    games = matrix.games_per_matchup
+    precision = matrix.precision
+    campaign_seed = matrix.campaign_seed
+
+    keys = {}
+    if cache is not None:
+        fingerprints = [repr(loadout_fingerprint(l)) for l in loadouts]
+        to_play = []
+        for i, j in pairs:
+            key = content_key(
+                "matchup", campaign_seed, games, precision, STOPPING_VERSION,
+                budget, fingerprints[i], fingerprints[j]
+            )
+            cached = cache.get(key)
+            if cached is None:
+                keys[i, j] = key
+                to_play.append((i, j))
+            else:
+                matrix.add(i, j, *cached)
+        pairs = to_play
+
+    total = len(pairs)
+    units = work_units(
+        loadouts, pairs, games, campaign_seed, precision, budget)
+
+    start = time.perf_counter()
+    done = 0
+
+    def add(unit_results):
+        nonlocal done
+        results, skipped = unit_results
+        # (Matchups with skipped games aren't cached, they might not be
+        # skipped next time)
+        skipped_pairs = set()
+        for i, j, game in skipped:
+            matrix.skipped.add(
+                game, campaign=campaign_seed,
+                matchup=[loadout_name(loadouts[i]), loadout_name(loadouts[j])]
+            )
+            skipped_pairs.add((i, j))
+        for i, j, played, i_wins, j_wins, ties in results:
+            matrix.add(i, j, played, i_wins, j_wins, ties)
+            if cache is not None and (i, j) not in skipped_pairs:
+                cache.put(keys[i, j], (played, i_wins, j_wins, ties))
+        done += len(results)
+        if progress:
+            elapsed = time.perf_counter() - start
+            print(
+                f"\r{done}/{total} matchups, "
+                f"{elapsed / done * (total - done) / 60:.1f}m left",
+                end="", flush=True
+            )
+
+    if workers <= 1:
+        for unit in units:
+            add(play_unit(unit))
+    else:
+        for results in pool_map(
+                play_unit, units, workers, lost_unit, split_unit,
+                join_units):
+            add(results)
+    if progress:
+        print()
+
+
+if __name__ == "__main__":
+    games = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else (
+        multiprocessing.cpu_count())
+    path = sys.argv[3] if len(sys.argv) > 3 else None
+    precision = float(sys.argv[4]) if len(sys.argv) > 4 else None
+
+    matrix = sweep(
+        games, workers, progress=True, precision=precision,
+        cache=ResultCache(".sim-cache"), quarantine="quarantine.jsonl"
+    )
+    matrix.print_summary()
+    if path:
+        matrix.save(path)
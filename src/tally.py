@@ -0,0 +1,286 @@
+import math
+from collections import Counter
+
+from src.card import Card
+from src.card_steps import Step
+from src.mech import Mech
+from src.pilot import Pilot
+from src.upgrade import Upgrade
+from src.game_record import OUTCOME_NAMES, WHITE, BLACK, steps_mask
+from src.utils import mask_ids
+
+"""
+Online accumulators for the Statistician - each finished game is folded in
+as soon as it ends, so memory stays the same however many games we play
+"""
+
+# A game this long is a 'long game'
+LONG_GAME_TURNS = 50
+
+# z score of a 95% confidence interval
+Z_95 = 1.96
+
+
+def wilson_interval(successes, n, z=Z_95):
+    """
+    (low, high) confidence interval of a rate, successes / n.
+    Unlike p +/- z * std error, stays sensible for rates near 0 or 1,
+    and for only a few games
+    """
+    if n == 0:
+        return 0.0, 1.0
+    p = successes / n
+    z2 = z * z
+    scale = 1 + z2 / n
+    center = (p + z2 / (2 * n)) / scale
+    half = z * math.sqrt(p * (1 - p) / n + z2 / (4 * n * n)) / scale
+    return max(0.0, center - half), min(1.0, center + half)
+
+
+def clearly_not_even(successes, n, alpha=0.05):
+    """
+    Is a rate clearly not 50%? A sequential test, so (unlike checking if
+    a confidence interval has left 50%, which done after every game finds
+    a 'winner' in a good share of even matchups) it can be asked after
+    every game, for as many games as you like, and still only calls an
+    even rate wrong alpha of the time.
+    It's the Bayes factor of 'any rate' (uniform) against 'exactly 50%':
+    under 50% that's a martingale, so (Ville's inequality) it only ever
+    reaches 1 / alpha with probability alpha. (Ties as half a success
+    are fine, they keep it a supermartingale)
+    """
+    failures = n - successes
+    log_bayes_factor = (
+        math.lgamma(successes + 1) + math.lgamma(failures + 1)
+        - math.lgamma(n + 2) + n * math.log(2)
+    )
+    return log_bayes_factor >= -math.log(alpha)
+
+
+def count_bits(counts, mask, n=1):
+    """
+    Add n to counts[id] for every id set in a bit mask
+    """
+    for i in mask_ids(mask):
+        counts[i] += n
+
+
+class Histogram:
+    """
+    Counts of each (small, integer) value seen.
+    Enough for an exact median/min/max without keeping every value
+    """
+
+    def __init__(self):
+        self.counts = Counter()
+        self.total = 0
+
+    def add(self, value, count=1):
+        self.counts[value] += count
+        self.total += count
+
+    def update(self, values):
+        for value in values:
+            self.add(value)
+
+    def merge(self, other):
+        self.counts.update(other.counts)
+        self.total += other.total
+
+    def min(self):
+        return min(self.counts)
+
+    def max(self):
+        return max(self.counts)
+
+    def nth(self, n):
+        """
+        The n'th (0 indexed) value, if they were all sorted
+        """
+        seen = 0
+        for value in sorted(self.counts):
+            seen += self.counts[value]
+            if seen > n:
+                return value
+        raise IndexError(f"{n} out of range for {self.total} values")
+
+    def median(self):
+        """
+        Same as statistics.median would give for the raw values
+        """
+        if self.total == 0:
+            raise ValueError("no median for empty histogram")
+        middle = self.total // 2
+        if self.total % 2 == 1:
+            return self.nth(middle)
+        return (self.nth(middle - 1) + self.nth(middle)) / 2
+
+    def __len__(self):
+        return self.total
+
+
+class Tally:
+    """
+    Running totals of everything calc_stats / calc_card_stats report on.
+    Per-type totals are lists, indexed by the type's id
+    """
+
+    def __init__(self):
+        self.games = 0
+
+        # Outcome name ('White', 'Tie', etc) -> number of games
+        self.outcomes = Counter()
+        # Family -> number of games each pilot/mech/upgrade was on the winner
+        self.wins = {
+            family: [0] * len(family.types_by_id)
+            for family in [Pilot, Mech, Upgrade]
+        }
+
+        self.turns = Histogram()
+        self.first_blood = Histogram()
+        self.combat_length = Histogram()
+        self.no_weapons = 0
+        self.cards_per_turn = Histogram()
+        self.melt_dmg = Histogram()
+        self.weapon_dmg = Histogram()
+
+        # Number of (long) games each card type was played in
+        n_cards = len(Card.types_by_id)
+        self.long_games = 0
+        self.card_games = [0] * n_cards
+        self.long_card_games = [0] * n_cards
+
+        # Number of games the winner (or loser) played each card/step type
+        n_steps = len(Step.types_by_id)
+        self.card_wins = [0] * n_cards
+        self.card_losses = [0] * n_cards
+        self.step_wins = [0] * n_steps
+        self.step_losses = [0] * n_steps
+
+    def rate_counts(self, cards=False):
+        """
+        The count behind every 'x% of games' rate the Statistician reports,
+        by the same name as it's stat
+        (card / step rates if 'cards', otherwise pilot / mech / upgrade)
+        """
+        counts = {}
+        if cards:
+            for family, wins, losses in [
+                    (Card, self.card_wins, self.card_losses),
+                    (Step, self.step_wins, self.step_losses)]:
+                for t in family.types_by_id:
+                    name = f"{family.__name__} - {t.name}"
+                    counts[f"{name} wins"] = wins[t.type_id]
+                    counts[f"{name} losses"] = losses[t.type_id]
+            return counts
+
+        for family, wins in self.wins.items():
+            for t in family.types_by_id:
+                name = f"{family.__name__} - {t.short_name()} Wins"
+                counts[name] = wins[t.type_id]
+        for name in ["Tie", "None"]:
+            counts[f"Mech - {name} Wins"] = self.outcomes[name]
+        counts["No weapons"] = self.no_weapons
+        counts["Long games"] = self.long_games
+        return counts
+
+    def add(self, record):
+        """
+        Fold a finished game's record into the totals
+        """
+        self.games += 1
+        self.outcomes[OUTCOME_NAMES[record.outcome]] += 1
+
+        winner = record.winner
+        loser = record.loser
+        if winner is not None:
+            self.wins[Pilot][winner.pilot] += 1
+            self.wins[Mech][winner.mech] += 1
+            for upgrade in set(winner.upgrades):
+                self.wins[Upgrade][upgrade] += 1
+
+        self.turns.add(record.turns)
+        fb = record.first_blood_turn
+        if fb:
+            self.first_blood.add(fb)
+        self.combat_length.add(record.turns - fb if fb else 0)
+        if fb is None:
+            self.no_weapons += 1
+        self.cards_per_turn.update(record.turn_lengths)
+        self.melt_dmg.add(record.total_melt_dmg)
+        self.weapon_dmg.add(record.total_weapon_dmg)
+
+        is_long = record.turns > LONG_GAME_TURNS
+        cards = record.cards()
+        count_bits(self.card_games, cards)
+        if is_long:
+            self.long_games += 1
+            count_bits(self.long_card_games, cards)
+
+        if winner is not None:
+            count_bits(self.card_wins, winner.cards)
+            count_bits(self.step_wins, winner.steps)
+        if loser is not None:
+            count_bits(self.card_losses, loser.cards)
+            count_bits(self.step_losses, loser.steps)
+
+    def add_columns(self, c):
+        """
+        Fold in a whole store's worth of games at once (see StoredGames),
+        counting straight from it's columns rather than game by game
+        """
+        outcomes = c["outcome"]
+        turns = c["turns"]
+        first_blood = c["first_blood_turn"]
+        self.games += len(turns)
+
+        for outcome, n in Counter(outcomes).items():
+            self.outcomes[OUTCOME_NAMES[outcome]] += n
+
+        # Who won, and what did the winner / loser play?
+        for side, won in [("white", WHITE), ("black", BLACK)]:
+            lost = BLACK if won == WHITE else WHITE
+            for family, column in [
+                    (Pilot, "pilot"), (Mech, "mech"), (Upgrade, "upgrades")]:
+                ids = c[f"{side}_{column}"]
+                for (outcome, i), n in Counter(zip(outcomes, ids)).items():
+                    if outcome != won:
+                        continue
+                    if family is Upgrade:
+                        count_bits(self.wins[family], i, n)
+                    else:
+                        self.wins[family][i] += n
+
+            cards = c[f"{side}_cards"]
+            for (outcome, mask), n in Counter(zip(outcomes, cards)).items():
+                if outcome == won:
+                    count_bits(self.card_wins, mask, n)
+                    count_bits(self.step_wins, steps_mask(mask), n)
+                elif outcome == lost:
+                    count_bits(self.card_losses, mask, n)
+                    count_bits(self.step_losses, steps_mask(mask), n)
+
+        for (t, fb), n in Counter(zip(turns, first_blood)).items():
+            self.turns.add(t, n)
+            if fb:
+                self.first_blood.add(fb, n)
+                self.combat_length.add(t - fb, n)
+            else:
+                self.combat_length.add(0, n)
+                self.no_weapons += n
+        for value, n in Counter(c["turn_lengths"]).items():
+            self.cards_per_turn.add(value, n)
+        for value, n in Counter(c["melt_dmg"]).items():
+            self.melt_dmg.add(value, n)
+        for value, n in Counter(c["weapon_dmg"]).items():
+            self.weapon_dmg.add(value, n)
+
+        played = Counter(
+            (t > LONG_GAME_TURNS, w | b)
+            for t, w, b in zip(turns, c["white_cards"], c["black_cards"])
+        )
+        for (is_long, mask), n in played.items():
+            count_bits(self.card_games, mask, n)
+            if is_long:
+                self.long_games += n
+                count_bits(self.long_card_games, mask, n)
@@ -0,0 +1,162 @@
+import json
+import logging
+
+"""
+Structured events for what happens during a game (cards played, damage,
+overheating, etc), in place of building log messages as it goes.
+
+An event is it's kind plus raw fields (numbers, names), and is only turned
+into text if a sink wants text. Call sites check 'trace.on' first, so
+with no sinks, tracing costs one attribute check, and none of the fields
+(let alone messages) are worked out.
+
+Sinks:
+* LoggingSink: the old 'HotMech' log messages
+* JsonLinesSink: one JSON object per event, for tools
+* ListSink: keeps the events, e.g. for tests
+"""
+
+# Event kinds -> message, for sinks that want text
+MESSAGES = {
+    "game_start": "Starting {white} vs {black}",
+    "game_end": "{turns}t {winner} win: {white} {black}",
+    "card_game_end": (
+        "{turns}t {winner} win: \n{white} had {white_cards} "
+        "\n{black} had {black_cards}"
+    ),
+    "long_game": "Long: {turns} turns, {white} vs {black}",
+    "turn_start": "Starting turn {turn} - {side}",
+    "card_played": "{side} playing {card} ({should}/{can})",
+    "no_card": "{side} can't choose card {hand}",
+    "card_limit": "{side} reached card limit of {limit}",
+    "retired": "{side} retired {card} (deck: {deck} retired: {retired})",
+    "sacrifice": "Reduced {damage} to {reduced} by retiring {card}",
+    "took_hit": "Didn't reduce {damage} (will have {hp}/{max_hp})",
+    "no_sacrifice": "Couldn't reduce {damage}: {hand}",
+    "damage": "Dealt {damage} to {side}",
+    "first_blood": "First blood at {turn}",
+    "attack": "{side} attacked for {damage}",
+    "force_rotate": "Forcefully rotated {side} to {rotation}",
+    "overheat": "{side} {mech} overheated for {melt}",
+    "long_turn": "Long turn: {side} played {cards} cards",
+    "lost_cards": "{side} has {cards} cards, should have {expected}",
+    "exception": "Game crashed on turn {turn}: {error}",
+}
+
+# Every sink events go to - tracing is on whenever there are any
+sinks = []
+on = False
+
+
+class Event:
+    __slots__ = ("kind", "fields")
+
+    def __init__(self, kind, fields):
+        self.kind = kind
+        self.fields = fields
+
+    def message(self):
+        return MESSAGES[self.kind].format(**self.fields)
+
+    def to_dict(self):
+        return {"event": self.kind, **self.fields}
+
+    def __str__(self):
+        return self.message()
+
+    def __repr__(self):
+        return f"Event({self.kind}, {self.fields})"
+
+
+def emit(kind, **fields):
+    """
+    Send an event to every sink (only call if 'on')
+    """
+    event = Event(kind, fields)
+    for sink in sinks:
+        sink(event)
+
+
+def add_sink(sink):
+    global on
+    sinks.append(sink)
+    on = True
+    return sink
+
+
+def remove_sink(sink):
+    global on
+    sinks.remove(sink)
+    on = bool(sinks)
+
+
+def side(player):
+    """
+    'white' or 'black', for a player's events
+    """
+    return "white" if player is player.game_state.white else "black"
+
+
+def card_names(cards):
+    return [c.name for c in cards]
+
+
+class LoggingSink:
+    """
+    Events as messages on the 'HotMech' logger. Attached with
+    'trace.add_sink(LoggingSink())', and with the logger at INFO or lower,
+    shows a game play by play
+    """
+
+    def __init__(self, logger=None, level=logging.INFO):
+        self.logger = logger or logging.getLogger("HotMech")
+        self.level = level
+
+    def __call__(self, event):
+        if self.logger.isEnabledFor(self.level):
+            self.logger.log(self.level, event.message())
+
+
+class JsonLinesSink:
+    """
+    One JSON object per line, per event
+    """
+
+    def __init__(self, file):
+        self.file = open(file, "w") if isinstance(file, str) else file
+
+    def __call__(self, event):
+        self.file.write(json.dumps(event.to_dict()) + "\n")
+
+    def close(self):
+        self.file.close()
+
+
+class ListSink:
+    """
+    Keeps every event
+    """
+
+    def __init__(self):
+        self.events = []
+
+    def __call__(self, event):
+        self.events.append(event)
+
+    def kinds(self):
+        return [e.kind for e in self.events]
+
+
+class tracing:
+    """
+    Send events to a sink for the length of a 'with' block
+    """
+
+    def __init__(self, sink):
+        self.sink = sink
+
+    def __enter__(self):
+        return add_sink(self.sink)
+
+    def __exit__(self, *exc):
+        remove_sink(self.sink)
@@ -28,6 +28,26 @@ def get_range(range_a, range_b=None):
         else:
             return (0, range_a)
 
+def to_mask(ids):
+    """
+    Turn some small integer ids into a bit mask, with bit 'id' set for each
+    """
+    mask = 0
+    for i in ids:
+        mask |= 1 << i
+    return mask
+
+def mask_ids(mask):
+    """
+    The ids of the bits set in a bit mask, lowest first
+    """
+    ids = []
+    while mask:
+        lowest = mask & -mask
+        ids.append(lowest.bit_length() - 1)
+        mask ^= lowest
+    return ids
+
 class NamedClassMeta(type):
     """
     Just a little helper metaclass to keep track of each types name
@@ -72,3 +92,28 @@ class NamedClass(metaclass=NamedClassMeta):
         # Register each subclass in the all_cards dictionary
         cls.all_named_types[cls.__name__] = cls
         # TODO check for conflict here
+
+        # Each family of types (Card, Step, Mech, etc) defines it's own
+        # 'all_types'. Within a family, hand out dense integer ids in
+        # definition order, so records/stats can use small ints and
+        # list indexing rather than names.
+        # (So ids stay comparable between runs, add new types at the end)
+        if "all_types" in cls.__dict__:
+            # The family itself
+            cls.types_by_id = []
+        elif hasattr(cls, "all_types"):
+            redefined = cls.all_types.get(cls.__name__)
+            if redefined is not None:
+                # Same name, same id
+                cls.type_id = redefined.type_id
+                cls.types_by_id[cls.type_id] = cls
+            else:
+                cls.type_id = len(cls.types_by_id)
+                cls.types_by_id.append(cls)
+
+    @classmethod
+    def by_id(cls, type_id):
+        """
+        Look up a type in this family by it's integer id
+        """
+        return cls.types_by_id[type_id]
@@ -0,0 +1,100 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+
+"""
+Jobs run in worker processes, surviving a worker that dies outright
+(a segfault, os._exit, the OOM killer) - which a multiprocessing.Pool
+never notices, waiting forever on the job it lost.
+
+Only a couple of jobs per worker are handed out at a time, so when a
+worker dies (which breaks the whole pool) only the jobs still running
+could have been the cause. Each of those is played again, a part at a
+time (e.g. a chunk of games one game at a time), in a worker of it's
+own: a part that kills it is 'lost' (handed to a callback, e.g. to
+quarantine that game) and a new worker carries on with the rest.
+The other jobs carry on in a fresh pool.
+"""
+
+# Jobs handed out at once, per worker
+IN_FLIGHT = 2
+
+
+def each_item(chunk):
+    """
+    Split a chunk (list) into one item chunks, see pool_map
+    """
+    return [[item] for item in chunk]
+
+
+def joined(results):
+    """
+    The results of a chunk's parts as one list, see pool_map
+    """
+    return [result for part in results for result in part]
+
+
+def pool_map(func, jobs, workers, lost, split=each_item, join=joined,
+             initializer=None, initargs=()):
+    """
+    func(job) for every job, in order, over 'workers' processes
+    (func must be picklable, the rest are called here).
+    A job that was running when a worker died is played again as
+    split(job)'s parts, join()ed back up - with lost(part) for any part
+    that kills the worker playing it. By default, jobs are lists and
+    func gives a list of results for them, one per item
+    """
+    jobs = list(jobs)
+    todo = deque(range(len(jobs)))
+    done = {}
+    yielded = 0
+    while todo:
+        suspects = []
+        with ProcessPoolExecutor(workers, None, initializer, initargs) as pool:
+            running = {}
+            try:
+                while todo or running:
+                    while todo and len(running) < workers * IN_FLIGHT:
+                        i = todo.popleft()
+                        running[pool.submit(func, jobs[i])] = i
+                    finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        done[running[future]] = future.result()
+                        del running[future]
+                    while yielded in done:
+                        yield done.pop(yielded)
+                        yielded += 1
+            except BrokenProcessPool:
+                suspects = sorted(running.values())
+
+        for i in suspects:
+            parts = run_alone(
+                func, split(jobs[i]), lost, initializer, initargs)
+            done[i] = join(parts)
+        while yielded in done:
+            yield done.pop(yielded)
+            yielded += 1
+
+
+def run_alone(func, parts, lost, initializer=None, initargs=()):
+    """
+    [func(part) for part in parts], one at a time in a worker of their
+    own. A part that kills the worker gives lost(part) instead, and a new
+    worker carries on with the rest
+    """
+    results = []
+    pool = None
+    try:
+        for part in parts:
+            if pool is None:
+                pool = ProcessPoolExecutor(1, None, initializer, initargs)
+            try:
+                results.append(pool.submit(func, part).result())
+            except BrokenProcessPool:
+                results.append(lost(part))
+                pool.shutdown()
+                pool = None
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return results
@@ -0,0 +1,79 @@
+"""
+Where a player's cards are: deck, hand, discard pile, retired.
+
+A Zone is an ordered set of cards (a dict of card -> None, so it keeps
+the order cards came in, like the lists it replaces) and each card knows
+which zone it's in - so checking if a card is in a zone, or moving it to
+another, doesn't have to look through every card, however big the deck
+gets. (Being a dict, len / in / iterating cost no more than a list's)
+
+Cards are always in (at most) one zone: appending a card to a zone takes
+it out of the one it was in.
+"""
+
+
+class Zone(dict):
+    __slots__ = ("name",)
+
+    def __init__(self, name, cards=()):
+        super().__init__()
+        self.name = name
+        for card in cards:
+            self.append(card)
+
+    def append(self, card):
+        """
+        Move a card to the end of this zone (from wherever it was)
+        """
+        zone = card.zone
+        if zone is not None:
+            del zone[card]
+        self[card] = None
+        card.zone = self
+
+    def remove(self, card):
+        if card.zone is not self:
+            raise ValueError(f"{card} is not in {self.name}")
+        del self[card]
+        card.zone = None
+
+    def pop(self):
+        """
+        Take the last card out (e.g. the top of the deck)
+        """
+        card = self.popitem()[0]
+        card.zone = None
+        return card
+
+    def replace(self, cards):
+        """
+        Make these cards (in this order) the whole zone
+        """
+        cards = list(cards)
+        for card in self:
+            card.zone = None
+        self.clear()
+        for card in cards:
+            self.append(card)
+
+    def index(self, card):
+        # (Only for logs, see game_log.py)
+        return list(self).index(card)
+
+    def __eq__(self, other):
+        # (Order matters, unlike for dicts)
+        if isinstance(other, (Zone, list)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    __hash__ = None
+
+    def __add__(self, other):
+        return list(self) + list(other)
+
+    def __repr__(self):
+        return repr(list(self))
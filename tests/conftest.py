@@ -1,6 +1,8 @@
 import pytest
 import random
 import logging
+
+from src import trace
 # Configure info for all other tests.
 # Run tests using:
 # seba
@@ -30,6 +32,17 @@ def app(request):
 
     # clean up / reset resources here
 
+@pytest.fixture(autouse=True)
+def play_by_play(request):
+    # Games only log as they go with a LoggingSink attached (see trace.py),
+    # so attach one when asked to show logs (--log-cli-level)
+    if request.config.getoption("log_cli_level") is None:
+        yield
+        return
+    logging.getLogger("HotMech").setLevel(logging.DEBUG)
+    with trace.tracing(trace.LoggingSink()):
+        yield
+
 @pytest.fixture()
 def runner(app):
     return app.test_cli_runner()
@@ -0,0 +1,26 @@
+from src.engine_check import check_batch
+from src.statistician import Statistician
+from src.budget import Budget
+import src.statistician as statistician
+
+def test_batch_matches():
+    # Real and card games, same as playing them one at a time
+    assert check_batch(50) == 0
+    assert check_batch(50, card_game=True) == 0
+
+def campaign(budget=None, workers=1):
+    s = Statistician(seed=0, fast=True, budget=budget, workers=workers)
+    s.run_simulations(40)
+    s.run_card_simulations(40)
+    return s
+
+def test_batched_campaign(monkeypatch):
+    budget = Budget(card_plays=60)
+    alone = campaign(budget)
+    monkeypatch.setattr(statistician, "MIN_BATCH", 1)
+    monkeypatch.setattr(statistician, "BATCH_SIZE", 15)
+    for s in [campaign(budget), campaign(budget, workers=2)]:
+        assert s.stats == alone.stats
+        # Going over budget skips the same games
+        assert 0 < len(s.quarantine) < 80
+        assert s.quarantine.games == alone.quarantine.games
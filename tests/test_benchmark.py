@@ -0,0 +1,10 @@
+from src import benchmark
+
+def test_benchmarks_run():
+    results = benchmark.run(quick=True, rounds=1)
+    assert set(results) == set(benchmark.BENCHMARKS)
+    assert all(ns > 0 for ns in results.values())
+
+    baseline = dict(results, **{"mech/check_heat": 1})
+    slower = benchmark.regressions(results, baseline, slowdown=0.2)
+    assert [name for name, _, _ in slower] == ["mech/check_heat"]
@@ -0,0 +1,46 @@
+from src.statistician import Statistician
+from src.fast_game import FastGame
+from src.batch_game import BatchGames
+from src.sweep import sweep, all_loadouts
+from src.budget import Budget
+import src.statistician as statistician
+
+def test_budget(tmp_path, monkeypatch):
+    budget = Budget(card_plays=60)
+    path = tmp_path / "quarantine.jsonl"
+    real = Statistician(seed=0, budget=budget, quarantine=str(path))
+    real.run_simulations(20)
+    fast = Statistician(seed=0, budget=budget, fast=True)
+    fast.run_simulations(20)
+    assert 0 < len(real.quarantine) < 20
+    assert real.tally.games + len(real.quarantine) == 20
+    # Both engines go over budget in the same games
+    assert [g["seed"] for g in real.quarantine.games] == (
+        [g["seed"] for g in fast.quarantine.games])
+    with open(path) as f:
+        assert len(f.readlines()) == len(real.quarantine)
+
+    # A game that crashes only loses itself, even in a worker
+    # (or a lockstep batch, whose games are then played one at a time)
+    damage_enemy = FastGame.damage_enemy
+
+    def crash(self, attacker, ammount):
+        if self.turns > 20:
+            raise RuntimeError("boom")
+        return damage_enemy(self, attacker, ammount)
+
+    def crash_batch(self, side, rows, ammount):
+        raise RuntimeError("boom")
+    monkeypatch.setattr(FastGame, "damage_enemy", crash)
+    monkeypatch.setattr(BatchGames, "damage_enemy", crash_batch)
+    monkeypatch.setattr(statistician, "MIN_BATCH", 1)
+    for s in [Statistician(seed=0, fast=True, workers=2),
+              Statistician(seed=0, fast=True)]:
+        s.run_simulations(20)
+        s.run_card_simulations(20)
+        assert 0 < len(s.quarantine) < 40
+        assert s.tally.games + len(s.quarantine) == 40
+        assert set(s.quarantine.reasons()) == {"crash"}
+
+    matrix = sweep(4, 1, 0, all_loadouts()[:4])
+    assert len(matrix.skipped) > 0
@@ -288,3 +288,52 @@ def test_names():
     short_names = [c.short_name() for c in all_stuff]
     assert len(all_stuff) == len(set(names))
     assert len(all_stuff) == len(set(short_names))
+
+def test_playability_cache(monkeypatch):
+    w, b = get_players()
+    card = cards.LooseMissile(GameState.get_last(), w)
+    w.hand.append(card)
+    b.location = (13, 0)
+    assert not card.can()
+
+    # Asking again about the same board doesn't work it out again
+    evaluated = []
+    evaluate = cards.Card.evaluate
+
+    def counted_evaluate(self):
+        evaluated.append(self)
+        evaluate(self)
+    monkeypatch.setattr(cards.Card, "evaluate", counted_evaluate)
+    assert not card.can()
+    assert card.how_many_can() == 0
+    assert not card.should()
+    assert evaluated == []
+
+    # But once the board changes it does, e.g. moving in range
+    b.location = (10, 0)
+    assert card.can()
+    assert card.how_many_can() == len(card.steps)
+    assert card.all_can()
+    assert evaluated == [card]
+    version = w.game_state.board_version
+    w.mech.heat += 1
+    assert w.game_state.board_version > version
+
+def test_card_traits():
+    # Worked out once per type, the same as looking through the steps
+    for card_type in cards.Card.all_types.values():
+        steps = card_type.steps
+        attacks = [s for s in steps if isinstance(s, cards.Attack)]
+        assert card_type.is_attack() == (attacks != [])
+        assert card_type.is_move() == any(
+            isinstance(s, (cards.MoveForward, cards.MoveAway))
+            for s in steps)
+        assert card_type.is_control() == (
+            not card_type.is_attack() and not card_type.is_move())
+        assert card_type.can_block() == (card_type.heat > 0)
+        assert card_type.traits.damage == max(
+            (s.damage for s in attacks), default=0)
+        assert card_type.traits.cost == sum(s.cost() for s in steps) - 1
+        for kind in ["attack", "move", "control"]:
+            assert (card_type in cards.Card.of_kind(kind)) == (
+                getattr(card_type.traits, kind))
@@ -0,0 +1,9 @@
+from src.engine_check import reference_state, fast_state, differences
+
+def test_fast_engine_matches():
+    for seed in range(50):
+        for card_game in [False, True]:
+            assert differences(
+                reference_state(seed, card_game),
+                fast_state(seed, card_game),
+            ) == []
@@ -0,0 +1,27 @@
+import json
+import pytest
+
+from src.statistician import simulate_game
+from src.game_state import GameState
+from src.flight_recorder import FlightRecorder
+from src import trace
+
+def test_flight_recorder(tmp_path, monkeypatch):
+    recorder = FlightRecorder(str(tmp_path), size=20)
+    with trace.tracing(recorder):
+        simulate_game(3)
+    # A normal game leaves nothing behind
+    assert recorder.dumps == []
+
+    def crash(self, attacker, ammount):
+        raise RuntimeError("boom")
+    monkeypatch.setattr(GameState, "damage_enemy", crash)
+    with trace.tracing(recorder):
+        with pytest.raises(RuntimeError):
+            simulate_game(3)
+    assert len(recorder.dumps) == 1
+    with open(recorder.dumps[0]) as f:
+        lines = [json.loads(line) for line in f]
+    assert lines[0]["trigger"] == "exception" and lines[0]["seed"] == 3
+    assert len(lines) - 1 <= 20
+    assert lines[-1]["event"] == "exception"
@@ -0,0 +1,26 @@
+from src.engine_check import record_state, differences
+from src.game_log import GameLog, record_game, replay_game
+from src.game_record import GameRecord
+from src.budget import Budget
+
+def test_replay():
+    for seed in range(30):
+        game_state, log = record_game(seed)
+        replayed = replay_game(GameLog.from_bytes(log.to_bytes()))
+        assert differences(
+            record_state(GameRecord(game_state)),
+            record_state(GameRecord(replayed)),
+        ) == []
+        assert replayed.white.location == game_state.white.location
+        assert [c.name for c in replayed.black.hand] == [
+            c.name for c in game_state.black.hand]
+
+    # Games cut short by a lower turn limit replay the same way
+    for seed in range(5):
+        game_state, log = record_game(seed, budget=Budget(turns=10))
+        replayed = replay_game(GameLog.from_bytes(log.to_bytes()))
+        assert replayed.turns == game_state.turns <= 10
+        assert differences(
+            record_state(GameRecord(game_state)),
+            record_state(GameRecord(replayed)),
+        ) == []
@@ -0,0 +1,36 @@
+from src.statistician import Statistician
+from src.game_record import GameRecord, steps_mask
+from src.card import Card
+from src.utils import to_mask, mask_ids
+import src.statistician as statistician
+
+def test_masks():
+    assert to_mask([]) == 0
+    assert mask_ids(to_mask([5, 0, 63, 5])) == [0, 5, 63]
+
+    # A card mask's steps are every step on those cards
+    for cards in [Card.types_by_id[:1], Card.types_by_id[3:9]]:
+        step_ids = {type(s).type_id for ct in cards for s in ct.steps}
+        assert set(mask_ids(steps_mask(
+            to_mask(ct.type_id for ct in cards)))) == step_ids
+
+def test_played_masks(monkeypatch):
+    # Each side's masks are the card / step types it played
+    game_states = []
+
+    def keep_game(game_state):
+        game_states.append(game_state)
+        return GameRecord(game_state)
+    monkeypatch.setattr(statistician, "GameRecord", keep_game)
+
+    s = Statistician(seed=3, keep_games=True)
+    s.run_card_simulations(20)
+    for game_state, record in zip(game_states, s.games):
+        for player, side in [
+                (game_state.white, record.white),
+                (game_state.black, record.black)]:
+            played = player.played_cards
+            assert mask_ids(side.cards) == sorted(
+                {ct.type_id for ct in played})
+            assert mask_ids(side.steps) == sorted(
+                {type(s).type_id for ct in played for s in ct.steps})
@@ -0,0 +1,8 @@
+from src.game_rng import GameRng
+
+def test_dice():
+    rng = GameRng(0)
+    rolls = [rng.roll("melt") for i in range(6000)]
+    assert set(rolls) == {0, 1, 2, 3, 4, 5}
+    # Same seed, same rolls
+    assert GameRng(0).roll("melt") == rolls[0]
@@ -0,0 +1,24 @@
+from src.engine_check import record_state, differences
+from src.game_rng import GameRng
+from src.game_record import GameRecord
+from src.game_state import GameState
+from src.fast_game import FastGame
+from src.player import Choices
+
+def test_fork():
+    # A fork (and the fast engine's copy) plays out just like the original
+    for seed in range(20):
+        rng = GameRng(seed)
+        game_state = GameState(Choices(rng=rng), Choices(rng=rng), rng)
+        game_state.start()
+        for i in range(seed % 10):
+            game_state.play_turn()
+        forked = game_state.fork()
+        fast = FastGame.from_game_state(game_state).fork()
+
+        for game in [game_state, forked, fast]:
+            while not game.play_turn():
+                pass
+        expected = record_state(GameRecord(game_state))
+        assert differences(expected, record_state(GameRecord(forked))) == []
+        assert differences(expected, record_state(fast.record())) == []
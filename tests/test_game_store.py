@@ -0,0 +1,143 @@
+import json
+import pytest
+from array import array
+
+from src.engine_check import record_state, differences
+from src.statistician import Statistician
+from src.game_store import GameStore, StoredGames
+from src.tally import Tally, Histogram
+import src.game_store as game_store
+from src.card import Card
+from src.utils import to_mask, mask_ids
+
+def played_games(seed=0, number=30):
+    # Real games and card games (which play many more card types)
+    s = Statistician(seed=seed, fast=True, keep_games=True)
+    s.run_simulations(number)
+    s.run_card_simulations(number)
+    return s.games
+
+def stored_state(record):
+    # (The store only keeps which upgrades were fitted, not how often)
+    state = record_state(record)
+    for name in ["white_record", "black_record"]:
+        state[name]["upgrades"] = sorted(set(state[name]["upgrades"]))
+    return state
+
+def assert_same_games(expected, actual):
+    assert len(expected) == len(actual)
+    for e, a in zip(expected, actual):
+        assert differences(stored_state(e), stored_state(a)) == []
+
+def write(path, games):
+    with GameStore(path) as store:
+        for record in games:
+            store.append(record)
+
+def tally_state(tally):
+    return {
+        name: value.counts if isinstance(value, Histogram) else value
+        for name, value in vars(tally).items()
+    }
+
+def test_round_trip(tmp_path):
+    games = played_games()
+    write(tmp_path, games)
+    assert StoredGames.count(tmp_path) == len(games)
+    with StoredGames(tmp_path) as stored:
+        assert len(stored) == len(games)
+        assert_same_games(games, list(stored.records()))
+        assert_same_games(games[5:6], [stored.record(5)])
+
+def test_reopen_and_append(tmp_path, monkeypatch):
+    # Flushing part way, and appending to an existing store, carries on
+    # where the turn lengths left off
+    monkeypatch.setattr(game_store, "FLUSH_EVERY", 7)
+    games = played_games()
+    write(tmp_path, games[:25])
+    write(tmp_path, games[25:40])
+    with GameStore(tmp_path) as store:
+        assert len(store) == 40
+        assert store.turn_lengths_end == sum(
+            len(record.turn_lengths) for record in games[:40])
+        for record in games[40:]:
+            store.append(record)
+    with StoredGames(tmp_path) as stored:
+        assert_same_games(games, list(stored.records()))
+
+def test_long_turns(tmp_path):
+    # More cards in a turn than fit in a byte
+    games = played_games(number=2)
+    games[0].turn_lengths = (300, 1000) + games[0].turn_lengths[2:]
+    write(tmp_path, games)
+    with StoredGames(tmp_path) as stored:
+        assert stored.record(0).turn_lengths[:2] == (300, 1000)
+        assert_same_games(games, list(stored.records()))
+
+def test_add_columns(tmp_path):
+    # Counting straight from the columns gives the same totals as
+    # adding the games one by one
+    games = played_games()
+    write(tmp_path, games)
+    one_by_one = Tally()
+    for record in games:
+        one_by_one.add(record)
+    columns = Tally()
+    with StoredGames(tmp_path) as stored:
+        columns.add_columns(stored.columns)
+    assert tally_state(columns) == tally_state(one_by_one)
+
+    # And so does loading the store
+    s = Statistician()
+    s.load_games(tmp_path)
+    assert tally_state(s.tally) == tally_state(one_by_one)
+
+def test_changed_cards(tmp_path, monkeypatch):
+    # Games played with different cards can't be added to a store,
+    # but the ones already there can still be read
+    games = played_games(number=2)
+    write(tmp_path, games)
+    card_type = Card.types_by_id[0]
+    monkeypatch.setattr(card_type, "heat", card_type.heat + 1)
+    with pytest.raises(ValueError, match=card_type.__name__):
+        GameStore(tmp_path)
+    with StoredGames(tmp_path) as stored:
+        assert_same_games(games, list(stored.records()))
+
+def reverse_ids(path):
+    # Make a store look like it was written with every family's types
+    # defined in reverse order
+    with open(path / "schema.json") as f:
+        schema = json.load(f)
+    for side in ["white", "black"]:
+        for column, (family, is_mask) in game_store.ID_COLUMNS.items():
+            last = len(schema["names"][family]) - 1
+            name = f"{side}_{column}"
+            with StoredGames(path) as stored:
+                ids = list(stored[name])
+            if is_mask:
+                ids = [to_mask(last - i for i in mask_ids(m)) for m in ids]
+            else:
+                ids = [last - i for i in ids]
+            with open(path / f"{name}.col", "wb") as f:
+                array(schema["columns"][name], ids).tofile(f)
+    for names in schema["names"].values():
+        names.reverse()
+    with open(path / "schema.json", "w") as f:
+        json.dump(schema, f)
+    return schema
+
+def test_reordered_types(tmp_path):
+    # A store read after the types were re-ordered gives the same games
+    games = played_games()
+    write(tmp_path, games)
+    schema = reverse_ids(tmp_path)
+    with StoredGames(tmp_path) as stored:
+        assert_same_games(games, list(stored.records()))
+
+    # But not after a type was removed
+    schema["names"]["card"].append("NoSuchCard")
+    with open(tmp_path / "schema.json", "w") as f:
+        json.dump(schema, f)
+    with pytest.raises(ValueError, match="NoSuchCard"):
+        StoredGames(tmp_path)
@@ -0,0 +1,26 @@
+from src.sweep import sweep, all_loadouts, all_pairs
+from src.incremental import DependencyIndex, update_matrix
+from src.upgrade import Upgrade
+
+def test_incremental_sweep():
+    loadouts = all_loadouts()[:12]
+    full = sweep(4, 1, 0, loadouts)
+
+    # Nothing changed, nothing to play
+    matrix, cards, entities, played = update_matrix(full, loadouts)
+    assert (cards, entities, played) == ([], [], 0)
+    assert matrix.to_dict() == full.to_dict()
+
+    # Pretend one upgrade's card was edited since the sweep
+    upgrade = Upgrade.by_id(loadouts[-1][2][-1])
+    card_type = upgrade.card_types[0]
+    full.fingerprints["Card"][card_type.__name__] = "edited"
+    index = DependencyIndex(loadouts)
+    assert upgrade in index.entities_with([card_type])
+    affected = index.affected_pairs([card_type])
+    assert 0 < len(affected) < len(all_pairs(loadouts))
+
+    matrix, cards, entities, played = update_matrix(full, loadouts)
+    assert cards == [card_type] and played == len(affected)
+    # (The card didn't really change, so the games come out the same)
+    assert matrix.to_dict()["wins"] == full.to_dict()["wins"]
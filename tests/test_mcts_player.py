@@ -0,0 +1,83 @@
+import multiprocessing
+from functools import partial
+
+from src.engine_check import record_state, differences
+from src.game_rng import GameRng
+from src.statistician import simulate_game
+from src.game_state import GameState
+from src.player import Choices
+from src.mcts_player import MctsPlayer, search
+from src.fast_game import FastGame
+from src.budget import Budget
+
+def test_mcts_player():
+    # Plays whole games, the same way every time for a seed
+    player_type = partial(MctsPlayer, rollouts=10, horizon=3)
+    for seed in range(3):
+        assert differences(
+            record_state(simulate_game(seed, player_type=player_type)),
+            record_state(simulate_game(seed, player_type=player_type)),
+        ) == []
+
+    # Playing just one side, it starts where that side should, with the
+    # same deck it would have had
+    for seed in range(2):
+        games = []
+        for side_type in [None, player_type]:
+            rng = GameRng(seed)
+            choices = Choices(rng=rng)
+            black = Choices(
+                choices.pilot_type, choices.mech_type, choices.upgrade_types,
+                player_type=side_type
+            )
+            games.append(GameState(choices, black, rng))
+        heuristic, mcts = games
+        assert isinstance(mcts.black, MctsPlayer)
+        assert mcts.black.location == (18, 0) and mcts.black.rotation == 180
+        for name in ["white", "black"]:
+            assert [c.name for c in getattr(mcts, name).deck] == (
+                [c.name for c in getattr(heuristic, name).deck])
+
+def test_mcts_budget():
+    # Looking ahead doesn't use up the real game's budget
+    rng = GameRng(0)
+    game_state = GameState(
+        Choices(rng=rng), Choices(rng=rng), rng,
+        player_type=partial(MctsPlayer, rollouts=10),
+        budget=Budget(card_plays=10, seconds=60)
+    )
+    game_state.start()
+    game_state.card_plays = 10
+    player = game_state.white
+    player.my_turn = True
+    player.choose_card()
+    assert player.total_rollouts > 0
+    assert game_state.card_plays == 10
+
+def test_mcts_hidden_cards():
+    # The search can't tell where the cards it can't see really are
+    rng = GameRng(0)
+    game_state = GameState(Choices(rng=rng), Choices(rng=rng), rng)
+    game_state.start()
+    game_state.white.my_turn = True
+    root = FastGame.from_game_state(game_state, GameRng(1))
+    shuffled = root.fork()
+    shuffled.white.deck.reverse()
+    enemy = shuffled.black
+    enemy.hand[0], enemy.deck[-1] = enemy.deck[-1], enemy.hand[0]
+    actions = search(root, True, 40, None, 7, 3, 1.4)
+    assert actions and actions == search(shuffled, True, 40, None, 7, 3, 1.4)
+
+def test_mcts_workers():
+    # Their own processes are closed once the game's over
+    player_type = partial(MctsPlayer, rollouts=4, workers=2, horizon=2)
+    simulate_game(0, player_type=player_type)
+    assert multiprocessing.active_children() == []
+
+    # ...and a pool of the caller's is shared between games, and left open
+    with multiprocessing.Pool(2) as pool:
+        player_type = partial(
+            MctsPlayer, rollouts=4, workers=2, horizon=2, pool=pool)
+        for seed in range(2):
+            simulate_game(seed, player_type=player_type)
+        assert pool.apply(abs, (-1,)) == 1
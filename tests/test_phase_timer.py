@@ -0,0 +1,26 @@
+from src.statistician import Statistician
+from src.player import Player
+
+def test_phase_timer():
+    original = Player.choose_card
+    stats = []
+    for timing in [False, True]:
+        s = Statistician(seed=2, timing=timing)
+        s.run_simulations(20)
+        stats.append(s.stats)
+    # Timing doesn't change the games, and is put away after
+    assert stats[0] == stats[1]
+    assert Player.choose_card is original
+    calls, ns = s.timer.totals["decision"]
+    assert calls > 0 and 0 < ns < s.timer.elapsed
+    assert "step Attack" in s.timer.summary()
+
+    # Games played in workers are timed there, and added up
+    workers = Statistician(seed=2, timing=True, workers=2)
+    workers.run_simulations(20)
+    assert workers.workers == 2
+    assert workers.stats == stats[0]
+    assert {
+        phase: calls for phase, (calls, ns) in workers.timer.totals.items()
+    } == {phase: calls for phase, (calls, ns) in s.timer.totals.items()}
+    assert 0 < workers.timer.totals["decision"][1] < workers.timer.elapsed
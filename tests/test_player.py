@@ -0,0 +1,78 @@
+import math
+
+from src import benchmark
+
+def test_hand_picks():
+    # Picking cards without sorting gives the cards sorting would
+    for seed in range(20):
+        game_state, player = benchmark.canned_game(seed)
+        assert player.best_in_hand() is player.sorted_hand()[0]
+        assert player.worst_in_hand() is player.sorted_hand(reverse=True)[0]
+
+        damage = player.mech.hp
+        blockers = [
+            c for c in player.sorted_hand(reverse=True)
+            if c.traits.should_block
+        ]
+        blockers.sort(key=lambda card: (
+            -card.heat == damage, -card.heat > damage, card.heat < damage))
+        expected = blockers[0] if blockers else None
+        assert player.get_sacrafice_card(damage) is expected
+
+def old_check_facing(player, add_angle=0, tolerance=45):
+    # check_facing as it was, comparing angles in degrees
+    check_rotation = player.rotation + add_angle
+    enemy = player.get_enemy()
+    dx = enemy.location[0] - player.location[0]
+    dy = enemy.location[1] - player.location[1]
+    angle_to_enemy = math.degrees(math.atan2(dy, dx)) % 360
+    lower_bound = (check_rotation - tolerance) % 360
+    upper_bound = (check_rotation + tolerance) % 360
+    if lower_bound < upper_bound:
+        return lower_bound <= angle_to_enemy <= upper_bound
+    return angle_to_enemy >= lower_bound or angle_to_enemy <= upper_bound
+
+def test_check_facing():
+    # Same answers as working it out in degrees, all the way round
+    # (including right on the edge of the tolerance)
+    game_state, player = benchmark.canned_game()
+    player.get_enemy().location = (0, 0)
+    for x in range(-6, 7):
+        for y in range(-6, 7):
+            player.location = (x, y)
+            for rotation in range(-360, 720, 15):
+                player.rotation = rotation
+                for add_angle in [0, 90, 180, 270]:
+                    for tolerance in [30, 45, 90]:
+                        assert player.check_facing(add_angle, tolerance) \
+                            == old_check_facing(player, add_angle, tolerance)
+
+def test_geometry_changes():
+    # What's worked out about the enemy's position is worked out again
+    # after either of us moves or turns
+    game_state, player = benchmark.canned_game()
+    enemy = player.get_enemy()
+    player.location = (0, 0)
+    player.rotation = 0
+    enemy.location = (4, 0)
+    assert player.distance_to_enemy() == 4
+    assert player.angle_to_enemy() == 0
+    assert player.facing_toward_enemy()
+    assert not player.facing_away()
+
+    player.rotate(180)
+    assert not player.facing_toward_enemy()
+    assert player.facing_away()
+
+    player.move(2)
+    assert math.isclose(player.location[0], -2)
+    assert math.isclose(player.distance_to_enemy(), 6)
+
+    enemy.location = (-2, 3)
+    assert math.isclose(player.distance_to_enemy(), 3)
+    assert math.isclose(player.angle_to_enemy(), 90)
+    assert not player.facing_away()
+
+    player.rotate_towards()
+    assert math.isclose(player.rotation, 90)
+    assert player.facing_toward_enemy()
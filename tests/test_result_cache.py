@@ -0,0 +1,34 @@
+from src.statistician import Statistician
+from src.sweep import sweep, all_loadouts
+from src.result_cache import ResultCache
+from src.game_store import StoredGames
+from src.upgrade import Upgrade
+
+def test_result_cache(tmp_path, monkeypatch):
+    loadouts = all_loadouts()[:6]
+    cache = ResultCache(tmp_path)
+    first = sweep(4, 1, 0, loadouts, cache=cache)
+    assert cache.hits == 0 and cache.misses == 21
+
+    again = sweep(4, 1, 0, loadouts, cache=cache)
+    assert again.to_dict() == first.to_dict()
+    assert cache.hits == 21
+
+    # Only the matchups with a changed upgrade are played again
+    upgrade = Upgrade.by_id(loadouts[-1][2][-1])
+    monkeypatch.setattr(upgrade, "max_hp", 1, raising=False)
+    changed = sum(upgrade.type_id in l[2] for l in loadouts)
+    sweep(4, 1, 0, loadouts, cache=cache)
+    n = len(loadouts)
+    unchanged = n - changed
+    assert cache.misses == 21 + (21 - unchanged * (unchanged + 1) // 2)
+
+    # Games from the cache are stored once per store, however many times
+    # (or with or without the cache) they're played into it
+    for store in [tmp_path / "today", tmp_path / "tomorrow"]:
+        for cache_path in [tmp_path, tmp_path, None]:
+            s = Statistician(
+                seed=0, fast=True, cache=cache_path, store=store)
+            s.run_simulations(20)
+            s.store.close()
+            assert StoredGames.count(store) == 20
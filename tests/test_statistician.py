@@ -0,0 +1,179 @@
+from statistics import median
+
+from src.engine_check import record_state, differences
+from src.statistician import Statistician, simulate_game
+from src.game_record import GameRecord
+from src.player import Player
+from src.mech import Mech
+from src.pilot import Pilot
+from src.upgrade import Upgrade
+from src.card import Card
+from src.card_steps import Step
+import src.statistician as statistician
+
+def test_same_seed_same_game():
+    # A game only depends on it's own seed, not the global random
+    for seed in range(20):
+        assert differences(
+            record_state(simulate_game(seed)),
+            record_state(simulate_game(seed)),
+        ) == []
+
+def test_workers_same_stats():
+    # However many workers play a campaign, it's the same games,
+    # merged in the same order, so the same stats
+    for fast in [False, True]:
+        campaigns = []
+        for workers in [1, 2, 3]:
+            s = Statistician(
+                workers=workers, seed=4, keep_games=True, fast=fast)
+            s.run_simulations(60)
+            stats = dict(s.stats)
+            s.run_card_simulations(40)
+            card_stats = dict(s.stats)
+            games = [record_state(record) for record in s.games]
+            campaigns.append((stats, card_stats, games))
+        assert campaigns[0] == campaigns[1] == campaigns[2]
+
+class PerGameStats:
+    """
+    How calc_stats / calc_card_stats used to work it all out, keeping
+    every finished GameState and going over them all again
+    """
+
+    def __init__(self, games):
+        self.games = games
+        self.stats = {}
+
+    def get_rate(self, games, as_int=False):
+        percent = round(len(list(games)) / len(self.games) * 100)
+        return percent if as_int else f"{percent}%"
+
+    def breakdown_by_name(self, named_class, add=[]):
+        names = [c.short_name() for c in named_class.all_types.values()]
+        for name in names + add:
+            self.stats[f"{named_class.__name__} - {name} Wins"] = (
+                self.get_rate(g for g in self.games if name in str(g.winner)))
+
+    def turn_info(self, t_list):
+        t_list = list(t_list)
+        return (
+            f"Median: {median(t_list)}t ({median(t_list) // 2})r"
+            + f" [{min(t_list)}-{max(t_list)}]"
+        )
+
+    def number_info(self, t_list):
+        t_list = list(t_list)
+        return f"Median: {median(t_list)} [{min(t_list)}-{max(t_list)}]"
+
+    def long_game_cards(self):
+        long_games = [g for g in self.games if g.turns > 50]
+        card_types = list(Card.all_types.values())
+        normal_card_count = dict.fromkeys(card_types, 0)
+        long_card_count = dict.fromkeys(card_types, 0)
+        for ct in card_types:
+            for game in self.games:
+                played_cards = set(
+                    game.white.played_cards + game.black.played_cards)
+                if ct not in played_cards:
+                    continue
+                normal_card_count[ct] += 1
+                if game.turns > 50:
+                    long_card_count[ct] += 1
+        long_card_ratio = {
+            k: round(v / max(len(long_games), 1), 2)
+            for k, v in long_card_count.items()
+        }
+        normal_card_ratio = {
+            k: round(v / len(self.games), 2)
+            for k, v in normal_card_count.items()
+        }
+        differential_ratio = {
+            k: round(long_card_ratio[k] - normal_card_ratio[k], 2)
+            for k in normal_card_ratio
+        }
+        freq_cards = sorted(differential_ratio.items(), key=lambda kv: -kv[1])
+        self.stats["Long games"] = self.get_rate(long_games)
+        self.stats["Cards seen in long games"] = "\n  " + (
+            "\n  ".join(f"{k.name}: {v}" for k, v in freq_cards[:10]))
+
+    def calc_stats(self):
+        self.breakdown_by_name(Mech, ["Tie", "None"])
+        self.breakdown_by_name(Pilot)
+        self.breakdown_by_name(Upgrade)
+        self.stats["Game Length"] = self.turn_info(g.turns for g in self.games)
+        self.stats["1st blood"] = self.turn_info(
+            g.first_blood_turn for g in self.games if g.first_blood_turn)
+        self.stats["Combat Length"] = self.turn_info(
+            (g.turns - g.first_blood_turn) if g.first_blood_turn else 0
+            for g in self.games
+        )
+        self.stats["No weapons"] = self.get_rate(
+            g for g in self.games if g.first_blood_turn is None)
+        self.stats["Cards per turn"] = self.number_info(
+            n for g in self.games for n in g.turn_lengths)
+        self.stats["Melt Damage"] = self.number_info(
+            g.total_melt_dmg for g in self.games)
+        self.stats["Weapon Damage"] = self.number_info(
+            g.total_weapon_dmg for g in self.games)
+        self.long_game_cards()
+
+    def calc_card_stats(self):
+        def card_type_in_game(game, card_type, loser=False):
+            player = game.loser if loser else game.winner
+            if not isinstance(player, Player):
+                return False
+            return card_type in set(player.played_cards)
+
+        def step_type_in_game(game, step_type, loser=False):
+            player = game.loser if loser else game.winner
+            if not isinstance(player, Player):
+                return False
+            return step_type in set(
+                type(s) for ct in player.played_cards for s in ct.steps)
+
+        def get_wins_vs_losses(named_type, in_game):
+            diff_dict = {}
+            rates = {}
+            for ct in named_type.all_types.values():
+                win_rate = self.get_rate(
+                    (g for g in self.games if in_game(g, ct)), as_int=True)
+                lose_rate = self.get_rate(
+                    (g for g in self.games if in_game(g, ct, loser=True)),
+                    as_int=True)
+                diff_dict[ct] = win_rate - lose_rate
+                rates[ct] = win_rate, lose_rate
+            by_attention = sorted(
+                diff_dict.items(), key=lambda kv: -abs(kv[1]))
+            for ct, diff in by_attention:
+                win_rate, lose_rate = rates[ct]
+                is_plus = "+" if diff > 0 else ""
+                self.stats[f"{named_type.__name__} - {ct.name}"] = (
+                    f"{is_plus}{diff}% ({win_rate}w% vs {lose_rate}l%)")
+
+        get_wins_vs_losses(Card, card_type_in_game)
+        get_wins_vs_losses(Step, step_type_in_game)
+        self.long_game_cards()
+
+def test_same_stats_as_per_game(monkeypatch):
+    # The running totals give the same stats as going over every game
+    game_states = []
+
+    def keep_game(game_state):
+        game_states.append(game_state)
+        return GameRecord(game_state)
+    monkeypatch.setattr(statistician, "GameRecord", keep_game)
+
+    s = Statistician(seed=5)
+    s.run_simulations(200)
+    assert len(game_states) == 200
+    per_game = PerGameStats(game_states)
+    per_game.calc_stats()
+    assert list(s.stats.items()) == list(per_game.stats.items())
+
+    s = Statistician(seed=5)
+    game_states.clear()
+    s.run_card_simulations(200)
+    per_game = PerGameStats(game_states)
+    per_game.calc_card_stats()
+    assert list(s.stats.items()) == list(per_game.stats.items())
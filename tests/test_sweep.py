@@ -0,0 +1,56 @@
+import random
+
+from src.sweep import sweep, all_loadouts, MIN_GAMES
+from src.tally import wilson_interval, clearly_not_even
+
+def test_sweep():
+    loadouts = all_loadouts()[:8]
+    matrix = sweep(4, 1, 0, loadouts)
+    # Worker count / unit order doesn't change the counts
+    assert matrix.to_dict() == sweep(4, 2, 0, loadouts).to_dict()
+    for i in range(len(loadouts)):
+        for j in range(len(loadouts)):
+            games, wins, ties = matrix.cell(i, j)
+            # (Mirror matches count for both sides)
+            assert games == (8 if i == j else 4)
+            assert wins + matrix.cell(j, i)[1] + ties <= 8
+
+def test_early_stopping():
+    low, high = wilson_interval(50, 100)
+    assert low < 0.5 < high
+    assert wilson_interval(0, 10)[0] == 0
+
+    loadouts = all_loadouts()[:6]
+    full = sweep(40, 1, 0, loadouts)
+    early = sweep(40, 1, 0, loadouts, precision=0.2)
+    assert sum(early.games) < sum(full.games)
+    # Never fewer than the minimum, and always both colors equally
+    for i in range(len(loadouts)):
+        for j in range(len(loadouts)):
+            games = early.cell(i, j)[0]
+            assert 10 <= games <= full.cell(i, j)[0] and games % 2 == 0
+
+def first_call(rng, rate, most_games):
+    # How many games until clearly_not_even, checked like settled does
+    # (None if it never is)
+    wins = 0
+    for played in range(1, most_games + 1):
+        wins += rng.random() < rate
+        if played >= MIN_GAMES and played % 2 == 0 and (
+                clearly_not_even(wins, played)):
+            return played
+    return None
+
+def test_clear_winners():
+    # Checking after every pair of games still only calls an even
+    # matchup for one side (at most) 5% of the time, however long it goes
+    rng = random.Random(0)
+    for most_games in [40, 200, 1000]:
+        called = sum(
+            first_call(rng, 0.5, most_games) is not None for i in range(500))
+        assert called / 500 <= 0.05
+    # ...while lopsided ones still stop early
+    games = [first_call(rng, 0.85, 200) for i in range(200)]
+    assert None not in games and sum(games) / len(games) < 30
+    # (Ties count as half a win)
+    assert not clearly_not_even(10 / 2, 10)
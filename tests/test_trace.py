@@ -0,0 +1,21 @@
+import json
+
+from src.engine_check import record_state, differences
+from src.statistician import simulate_game
+from src import trace
+
+def test_tracing():
+    sink = trace.ListSink()
+    with trace.tracing(sink):
+        traced = simulate_game(3)
+    assert sink not in trace.sinks
+    # Tracing doesn't change the game
+    assert differences(
+        record_state(simulate_game(3)), record_state(traced)) == []
+    kinds = sink.kinds()
+    assert kinds[0] == "game_start" and kinds[-1] == "game_end"
+    assert kinds.count("turn_start") == traced.turns
+    assert "card_played" in kinds
+    for event in sink.events:
+        assert event.message()
+        json.dumps(event.to_dict())
@@ -0,0 +1,49 @@
+import os
+from functools import partial
+
+from src.engine_check import record_state
+from src.statistician import Statistician, game_seed
+from src.fast_game import FastGame
+from src.sweep import sweep, all_loadouts, all_pairs, matchup_seed
+
+real_play = FastGame.play
+
+def dies(seed):
+    return seed % 5 == 0
+
+def play_or_die(fast_game):
+    # A worker dying outright, not just raising
+    if dies(fast_game.rng.game_seed):
+        os._exit(1)
+    return real_play(fast_game)
+
+def test_worker_dies(monkeypatch):
+    # Only loses the game that killed it, instead of hanging the campaign
+    seeds = [game_seed(0, i) for i in range(40)]
+    dead = {seed for seed in seeds if dies(seed)}
+    assert dead
+    expected = Statistician(seed=0, fast=True, keep_games=True)
+    expected.run_card_simulations(40)
+    loadouts = all_loadouts()[:4]
+    expected_matrix = sweep(4, 1, 0, loadouts)
+
+    monkeypatch.setattr(FastGame, "play", play_or_die)
+    s = Statistician(seed=0, fast=True, workers=2, keep_games=True)
+    s.run_card_simulations(40)
+    assert set(s.quarantine.reasons()) == {"worker_died"}
+    assert {g["seed"] for g in s.quarantine.games} == dead
+    # (And every other game played just the same)
+    assert [record_state(record) for record in s.games] == [
+        record_state(record)
+        for seed, record in zip(seeds, expected.games) if seed not in dead
+    ]
+
+    # A sweep loses the matchups with a game that kills it's worker,
+    # (a matchup's games depend on each other) and only those
+    matrix = sweep(4, 2, 0, loadouts)
+    assert set(matrix.skipped.reasons()) == {"worker_died"}
+    for i, j in all_pairs(loadouts):
+        a, b = loadouts[i], loadouts[j]
+        lost = any(dies(matchup_seed(0, a, b, game)) for game in range(4))
+        assert matrix.cell(i, j) == (
+            (0, 0, 0) if lost else expected_matrix.cell(i, j))
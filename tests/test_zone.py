@@ -0,0 +1,27 @@
+from src import benchmark
+from src.card import MeltSensors
+
+def test_zones():
+    game_state, player = benchmark.canned_game()
+    card = next(iter(player.hand))
+    assert card in player.hand and card.zone is player.hand
+    player.retire(card)
+    assert card not in player.hand and list(player.retired)[-1] is card
+    player.check_cards()
+
+    # A fork's cards are in the fork's zones
+    forked = game_state.fork()
+    for p in [forked.white, forked.black]:
+        for zone in [p.deck, p.hand, p.discarded, p.retired]:
+            assert all(c.zone is zone for c in zone)
+        p.check_cards()
+
+    # Setting a zone to some cards moves them there
+    player.hand = [card]
+    assert player.hand == [card] and card not in player.retired
+
+    # ...and anything worked out about the board is worked out again
+    discard = MeltSensors(game_state, player)
+    assert discard.how_many_can() == 1
+    player.get_enemy().hand = []
+    assert discard.how_many_can() == 0